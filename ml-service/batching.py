@@ -0,0 +1,110 @@
+"""
+Dynamic micro-batching
+Coalesces concurrent single-row predictions for a model into one vectorized predict_batch call
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import MODEL_BATCH_SIZE, MODEL_BATCH_WAIT_SECONDS
+
+# A batch is scored once it holds ML_BATCH_MAX_SIZE rows or its first row has
+# waited ML_BATCH_MAX_WAIT_MS; a size of 1 disables batching
+MAX_BATCH_SIZE = int(os.getenv('ML_BATCH_MAX_SIZE', '64'))
+MAX_WAIT_MS = float(os.getenv('ML_BATCH_MAX_WAIT_MS', '1'))
+
+
+class MicroBatcher:
+    """Queue of single-row predictions for one model, scored together in batches
+
+    Callers await predict() as they would call model.predict(). Rows arriving
+    while a batch is open join it; the batch is scored on the event loop when
+    it is full or max_wait_ms after it opened, and each caller gets its own
+    row back. With max_wait_ms 0 only rows queued in the same event loop turn
+    are coalesced.
+    """
+
+    def __init__(self, model, max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        # (features, future, enqueue time) per queued row
+        self._pending: List[Tuple[List[float], asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.Handle] = None
+        self.batches = 0
+        self.rows = 0
+
+    async def predict(self, features: List[float]) -> np.ndarray:
+        """Prediction for one row, with the values and shape of model.predict"""
+        if self.max_batch_size <= 1:
+            return self.model.predict(features)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((features, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            if self.max_wait > 0:
+                self._timer = loop.call_later(self.max_wait, self.flush)
+            else:
+                self._timer = loop.call_soon(self.flush)
+        return await future
+
+    def flush(self):
+        """Score every queued row now"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        start = time.perf_counter()
+        model_name = self.model.model_name
+        for _, _, enqueued in batch:
+            MODEL_BATCH_WAIT_SECONDS.observe(start - enqueued, model_name)
+        MODEL_BATCH_SIZE.observe(len(batch), model_name)
+        self.batches += 1
+        self.rows += len(batch)
+
+        try:
+            results = self.model.predict_rows([features for features, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), result in zip(batch, results):
+            # Skip callers that went away (cancelled request) while queued
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch counters"""
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0,
+            'queued': len(self._pending),
+        }
+
+
+# One batcher per model name, created on first use
+_batchers: Dict[str, MicroBatcher] = {}
+
+
+def get_batcher(name: str, model) -> MicroBatcher:
+    """Shared batcher for the model registered as name"""
+    batcher = _batchers.get(name)
+    if batcher is None or batcher.model is not model:
+        batcher = _batchers[name] = MicroBatcher(model)
+    return batcher
+
+def batcher_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats per model batcher"""
+    return {name: batcher.stats() for name, batcher in _batchers.items()}
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Model Artifact Benchmark
+Loads one large model artifact in several worker processes, as joblib pickles and as
+memory-mapped .npy artifacts, comparing load time and private versus shared resident memory
+"""
+
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.artifacts import load_artifact, save_artifact
+
+
+def memory_kb() -> dict:
+    """Private and shared resident memory of this process (Linux smaps_rollup), in kB"""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "pss": fields.get("Pss", 0),
+    }
+
+
+def worker(fmt: str, path: str, ready, go, results):
+    before = memory_kb()
+    start = time.perf_counter()
+    if fmt == "joblib":
+        weights = joblib.load(path)["weights"]
+    else:
+        weights = load_artifact(Path(path))[0]["weights"]
+    load_ms = (time.perf_counter() - start) * 1000
+    checksum = float(weights.sum())  # touch every page, as inference would
+    ready.set()
+    go.wait()  # measure once every worker holds the model
+    after = memory_kb()
+    results.put((load_ms, {k: after[k] - before[k] for k in after}, checksum))
+
+
+def run(fmt: str, path: Path, workers: int):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    go = ctx.Event()
+    readies = [ctx.Event() for _ in range(workers)]
+    procs = [ctx.Process(target=worker, args=(fmt, str(path), ready, go, results)) for ready in readies]
+    for proc in procs:
+        proc.start()
+    for ready in readies:
+        ready.wait()
+    go.set()
+    rows = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    load_ms = np.mean([row[0] for row in rows])
+    private = np.mean([row[1]["private"] for row in rows]) / 1024
+    pss = sum(row[1]["pss"] for row in rows) / 1024
+    print(f"{fmt:<9} {workers} workers  load {load_ms:8.2f} ms  private {private:7.1f} MB/worker  "
+          f"total PSS {pss:7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mb", type=int, default=128, help="size of the weight matrix")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    side = int((args.mb * 1024 * 1024 / 8) ** 0.5)
+    weights = np.random.default_rng(0).standard_normal((side, side))
+    with tempfile.TemporaryDirectory() as tmp:
+        joblib_path = Path(tmp) / "model.joblib"
+        artifact_path = Path(tmp) / "model.json"
+        joblib.dump({"weights": weights, "version": "bench"}, joblib_path)
+        save_artifact(artifact_path, {"weights": weights}, {"version": "bench"})
+        del weights
+
+        print(f"{side}x{side} float64 weights ({args.mb} MB); memory counted after load and first full read")
+        for workers in args.workers:
+            for fmt, path in (("joblib", joblib_path), ("artifact", artifact_path)):
+                run(fmt, path, workers)
+
+
+if __name__ == "__main__":
+    main()
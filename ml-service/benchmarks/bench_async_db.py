@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Async Database Benchmark
+Fires concurrent user data loads with the blocking driver on a thread pool and with
+the asyncpg pool, measuring throughput, latency and event loop stalls
+Requires DATABASE_URL pointing at a scratch PostgreSQL database
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database import DatabaseManager
+from executor import BoundedPool, _thread_pool
+from pg_fixture import seed_users
+
+
+async def run(load, user_ids, requests, concurrency, probe_interval):
+    """Issue requests loads, concurrency at a time; returns (elapsed, latencies, loop lags)"""
+    latencies, lags = [], []
+    done = asyncio.Event()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            user_data = await load(user_ids[i % len(user_ids)])
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert user_data, "user not found"
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(probe_interval)
+            lags.append((time.perf_counter() - start - probe_interval) * 1000)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    return elapsed, latencies, lags
+
+
+def report(label, requests, elapsed, latencies, lags):
+    q = statistics.quantiles(latencies, n=100)
+    lag_q = statistics.quantiles(lags, n=100)
+    print(f"{label:<14} {requests / elapsed:7.0f} loads/s  p50 {q[49]:7.1f} ms  p99 {q[98]:7.1f} ms  "
+          f"loop lag p99 {lag_q[98]:6.1f} ms")
+
+
+async def amain():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=16, help="I/O threads for the blocking driver")
+    parser.add_argument("--mode", default="snapshot", choices=("snapshot", "sequential"))
+    parser.add_argument("--probe-interval-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("DATABASE_URL must point at a scratch PostgreSQL database")
+
+    user_ids = seed_users(os.environ["DATABASE_URL"], args.users)
+    db = DatabaseManager()
+    # Queue deep enough for every in-flight request, so the comparison measures speed, not rejections
+    pool = BoundedPool("io", _thread_pool, max_workers=args.threads, max_queue=args.concurrency)
+
+    async def threaded(user_id):
+        return await pool.run(db.get_user_data, user_id, args.mode)
+
+    async def pooled_async(user_id):
+        return await db.get_user_data_async(user_id, args.mode)
+
+    assert await pooled_async(user_ids[0]) == db.get_user_data(user_ids[0], args.mode)
+
+    print(f"{args.requests} {args.mode} loads, concurrency {args.concurrency}, "
+          f"{db.pool_size}+{db.max_overflow} pooled connections, {args.threads} I/O threads")
+    for label, load in (("sync+threads", threaded), ("async", pooled_async)):
+        await run(load, user_ids, min(args.requests, 500), args.concurrency, 0.005)  # warm-up
+        report(label, args.requests, *await run(load, user_ids, args.requests,
+                                                args.concurrency, args.probe_interval_ms / 1000))
+    print(f"pools after run: {db.pool_stats()}")
+
+    pool.shutdown()
+    await db.dispose_async()
+
+
+if __name__ == "__main__":
+    asyncio.run(amain())
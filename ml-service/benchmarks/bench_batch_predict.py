@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Batch Prediction Benchmark
+Compares per-row POST /predict/{model} calls against one POST /predict/{model}/batch
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Run from anywhere: make the service modules importable
+sys.path.append(str(Path(__file__).parent.parent))
+
+from fastapi.testclient import TestClient
+from main import app, models, NPY_MEDIA_TYPE
+
+
+def bench_per_row(client, model_name, X):
+    """Time one HTTP call per feature row"""
+    start = time.perf_counter()
+    for row in X:
+        response = client.post(f"/predict/{model_name}", json={"features": row.tolist()})
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def bench_batch_json(client, model_name, X):
+    """Time a single JSON batch call"""
+    body = json.dumps({"features": X.tolist()})
+    start = time.perf_counter()
+    response = client.post(
+        f"/predict/{model_name}/batch",
+        content=body,
+        headers={"Content-Type": "application/json"},
+    )
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def bench_batch_npy(client, model_name, X):
+    """Time a single binary .npy batch call"""
+    buffer = io.BytesIO()
+    np.save(buffer, X.astype(np.float32))
+    start = time.perf_counter()
+    response = client.post(
+        f"/predict/{model_name}/batch",
+        content=buffer.getvalue(),
+        headers={"Content-Type": NPY_MEDIA_TYPE, "Accept": NPY_MEDIA_TYPE},
+    )
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--model", default="learning-path-predictor", choices=sorted(models))
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    n_features = len(models[args.model].feature_names)
+    X = np.random.default_rng(42).random((args.rows, n_features))
+
+    per_row = bench_per_row(client, args.model, X)
+    batch_json = bench_batch_json(client, args.model, X)
+    batch_npy = bench_batch_npy(client, args.model, X)
+
+    print(f"{args.model}: {args.rows} rows x {n_features} features")
+    for label, elapsed in [("per-row", per_row), ("batch json", batch_json), ("batch npy", batch_npy)]:
+        print(f"  {label:<11} {elapsed * 1000:10.1f} ms  {args.rows / elapsed:12.0f} rows/s"
+              f"  {per_row / elapsed:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
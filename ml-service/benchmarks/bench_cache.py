@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Cache Client Concurrency Benchmark
+Runs concurrent cache-hit requests on one event loop with the blocking RedisCache,
+the asyncio AsyncRedisCache and the L1+Redis TieredCache, through a TCP proxy
+that adds network latency
+Requires a Redis server (REDIS_URL, default redis://localhost:6379)
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cache import AsyncRedisCache, RedisCache, TieredCache
+
+
+class LatencyProxy:
+    """TCP proxy on its own thread that delays every forwarded chunk"""
+
+    def __init__(self, target_host: str, target_port: int, delay_ms: float):
+        self.target = (target_host, target_port)
+        self.delay = delay_ms / 1000.0
+        self.port = None
+        self._ready = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait()
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", 0))
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        loop.run_forever()
+
+    async def _pipe(self, reader, writer):
+        try:
+            while data := await reader.read(65536):
+                await asyncio.sleep(self.delay / 2)  # half the RTT each way
+                writer.write(data)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _handle(self, reader, writer):
+        upstream_reader, upstream_writer = await asyncio.open_connection(*self.target)
+        await asyncio.gather(self._pipe(reader, upstream_writer), self._pipe(upstream_reader, writer),
+                             return_exceptions=True)
+
+
+async def run_load(get, concurrency: int, requests_per_worker: int):
+    """Fire concurrent workers that each issue cache gets; returns latencies in ms"""
+    latencies = []
+
+    async def worker(worker_id):
+        for i in range(requests_per_worker):
+            start = time.perf_counter()
+            await asyncio.sleep(0)  # yield as a handler does while receiving the request
+            await get(f"bench:key:{(worker_id + i) % 100}")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+def report(label, latencies, elapsed):
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{label:<7} p50 {quantiles[49]:8.2f} ms  p99 {quantiles[98]:8.2f} ms  "
+          f"{len(latencies) / elapsed:9.0f} req/s")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20, help="requests per concurrent worker")
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="added network round-trip time")
+    args = parser.parse_args()
+
+    url = urlparse(os.getenv("REDIS_URL", "redis://localhost:6379"))
+    proxy = LatencyProxy(url.hostname or "localhost", url.port or 6379, args.latency_ms)
+    os.environ["REDIS_URL"] = f"redis://127.0.0.1:{proxy.port}/{url.path.lstrip('/') or 0}"
+
+    sync_cache = RedisCache()
+    sync_cache.connect()
+    async_cache = AsyncRedisCache()
+    await async_cache.connect()
+    await async_cache.set_many({f"bench:key:{i}": {"prediction": [0.5] * 15} for i in range(100)}, 60)
+
+    async def sync_get(key):
+        return sync_cache.get(key)  # blocks the event loop, as the handlers used to
+
+    print(f"{args.concurrency} concurrent workers x {args.requests} requests, "
+          f"+{args.latency_ms} ms RTT, pool size {async_cache.max_connections}")
+    report("sync", *await run_load(sync_get, args.concurrency, args.requests))
+    report("async", *await run_load(async_cache.get, args.concurrency, args.requests))
+
+    tiered = TieredCache(async_cache)
+    report("tiered", *await run_load(tiered.get, args.concurrency, args.requests))
+    l1 = tiered.stats()['l1']
+    print(f"tiered  L1 hit rate {l1['hit_rate']:.1%}, {tiered.remote_hits} Redis round trips")
+
+    sync_cache.disconnect()
+    await async_cache.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Event Loop Concurrency Benchmark
+Fires concurrent /coach/insights cache misses at the app in-process while measuring
+event loop stalls, with database calls inline on the event loop and on the I/O pool
+Requires DATABASE_URL pointing at a scratch PostgreSQL database
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import httpx
+
+import main
+from executor import io_pool
+from pg_fixture import seed_users
+
+
+def context_for(user_id: str, i: int) -> dict:
+    return {
+        "userId": user_id, "contentId": f"lesson-{i}", "currentWeek": 3,
+        "performanceScore": 72.0, "timeSpent": 1200, "hintsUsed": 1, "errorRate": 0.1,
+        "studyStreak": 4, "avgScore": 70.0, "completionRate": 0.8, "struggleTime": 60,
+        "topicScores": {}, "attemptCounts": {}, "timeSpentPerTopic": {}, "errorPatterns": {},
+    }
+
+
+async def run(client, user_ids, requests, concurrency, probe_interval):
+    """Run insight requests at fixed concurrency; returns (elapsed, insight latencies, loop lags)"""
+    insight_latencies, lags = [], []
+    done = asyncio.Event()
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            response = await client.post("/coach/insights", json=context_for(user_ids[i % len(user_ids)], i))
+            response.raise_for_status()
+            insight_latencies.append((time.perf_counter() - start) * 1000)
+
+    async def probe():
+        # How late a timer fires is how long any request would wait for the loop
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(probe_interval)
+            lags.append((time.perf_counter() - start - probe_interval) * 1000)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    return elapsed, insight_latencies, lags
+
+
+def report(label, requests, elapsed, insight_latencies, lags):
+    q = statistics.quantiles(insight_latencies, n=100)
+    lag_q = statistics.quantiles(lags, n=100)
+    print(f"{label:<8} {requests / elapsed:6.0f} req/s  insights p50 {q[49]:7.1f} ms p99 {q[98]:7.1f} ms  "
+          f"loop lag p50 {lag_q[49]:6.1f} ms p99 {lag_q[98]:6.1f} ms")
+
+
+async def amain():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--db-latency-ms", type=float, default=20.0,
+                        help="extra blocking latency per user load, as from a remote database")
+    parser.add_argument("--probe-interval-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("DATABASE_URL must point at a scratch PostgreSQL database")
+
+    user_ids = seed_users(os.environ["DATABASE_URL"], args.users)
+    db = main.db_manager
+
+    load_user = db.get_user_data
+
+    def slow_load(user_id, mode=None):
+        time.sleep(args.db_latency_ms / 1000)  # blocking, like a synchronous driver waiting on the network
+        return load_user(user_id, mode)
+
+    db.get_user_data = slow_load
+    db.async_enabled = False  # compare the blocking driver inline and on the I/O pool
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        print(f"{args.requests} insight requests, concurrency {args.concurrency}, "
+              f"+{args.db_latency_ms} ms DB latency, {io_pool.max_workers} I/O threads")
+        workers = io_pool.max_workers
+        for label, threads in (("inline", 0), ("io-pool", workers)):
+            io_pool.max_workers = threads
+            main.response_cache.local.clear()
+            report(label, args.requests, *await run(client, user_ids, args.requests,
+                                                    args.concurrency, args.probe_interval_ms / 1000))
+    io_pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(amain())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Feature Store Benchmark
+Compares building features from a learner's full history with reading their stored
+aggregates, across history lengths, and times applying one learning event
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from reference_features import synthetic_users
+from cache import AsyncRedisCache
+from database import db_manager
+from feature_store import FeatureStore, aggregate_features, user_aggregates, version_key
+
+HISTORY_SIZES = (40, 200, 1000, 5000)
+
+
+def per_call_us(fn, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+async def per_call_async_us(fn, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        await fn()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+async def run(args):
+    remote = AsyncRedisCache()
+    if args.redis_url:
+        remote.redis_url = args.redis_url
+        await remote.connect()
+    else:
+        import fakeredis
+        remote.client = fakeredis.aioredis.FakeRedis(decode_responses=False)
+        remote.is_connected = True
+    store = FeatureStore(remote, enabled=True)
+
+    print(f"Redis: {args.redis_url or 'fakeredis (in-process)'}; database load time not included")
+    print(f"{'lessons':>8} {'from history us':>16} {'from store us':>14} {'event us':>9}")
+    for n_lessons in HISTORY_SIZES:
+        user = synthetic_users(1, lessons_per_user=n_lessons, seed=n_lessons)[0]
+        user["progress"] = (user["progress"] * (n_lessons // max(len(user["progress"]), 1) + 1))[:n_lessons]
+        user_id = f"bench-{n_lessons}"
+        await store.put(user_id, user_aggregates(user), await store.version(user_id))
+
+        history_us = per_call_us(lambda: db_manager.extract_ml_features(user), args.number)
+
+        async def from_store():
+            aggregate_features(await store.get(user_id))
+
+        event = {"type": "progress", "data": user["progress"][0]}
+        store_us = await per_call_async_us(from_store, args.number)
+        event_us = await per_call_async_us(lambda: store.apply_events(user_id, [event]), args.number)
+        print(f"{len(user['progress']):>8} {history_us:>16.1f} {store_us:>14.1f} {event_us:>9.1f}")
+
+    if args.live:
+        # The history path also loads every row from the database first
+        from pg_fixture import seed_users
+        seeded = seed_users(os.environ["DATABASE_URL"], 1)[0]
+        load_us = per_call_us(lambda: db_manager.get_user_data(seeded), args.number)
+        print(f"database load of a seeded {len(db_manager.get_user_data(seeded)['progress'])}-lesson learner: "
+              f"{load_us:.1f} us (history path only)")
+
+    for n in HISTORY_SIZES:
+        await store.delete(f"bench-{n}")
+    await remote.delete(*[version_key(f"bench-{n}") for n in HISTORY_SIZES])
+    if args.redis_url:
+        await remote.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--redis-url", help="time against this Redis instead of fakeredis")
+    parser.add_argument("--live", action="store_true", help="also time the database load (DATABASE_URL)")
+    parser.add_argument("--number", type=int, default=200, help="calls per measurement")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
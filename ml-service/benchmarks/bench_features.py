@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Feature Extraction Benchmark
+Compares the per-user extract_ml_features loop with the columnar feature engine
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from features import extract_feature_matrices
+from reference_features import legacy_extract_ml_features, synthetic_users
+
+
+def bench(n_users: int):
+    """Time legacy per-user extraction against one columnar call"""
+    users = synthetic_users(n_users)
+
+    start = time.perf_counter()
+    legacy = [legacy_extract_ml_features(user) for user in users]
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrices = extract_feature_matrices(users)
+    columnar_elapsed = time.perf_counter() - start
+
+    for key, matrix in matrices.items():
+        expected = np.array([row[key] for row in legacy], dtype=np.float32).reshape(matrix.shape)
+        assert np.array_equal(matrix, expected), key
+
+    print(f"{n_users:>7} users  legacy {legacy_elapsed * 1000:10.2f} ms  "
+          f"columnar {columnar_elapsed * 1000:10.2f} ms  {legacy_elapsed / columnar_elapsed:6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 1_000, 100_000])
+    args = parser.parse_args()
+    for n_users in args.users:
+        bench(n_users)
+
+
+if __name__ == "__main__":
+    main()
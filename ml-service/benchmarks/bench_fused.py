@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Fused Inference Benchmark
+Compares five per-model predictions with one fused block-diagonal pass, for a
+single learner profile (the /coach/insights path) and for bulk scoring
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from reference_features import synthetic_users
+from features import FEATURE_SIZES, MODEL_FEATURE_KEYS, extract_feature_matrices
+from models.fused import FusedInferenceEngine
+from models.learning_path_predictor import LearningPathPredictor
+from models.learning_style_detector import LearningStyleDetector
+from models.motivational_analyzer import MotivationalAnalyzer
+from models.performance_predictor import PerformancePredictor
+from models.skill_gap_analyzer import SkillGapAnalyzer
+
+MODEL_CLASSES = {
+    'learning-path-predictor': LearningPathPredictor,
+    'performance-predictor': PerformancePredictor,
+    'learning-style-detector': LearningStyleDetector,
+    'skill-gap-analyzer': SkillGapAnalyzer,
+    'motivational-analyzer': MotivationalAnalyzer,
+}
+
+
+def trained_models(seed: int = 0):
+    """Model instances with random weights and scalers, as if trained (nothing is saved)"""
+    rng = np.random.default_rng(seed)
+    models = {}
+    for name, cls in MODEL_CLASSES.items():
+        model = cls()
+        n_features = len(model.feature_names)
+        n_outputs = model._predict_model(np.zeros((1, n_features))).shape[1]
+        model.is_trained = True
+        model.weights = rng.normal(size=(n_features, n_outputs)) * 0.1
+        if name == 'performance-predictor':
+            model.weights = model.weights[:, 0]
+        model.bias = 0.5
+        model.scaler_mean = rng.normal(size=n_features)
+        model.scaler_std = rng.uniform(0.5, 2.0, size=n_features)
+        models[name] = model
+    return models
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--number", type=int, default=2000, help="single-profile repetitions")
+    args = parser.parse_args()
+
+    models = trained_models()
+    engine = FusedInferenceEngine(models, MODEL_FEATURE_KEYS, FEATURE_SIZES)
+    print(f"fused weight matrix {engine.weights.shape}, {len(engine.fallback)} fallback models")
+
+    # Single profile: what /coach/insights scores per request
+    profile = {k: m[0].tolist() for k, m in extract_feature_matrices(synthetic_users(1), dtype=float).items()}
+
+    def per_model():
+        return {name: model.predict(list(profile[MODEL_FEATURE_KEYS[name]])) for name, model in models.items()}
+
+    def fused():
+        return engine.predict_one(profile)
+
+    for name, out in per_model().items():
+        np.testing.assert_allclose(np.atleast_2d(out), fused()[name], rtol=1e-9)
+    per_model_us = timeit.timeit(per_model, number=args.number) / args.number * 1e6
+    fused_us = timeit.timeit(fused, number=args.number) / args.number * 1e6
+    print(f"single profile  per-model {per_model_us:8.1f} us  fused {fused_us:8.1f} us  "
+          f"({per_model_us / fused_us:.1f}x)")
+
+    # Bulk: every learner's feature blocks at once
+    matrices = extract_feature_matrices(synthetic_users(args.users), dtype=np.float64)
+
+    def per_model_batch():
+        return {name: model.predict_batch(matrices[MODEL_FEATURE_KEYS[name]]) for name, model in models.items()}
+
+    for name, out in per_model_batch().items():
+        np.testing.assert_allclose(out, engine.predict(matrices)[name], rtol=1e-9)
+    per_model_s = min(timeit.repeat(per_model_batch, number=1, repeat=5))
+    fused_s = min(timeit.repeat(lambda: engine.predict(matrices), number=1, repeat=5))
+    print(f"bulk {args.users:>7} per-model {per_model_s * 1000:8.1f} ms  fused {fused_s * 1000:8.1f} ms  "
+          f"({per_model_s / fused_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Micro-Batching Benchmark
+Closed-loop clients send single-row predictions through MicroBatcher at several concurrency
+levels and batch wait times, reporting throughput and latency against unbatched predict
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from bench_fused import trained_models
+from batching import MicroBatcher
+
+
+async def run(model, max_batch_size: int, max_wait_ms: float, concurrency: int, duration: float):
+    batcher = MicroBatcher(model, max_batch_size, max_wait_ms)
+    rows = np.random.default_rng(0).random((256, len(model.feature_names))).tolist()
+    latencies = []
+    deadline = time.perf_counter() + duration
+
+    async def client(i: int):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await batcher.predict(list(rows[i % len(rows)]))
+            latencies.append(time.perf_counter() - start)
+            # Yield like a request handler would between requests, so
+            # unbatched clients interleave instead of running back to back
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "mean_batch": batcher.stats()["mean_batch_size"] if max_batch_size > 1 else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="learning-path-predictor")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 64, 256])
+    parser.add_argument("--wait-ms", type=float, nargs="+", default=[0, 1, 2, 5])
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=1.0, help="seconds per configuration")
+    args = parser.parse_args()
+
+    model = trained_models()[args.model]
+    configs = [("unbatched", 1, 0.0)] + [(f"wait {w:g} ms", args.max_batch_size, w) for w in args.wait_ms]
+    print(f"{args.model}, max batch {args.max_batch_size}")
+    print(f"{'config':<12} {'clients':>7} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'batch':>6}")
+    for concurrency in args.concurrency:
+        for label, size, wait_ms in configs:
+            result = asyncio.run(run(model, size, wait_ms, concurrency, args.duration))
+            print(f"{label:<12} {concurrency:>7} {result['throughput']:>10.0f} {result['p50_ms']:>8.3f} "
+                  f"{result['p99_ms']:>8.3f} {result['mean_batch']:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
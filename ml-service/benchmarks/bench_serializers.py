@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Cache Serializer Benchmark
+Compares encoded size and encode/decode time of cached predictions and coach
+insights across serializers; with --redis also reports Redis MEMORY USAGE
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from serializers import SERIALIZERS, JSONSerializer, loads
+
+
+class LegacyJSON:
+    """The pre-serializer path: json.dumps text, json.loads on every hit"""
+
+    def dumps(self, value):
+        return json.dumps(value).encode()
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+def prediction_payload():
+    """Cached /predict/learning-path-predictor response (15 topic probabilities)"""
+    return {
+        'prediction': [[random.random() for _ in range(15)]],
+        'confidence': 0.8,
+        'probabilities': None,
+        'explanation': 'Recommended learning path based on user performance data',
+        'feature_importance': None
+    }
+
+def insights_payload():
+    """Cached /coach/insights response"""
+    topics = ['git_basics', 'linux_commands', 'docker_fundamentals', 'kubernetes_basics',
+              'aws_services', 'terraform_intro', 'ci_cd_jenkins', 'monitoring_prometheus']
+    return {
+        'learningStyle': {'primary': 'kinesthetic', 'confidence': random.random(),
+                          'scores': {k: random.random() for k in ('visual', 'kinesthetic', 'reading', 'auditory')}},
+        'skillGaps': [{'skill': t, 'gap': random.random(), 'priority': 'high',
+                       'recommendedResources': [f'{t}_lab_{i}' for i in range(3)]} for t in topics[:5]],
+        'optimalPath': {'recommended_topics': [{'topic': t, 'score': random.random(), 'week': i + 1}
+                                               for i, t in enumerate(topics[:5])],
+                        'reasoning': 'Based on your current progress and performance patterns'},
+        'performancePrediction': {'completion_probability': random.random(), 'predicted_score': random.random() * 100,
+                                  'weekly_trend': [random.random() for _ in range(12)]},
+        'motivationalProfile': {'type': 'achiever', 'engagement': random.random(),
+                                'history': [random.random() for _ in range(30)]},
+    }
+
+
+def bench(label, serializer, payloads, number, client=None):
+    blobs = [serializer.dumps(p) for p in payloads]
+    size = sum(len(b) for b in blobs) / len(blobs)
+    encode_us = timeit.timeit(lambda: [serializer.dumps(p) for p in payloads], number=number) \
+        / (number * len(payloads)) * 1e6
+    decode_us = timeit.timeit(lambda: [serializer.loads(b) for b in blobs], number=number) \
+        / (number * len(payloads)) * 1e6
+
+    memory = ''
+    if client is not None:
+        key = f"bench:serializer:{label}"
+        client.set(key, blobs[0])
+        memory = f"  redis {client.memory_usage(key):6d} B"
+        client.delete(key)
+    print(f"  {label:<14} {size:8.0f} B  encode {encode_us:6.2f} us  decode {decode_us:6.2f} us{memory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--payloads", type=int, default=200)
+    parser.add_argument("--number", type=int, default=50, help="timing repetitions")
+    parser.add_argument("--redis", action="store_true", help="measure MEMORY USAGE on REDIS_URL")
+    args = parser.parse_args()
+
+    client = None
+    if args.redis:
+        import redis
+        client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+
+    random.seed(0)
+    serializers = [("legacy json", LegacyJSON()), ("json", JSONSerializer())]
+    serializers += [(name, s) for name, s in SERIALIZERS.items() if name != 'json']
+    for title, factory in (("prediction", prediction_payload), ("insights", insights_payload)):
+        payloads = [factory() for _ in range(args.payloads)]
+        print(title)
+        for label, serializer in serializers:
+            bench(label, serializer, payloads, args.number, client)
+        assert all(loads(SERIALIZERS[name].dumps(p)) == p for name in SERIALIZERS for p in payloads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Service Startup Benchmark
+Times a cold start in fresh interpreters: importing main, the first /predict request and
+loading every model, with models loaded lazily on first use or eagerly at import
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).parent.parent
+
+# Runs in a fresh interpreter; prints one JSON line of millisecond timings
+CHILD = """
+import asyncio, json, sys, time
+import httpx  # test client only, not part of the service's startup
+
+start = time.perf_counter()
+import main
+if sys.argv[1] == "eager":
+    main.models.load_all()
+imported = time.perf_counter()
+
+async def first_request():
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/predict/performance-predictor", json={"features": [0.5] * 8})
+        response.raise_for_status()
+
+asyncio.run(first_request())
+requested = time.perf_counter()
+main._warm_up_models()
+warmed = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (requested - imported) * 1000,
+    "warm_up_ms": (warmed - requested) * 1000,
+}))
+"""
+
+
+def cold_start(mode: str) -> dict:
+    env = dict(os.environ, ML_WARMUP="false")
+    launched = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD, mode], cwd=SERVICE_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    total_ms = (time.perf_counter() - launched) * 1000
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings["process_ms"] = total_ms
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5, help="cold starts per mode (median reported)")
+    args = parser.parse_args()
+
+    print(f"median of {args.runs} cold starts; DATABASE_URL {'set' if os.getenv('DATABASE_URL') else 'unset'}")
+    for mode in ("lazy", "eager"):
+        runs = [cold_start(mode) for _ in range(args.runs)]
+        median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(f"{mode:<6} import main {median['import_ms']:7.1f} ms  "
+              f"first /predict {median['first_request_ms']:6.1f} ms  "
+              f"load remaining models {median['warm_up_ms']:6.1f} ms  "
+              f"whole process {median['process_ms']:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Streaming Training Benchmark
+Compares peak memory and time of POST /train/{model} (one JSON document) against
+POST /train/{model}/stream with NDJSON rows or binary .npy chunks, across dataset sizes
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import httpx
+import main
+from training_stream import NDJSON_MEDIA_TYPE
+
+# The JSON and streamed request bodies are generated in 1,000-row slices
+SLICE_ROWS = 1000
+
+
+def npy_document(array: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+
+def dataset_slices(n_rows: int, n_features: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_rows, SLICE_ROWS):
+        X = rng.random((min(SLICE_ROWS, n_rows - start), n_features))
+        yield X, X[:, 1]
+
+
+async def ndjson_body(n_rows: int, n_features: int):
+    for X, y in dataset_slices(n_rows, n_features):
+        yield "".join(json.dumps({"input": row.tolist(), "output": target}) + "\n"
+                      for row, target in zip(X, y.tolist())).encode()
+
+
+async def npy_body(n_rows: int, n_features: int):
+    for X, y in dataset_slices(n_rows, n_features):
+        yield npy_document(X) + npy_document(y)
+
+
+async def measure(client: httpx.AsyncClient, url: str, content_type: str, body) -> dict:
+    """Peak traced allocations (MiB) of one request and seconds of another (tracing slows Python code)
+
+    body() returns the request content (fresh for each request).
+    """
+    headers = {"Content-Type": content_type}
+    tracemalloc.start()
+    response = await client.post(url, content=body(), headers=headers, timeout=None)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    response.raise_for_status()
+
+    start = time.perf_counter()
+    response = await client.post(url, content=body(), headers=headers, timeout=None)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return {"peak_mib": peak / 2**20, "seconds": elapsed}
+
+
+async def run(args):
+    model_dir = Path(tempfile.mkdtemp())
+    model_class = type(main.models[args.model])
+
+    def factory():
+        model = model_class()
+        model.models_dir = model_dir
+        return model
+
+    # Keep the benchmark's artifacts out of models/saved_models
+    main.MODEL_CLASSES[args.model] = factory
+    main.models[args.model].models_dir = model_dir
+    n_features = len(main.models[args.model].feature_names)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{args.model}, {n_features} features; peak memory excludes the client's prebuilt JSON body,"
+              " times include generating the streamed bodies")
+        print(f"{'rows':>9} {'mode':<7} {'peak MiB':>9} {'seconds':>8}")
+        for n_rows in args.rows:
+            # The JSON body is built before tracing starts, so only the server's copy counts
+            X = np.vstack([X for X, _ in dataset_slices(n_rows, n_features)])
+            body = json.dumps({"inputs": X.tolist(), "outputs": X[:, 1:2].tolist()}).encode()
+            del X
+            stream_url = f"/train/{args.model}/stream"
+            results = {
+                "json": await measure(client, f"/train/{args.model}", "application/json", lambda: body),
+                "ndjson": await measure(client, stream_url, NDJSON_MEDIA_TYPE,
+                                        lambda: ndjson_body(n_rows, n_features)),
+                "npy": await measure(client, stream_url, main.NPY_MEDIA_TYPE, lambda: npy_body(n_rows, n_features)),
+            }
+            del body
+            for mode, result in results.items():
+                print(f"{n_rows:>9} {mode:<7} {result['peak_mib']:>9.1f} {result['seconds']:>8.2f}")
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="performance-predictor")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 300_000])
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    cli()
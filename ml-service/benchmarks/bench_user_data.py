@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+User Data Loading Benchmark
+Compares sequential per-table loading with the single round-trip snapshot query,
+and per-user loading with the set-based bulk loader and its streaming variant
+Requires DATABASE_URL pointing at a scratch PostgreSQL database
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database import DatabaseManager
+from pg_fixture import seed_users
+
+
+def time_mode(db, user_ids, mode, iterations):
+    """Return per-call latencies in milliseconds"""
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        db.get_user_data(user_ids[i % len(user_ids)], mode=mode)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def bench_bulk(db, user_ids):
+    """Compare N per-user loads with get_users_data and iter_users_data"""
+    start = time.perf_counter()
+    for uid in user_ids:
+        db.get_user_data(uid)
+    per_user = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bulk = db.get_users_data(user_ids)
+    bulk_elapsed = time.perf_counter() - start
+    assert len(bulk) == len(user_ids)
+
+    start = time.perf_counter()
+    streamed = sum(1 for _ in db.iter_users_data())
+    stream_elapsed = time.perf_counter() - start
+
+    # Separate pass: tracemalloc slows allocation-heavy code several-fold
+    tracemalloc.start()
+    for _ in db.iter_users_data():
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"per-user    {per_user * 1000:9.1f} ms for {len(user_ids)} users")
+    print(f"bulk        {bulk_elapsed * 1000:9.1f} ms for {len(user_ids)} users ({per_user / bulk_elapsed:.1f}x)")
+    print(f"streaming   {stream_elapsed * 1000:9.1f} ms for {streamed} users, "
+          f"peak traced memory {peak / 1e6:.1f} MB (batch {db.stream_chunk_size})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--bulk", action="store_true", help="benchmark bulk and streaming loaders")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("DATABASE_URL must point at a scratch PostgreSQL database")
+
+    user_ids = seed_users(os.environ["DATABASE_URL"], args.users)
+    db = DatabaseManager()
+
+    # Results must be identical before timings mean anything
+    for uid in user_ids[:20]:
+        assert db.get_user_data(uid, mode="snapshot") == db.get_user_data(uid, mode="sequential"), uid
+
+    if args.bulk:
+        sample = user_ids[:20]
+        assert db.get_users_data(sample) == {uid: db.get_user_data(uid) for uid in sample}
+        bench_bulk(db, user_ids)
+        return
+
+    for mode in ("sequential", "snapshot"):
+        time_mode(db, user_ids, mode, 100)  # warm-up
+        latencies = time_mode(db, user_ids, mode, args.iterations)
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(f"{mode:<11} mean {statistics.mean(latencies):7.3f} ms  "
+              f"p50 {quantiles[49]:7.3f} ms  p99 {quantiles[98]:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+PostgreSQL fixture for database benchmarks
+Creates the tables read by DatabaseManager and seeds synthetic learners
+"""
+
+import json
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS "User" (
+    id TEXT PRIMARY KEY,
+    "currentWeek" INTEGER NOT NULL DEFAULT 1,
+    "totalXP" INTEGER NOT NULL DEFAULT 0,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS "Progress" (
+    "userId" TEXT NOT NULL REFERENCES "User"(id) ON DELETE CASCADE,
+    "weekId" INTEGER NOT NULL,
+    "lessonId" TEXT NOT NULL,
+    completed BOOLEAN NOT NULL DEFAULT false,
+    score INTEGER,
+    "completedAt" TIMESTAMP(3),
+    UNIQUE ("userId", "weekId", "lessonId")
+);
+CREATE TABLE IF NOT EXISTS "LabSession" (
+    "userId" TEXT NOT NULL REFERENCES "User"(id) ON DELETE CASCADE,
+    "exerciseId" TEXT NOT NULL,
+    passed BOOLEAN NOT NULL DEFAULT false,
+    "submittedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS "AfterActionReview" (
+    "userId" TEXT NOT NULL REFERENCES "User"(id) ON DELETE CASCADE,
+    "lessonId" TEXT NOT NULL,
+    level TEXT NOT NULL,
+    "completedAt" TIMESTAMP(3) NOT NULL,
+    "qualityScore" DOUBLE PRECISION,
+    "whatWorkedWell" JSONB NOT NULL,
+    "whatDidNotWork" JSONB NOT NULL,
+    "wordCounts" JSONB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS "Badge" (
+    "userId" TEXT NOT NULL REFERENCES "User"(id) ON DELETE CASCADE,
+    "badgeType" TEXT NOT NULL,
+    "earnedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS "Project" (
+    "userId" TEXT NOT NULL REFERENCES "User"(id) ON DELETE CASCADE,
+    "projectId" TEXT NOT NULL,
+    completed BOOLEAN NOT NULL DEFAULT false,
+    "completedAt" TIMESTAMP(3),
+    UNIQUE ("userId", "projectId")
+);
+CREATE INDEX IF NOT EXISTS "Progress_userId_idx" ON "Progress"("userId");
+CREATE INDEX IF NOT EXISTS "LabSession_userId_idx" ON "LabSession"("userId");
+CREATE INDEX IF NOT EXISTS "AfterActionReview_userId_idx" ON "AfterActionReview"("userId");
+CREATE INDEX IF NOT EXISTS "Badge_userId_idx" ON "Badge"("userId");
+"""
+
+TOPICS = ["git", "linux", "docker", "kubernetes", "aws", "terraform", "jenkins", "monitoring"]
+
+
+def user_id(i: int) -> str:
+    """Deterministic fixture user ID"""
+    return f"bench-user-{i:07d}"
+
+
+def create_schema(database_url: str):
+    """Create fixture tables (idempotent)"""
+    engine = create_engine(database_url)
+    with engine.begin() as conn:
+        for statement in SCHEMA.split(";"):
+            if statement.strip():
+                conn.execute(text(statement))
+    return engine
+
+
+def seed_users(database_url: str, n_users: int, lessons_per_user: int = 40, seed: int = 42) -> list:
+    """Seed n_users synthetic learners, skipping users that already exist"""
+    engine = create_schema(database_url)
+    rng = random.Random(seed)
+    now = datetime.now()
+
+    with engine.connect() as conn:
+        existing = conn.execute(text('SELECT count(*) FROM "User"')).scalar()
+
+    ids = [user_id(i) for i in range(n_users)]
+    rows = {"User": [], "Progress": [], "LabSession": [], "AfterActionReview": [], "Badge": [], "Project": []}
+    for i in range(existing, n_users):
+        uid = ids[i]
+        rows["User"].append({"id": uid, "week": rng.randint(1, 12), "xp": rng.randint(0, 5000)})
+        for j in range(lessons_per_user):
+            topic = TOPICS[j % len(TOPICS)]
+            completed = rng.random() < 0.8
+            rows["Progress"].append({
+                "uid": uid, "week": j // 4 + 1, "lesson": f"{topic}-lesson-{j}",
+                "completed": completed, "score": rng.randint(40, 100) if completed else None,
+                "at": now - timedelta(days=rng.randint(0, 60), minutes=j) if completed else None,
+            })
+        for j in range(lessons_per_user // 4):
+            rows["LabSession"].append({"uid": uid, "ex": f"lab-{j}", "passed": rng.random() < 0.7,
+                                       "at": now - timedelta(days=rng.randint(0, 60), minutes=j)})
+        for j in range(lessons_per_user // 8):
+            rows["AfterActionReview"].append({
+                "uid": uid, "lesson": f"{TOPICS[j % 8]}-lesson-{j}", "level": "walk",
+                "at": now - timedelta(days=rng.randint(0, 60), minutes=j), "q": rng.uniform(1, 10),
+                "good": json.dumps(["practice"]), "bad": json.dumps(["time"]),
+                "wc": json.dumps({"total": rng.randint(50, 400)}),
+            })
+        for j in range(3):
+            rows["Badge"].append({"uid": uid, "badge": f"badge-{j}", "at": now - timedelta(days=j)})
+        rows["Project"].append({"uid": uid, "project": "project-1", "completed": True, "at": now})
+
+    statements = {
+        "User": 'INSERT INTO "User" (id, "currentWeek", "totalXP") VALUES (:id, :week, :xp)',
+        "Progress": 'INSERT INTO "Progress" VALUES (:uid, :week, :lesson, :completed, :score, :at)',
+        "LabSession": 'INSERT INTO "LabSession" VALUES (:uid, :ex, :passed, :at)',
+        "AfterActionReview": 'INSERT INTO "AfterActionReview" VALUES '
+                             '(:uid, :lesson, :level, :at, :q, CAST(:good AS jsonb), CAST(:bad AS jsonb), CAST(:wc AS jsonb))',
+        "Badge": 'INSERT INTO "Badge" VALUES (:uid, :badge, :at)',
+        "Project": 'INSERT INTO "Project" VALUES (:uid, :project, :completed, :at)',
+    }
+    with engine.begin() as conn:
+        for table, statement in statements.items():
+            if rows[table]:
+                conn.execute(text(statement), rows[table])
+        conn.execute(text("ANALYZE"))
+
+    engine.dispose()
+    return ids
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+ML Service Benchmark Suite
+Times the service hot paths (model predict, feature extraction, cache serialization and
+/coach/insights end to end), saves results as JSON and flags regressions against a baseline
+
+    python benchmarks/suite.py --save-baseline      # record benchmarks/baseline.json
+    python benchmarks/suite.py --compare            # rerun; exit 1 on any regression
+    python benchmarks/suite.py -k predict --min-time 0.05
+
+By default Redis is replaced with fakeredis and the database with synthetic user data,
+so the suite runs anywhere; --live uses DATABASE_URL and REDIS_URL instead.
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from reference_features import synthetic_users
+from bench_fused import trained_models
+from bench_serializers import insights_payload, prediction_payload
+from features import FEATURE_SIZES, MODEL_FEATURE_KEYS
+from models.fused import FusedInferenceEngine
+from serializers import SERIALIZERS
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+HISTORY_SIZES = (0, 40, 200, 1000)
+BATCH_ROWS = 1000
+
+# name -> setup(args) returning the timed zero-argument callable
+BENCHMARKS: Dict[str, Callable[[argparse.Namespace], Callable[[], Any]]] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark setup function under name"""
+    def decorator(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+
+def _register_model_benchmarks():
+    models = trained_models()
+    rng = np.random.default_rng(0)
+    for name, model in models.items():
+        row = rng.random(len(model.feature_names)).tolist()
+        batch = rng.random((BATCH_ROWS, len(model.feature_names)))
+        benchmark(f"predict.{name}.single")(lambda args, m=model, r=row: lambda: m.predict(r))
+        benchmark(f"predict.{name}.batch{BATCH_ROWS}")(lambda args, m=model, b=batch: lambda: m.predict_batch(b))
+
+    profile = {key: rng.random(size).tolist() for key, size in FEATURE_SIZES.items()}
+    engine = FusedInferenceEngine(models, MODEL_FEATURE_KEYS, FEATURE_SIZES)
+    benchmark("predict.fused.single")(lambda args: lambda: engine.predict_one(profile))
+
+
+def user_with_history(n_lessons: int) -> Dict[str, Any]:
+    """Synthetic user data with exactly n_lessons progress rows"""
+    user = synthetic_users(1, lessons_per_user=max(n_lessons, 1))[0]
+    progress = user["progress"] or synthetic_users(2, lessons_per_user=4)[1]["progress"]
+    user["progress"] = (progress * (n_lessons // max(len(progress), 1) + 1))[:n_lessons]
+    return user
+
+
+def _register_feature_benchmarks():
+    from database import db_manager
+
+    for n_lessons in HISTORY_SIZES:
+        user = user_with_history(n_lessons)
+        benchmark(f"features.extract_ml_features.history{n_lessons}")(
+            lambda args, u=user: lambda: db_manager.extract_ml_features(u)
+        )
+
+
+def _register_serializer_benchmarks():
+    for payload_name, payload in (("prediction", prediction_payload()), ("insights", insights_payload())):
+        for format_name, serializer in SERIALIZERS.items():
+            data = serializer.dumps(payload)
+            benchmark(f"cache.{format_name}.dumps.{payload_name}")(
+                lambda args, s=serializer, p=payload: lambda: s.dumps(p)
+            )
+            benchmark(f"cache.{format_name}.loads.{payload_name}")(
+                lambda args, s=serializer, d=data: lambda: s.loads(d)
+            )
+
+
+class AsyncRunner:
+    """Runs coroutines on one long-lived event loop, so timings exclude loop startup"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+
+    def run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+
+def _insights_context(user_id: str, i: int) -> Dict[str, Any]:
+    return {
+        "userId": user_id, "contentId": f"lesson-{i}", "currentWeek": 3,
+        "performanceScore": 72.0, "timeSpent": 1200, "hintsUsed": 1, "errorRate": 0.1,
+        "studyStreak": 4, "avgScore": 70.0, "completionRate": 0.8, "struggleTime": 60,
+        "topicScores": {}, "attemptCounts": {}, "timeSpentPerTopic": {}, "errorPatterns": {},
+    }
+
+
+def insights_end_to_end(args):
+    """POST /coach/insights in-process; every request misses the cache and runs the full pipeline"""
+    import httpx
+    import main
+
+    runner = AsyncRunner()
+    if args.live:
+        from pg_fixture import seed_users
+        user_ids = seed_users(os.environ["DATABASE_URL"], 50)
+        runner.run(main.response_cache.connect())
+    else:
+        import fakeredis
+        remote = main.response_cache.remote
+        remote.client = fakeredis.aioredis.FakeRedis(decode_responses=False)
+        remote.is_connected = True
+        users = {f"user-{i}": user_with_history(40) for i in range(50)}
+        user_ids = list(users)
+
+        async def get_user_data_async(user_id, mode=None):
+            return copy.deepcopy(users[user_id])
+
+        main.db_manager.get_user_data_async = get_user_data_async
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench")
+    counter = iter(range(10 ** 9))
+
+    async def request():
+        i = next(counter)
+        response = await client.post("/coach/insights", json=_insights_context(user_ids[i % len(user_ids)], i))
+        response.raise_for_status()
+
+    runner.run(request())
+    return lambda: runner.run(request())
+
+
+def _register_all():
+    _register_model_benchmarks()
+    _register_feature_benchmarks()
+    _register_serializer_benchmarks()
+    benchmark("insights.e2e.miss")(insights_end_to_end)
+
+
+def time_benchmark(fn: Callable[[], Any], min_time: float, repeat: int) -> Dict[str, Any]:
+    """Best and median microseconds per call over repeat rounds of about min_time seconds each"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 4 or number >= 10 ** 6:
+            break
+        number *= 10 if elapsed < min_time / 40 else 2
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - start) / number)
+    return {
+        "min_us": min(rounds) * 1e6,
+        "median_us": statistics.median(rounds) * 1e6,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def machine_info() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=Path(__file__).parent).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            threshold: float) -> List[Tuple[str, float, str]]:
+    """(name, current / baseline best time, verdict) for benchmarks present in both runs"""
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = result["min_us"] / base["min_us"]
+        if ratio > 1 + threshold:
+            verdict = "REGRESSION"
+        elif ratio < 1 / (1 + threshold):
+            verdict = "improved"
+        else:
+            verdict = ""
+        rows.append((name, ratio, verdict))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing round")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="write this run's results as JSON")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results to --baseline")
+    parser.add_argument("--compare", action="store_true", help="compare with --baseline, exit 1 on regression")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="flag benchmarks this much slower (best of rounds) than the baseline")
+    parser.add_argument("--live", action="store_true", help="use DATABASE_URL and REDIS_URL instead of stand-ins")
+    args = parser.parse_args()
+
+    if args.live and not os.getenv("DATABASE_URL"):
+        sys.exit("--live needs DATABASE_URL pointing at a scratch PostgreSQL database")
+
+    _register_all()
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, setup in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+        results[name] = time_benchmark(setup(args), args.min_time, args.repeat)
+        print(f"{name:<48} {results[name]['min_us']:12.2f} us  (median {results[name]['median_us']:.2f})")
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "machine": machine_info(),
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        if args.baseline.exists():
+            # Keep baseline entries for benchmarks filtered out of this run
+            previous = json.loads(args.baseline.read_text())["results"]
+            report["results"] = {**previous, **results}
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"baseline saved to {args.baseline}")
+
+    if args.compare:
+        if not args.baseline.exists():
+            sys.exit(f"no baseline at {args.baseline}; run with --save-baseline first")
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["machine"].get("platform") != report["machine"]["platform"]:
+            print("warning: baseline was recorded on a different platform")
+        rows = compare(results, baseline["results"], args.threshold)
+        print(f"\nvs baseline {baseline['machine'].get('commit') or ''} ({baseline['timestamp']}):")
+        for name, ratio, verdict in rows:
+            print(f"{name:<48} {ratio:6.2f}x  {verdict}")
+        regressions = [name for name, _, verdict in rows if verdict == "REGRESSION"]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
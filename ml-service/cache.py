@@ -1,25 +1,94 @@
 """
 Redis caching utilities for ML service
 """
+import asyncio
+import hashlib
+import numpy as np
 import redis
+import redis.asyncio as aioredis
 import json
+import math
 import os
-from typing import Any, Optional, Callable, TypeVar
+import random
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Callable, Set, Tuple, TypeVar
 from functools import wraps
 import time
 
+from metrics import CACHE_OPERATION_SECONDS, CACHE_REQUESTS
+from serializers import Serializer, get_serializer
+
 T = TypeVar('T')
 
+# Tag indexes live as long as the longest-lived key they can point to
+TAG_TTL_SECONDS = int(os.getenv('CACHE_TAG_TTL_SECONDS', '86400'))
+# Keys popped and unlinked per round trip while invalidating a tag
+INVALIDATION_BATCH_SIZE = int(os.getenv('CACHE_INVALIDATION_BATCH_SIZE', '500'))
+# Features are rounded to this many decimals before hashing into a cache key
+KEY_FEATURE_DECIMALS = int(os.getenv('CACHE_KEY_FEATURE_DECIMALS', '6'))
+
+
+def feature_digest(features: Any) -> str:
+    """Stable digest of a feature vector or matrix
+
+    Features are quantized to KEY_FEATURE_DECIMALS and hashed as float64
+    bytes (with the shape), so the same input maps to the same key in every
+    process, unlike the per-process salted built-in hash().
+    """
+    X = np.round(np.asarray(features, dtype=np.float64), KEY_FEATURE_DECIMALS) + 0.0  # folds -0.0
+    digest = hashlib.blake2b(repr(X.shape).encode(), digest_size=16)
+    digest.update(np.ascontiguousarray(X).tobytes())
+    return digest.hexdigest()
+
+def payload_digest(payload: Any) -> str:
+    """Stable digest of a JSON-serializable payload (key order independent)"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def lock_key(key: str) -> str:
+    """Redis key of the single-flight lock guarding computation of key"""
+    return f"lock:{key}"
+
+def tag_key(tag: str) -> str:
+    """Redis key of the sorted set indexing every cache key registered under tag"""
+    return f"tag:{tag}"
+
+def user_tag(user_id: str) -> str:
+    """Tag for every cache entry derived from a user's data"""
+    return f"user:{user_id}"
+
+def prediction_tag(user_id: str) -> str:
+    """Tag for a user's cached predictions"""
+    return f"prediction:{user_id}"
+
+def model_tag(model_name: str) -> str:
+    """Tag for every cache entry produced by a model"""
+    return f"model:{model_name}"
+
+
 class RedisCache:
-    def __init__(self):
+    """Redis cache with tag-indexed invalidation
+
+    set() can register a key under tags; each tag has an index in Redis (a
+    sorted set scored by each key's expiry time), so invalidating a tag touches
+    only that tag's keys (no KEYS scans) and works the same from every service
+    replica sharing the Redis instance. Expired keys are pruned from a tag's
+    index whenever a key is registered under it.
+    """
+
+    def __init__(self, serializer: Optional[Serializer] = None):
         self.redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379')
+        self.serializer = serializer or get_serializer()
         self.client = None
         self.is_connected = False
 
     def connect(self):
         """Connect to Redis with error handling"""
         try:
-            self.client = redis.from_url(self.redis_url, decode_responses=True)
+            self.client = redis.from_url(self.redis_url)
             self.client.ping()  # Test connection
             self.is_connected = True
             print("Connected to Redis")
@@ -43,19 +112,27 @@ class RedisCache:
 
         try:
             data = self.client.get(key)
-            return json.loads(data) if data else None
+            return self.serializer.loads(data) if data else None
         except Exception as e:
             print(f"Redis get error: {e}")
             return None
 
-    def set(self, key: str, value: Any, ttl_seconds: int = 300) -> None:
-        """Set value in cache with TTL"""
+    def set(self, key: str, value: Any, ttl_seconds: int = 300,
+            tags: Optional[Iterable[str]] = None) -> None:
+        """Set value in cache with TTL, registering the key under tags"""
         if not self.is_connected or not self.client:
             return
 
         try:
-            serialized_value = json.dumps(value)
-            self.client.setex(key, ttl_seconds, serialized_value)
+            serialized_value = self.serializer.dumps(value)
+            if not tags:
+                self.client.set(key, serialized_value, ex=ttl_seconds)
+                return
+
+            with self.client.pipeline(transaction=False) as pipe:
+                pipe.set(key, serialized_value, ex=ttl_seconds)
+                _register_tags(pipe, [key], tags, ttl_seconds)
+                pipe.execute()
         except Exception as e:
             print(f"Redis set error: {e}")
 
@@ -70,17 +147,46 @@ class RedisCache:
             print(f"Redis delete error: {e}")
 
     def delete_pattern(self, pattern: str) -> None:
-        """Delete keys matching pattern"""
+        """Delete keys matching pattern
+
+        Walks the keyspace incrementally with SCAN, so prefer invalidate_tag
+        for anything on a request path.
+        """
         if not self.is_connected or not self.client:
             return
 
         try:
-            keys = self.client.keys(pattern)
-            if keys:
-                self.client.delete(*keys)
+            batch = []
+            for key in self.client.scan_iter(match=pattern, count=INVALIDATION_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= INVALIDATION_BATCH_SIZE:
+                    self.client.unlink(*batch)
+                    batch = []
+            if batch:
+                self.client.unlink(*batch)
         except Exception as e:
             print(f"Redis delete pattern error: {e}")
 
+    def invalidate_tag(self, tag: str) -> int:
+        """Delete every key registered under tag; O(keys for that tag)
+
+        Keys are popped from the tag's index in batches and unlinked, so keys
+        tagged concurrently are either deleted now or stay indexed.
+        """
+        if not self.is_connected or not self.client:
+            return 0
+
+        deleted = 0
+        try:
+            while True:
+                popped = self.client.zpopmin(tag_key(tag), INVALIDATION_BATCH_SIZE)
+                if not popped:
+                    break
+                deleted += self.client.unlink(*(key for key, _ in popped))
+        except Exception as e:
+            print(f"Redis invalidate tag error: {e}")
+        return deleted
+
     def exists(self, key: str) -> bool:
         """Check if key exists"""
         if not self.is_connected or not self.client:
@@ -118,16 +224,735 @@ class RedisCache:
 
     def invalidate_user_cache(self, user_id: str) -> None:
         """Invalidate all cache entries for a user"""
-        self.delete_pattern(f"user:{user_id}:*")
+        self.invalidate_tag(user_tag(user_id))
 
     def invalidate_prediction_cache(self, user_id: str) -> None:
         """Invalidate prediction cache for a user"""
-        self.delete_pattern(f"prediction:{user_id}:*")
+        self.invalidate_tag(prediction_tag(user_id))
 
     def invalidate_model_cache(self, model_name: str) -> None:
         """Invalidate cache for a specific model"""
-        self.delete_pattern(f"model:{model_name}:*")
+        self.invalidate_tag(model_tag(model_name))
+
+
+def _register_tags(pipe, keys: List[str], tags: Iterable[str], ttl_seconds: int) -> None:
+    """Queue index updates registering keys (expiring in ttl_seconds) under each tag
+
+    Members are scored by expiry time, so each update also drops the keys
+    that have expired since; an index never outgrows its live keys.
+    """
+    now = time.time()
+    expires = {key: now + ttl_seconds for key in keys}
+    for tag in tags:
+        pipe.zremrangebyscore(tag_key(tag), '-inf', now)
+        pipe.zadd(tag_key(tag), expires)
+        pipe.expire(tag_key(tag), TAG_TTL_SECONDS)
+
+
+class AsyncRedisCache:
+    """asyncio-native Redis cache with the same get/set/delete API as RedisCache
+
+    Commands run on a bounded connection pool. A FIFO semaphore hands out the
+    pool's connections, so when all are busy callers queue fairly for up to
+    pool_timeout instead of opening more. Socket timeouts bound each command,
+    and any Redis failure degrades to a cache miss so request handlers never
+    stall the event loop on Redis.
+    """
+
+    def __init__(self, serializer: Optional[Serializer] = None):
+        self.redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379')
+        self.serializer = serializer or get_serializer()
+        self.max_connections = int(os.getenv('REDIS_MAX_CONNECTIONS', '50'))
+        self.pool_timeout = float(os.getenv('REDIS_POOL_TIMEOUT', '0.5'))
+        self.socket_timeout = float(os.getenv('REDIS_SOCKET_TIMEOUT', '0.5'))
+        self.connect_timeout = float(os.getenv('REDIS_CONNECT_TIMEOUT', '2.0'))
+        self.pool = None
+        self.client = None
+        self.is_connected = False
+        self._slots = asyncio.Semaphore(self.max_connections)
+
+    @asynccontextmanager
+    async def _connection_slot(self):
+        """Wait (FIFO, bounded by pool_timeout) for a free pooled connection"""
+        await asyncio.wait_for(self._slots.acquire(), self.pool_timeout)
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    @property
+    def available(self) -> bool:
+        return self.is_connected and self.client is not None
+
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False):
+        """Pipeline on a pooled connection, for modules keeping their own structures in Redis
+
+        Unlike the cache methods, failures propagate (including
+        redis.ConnectionError when not connected), so callers decide how to
+        degrade.
+        """
+        if not self.available:
+            raise redis.ConnectionError("Redis is not connected")
+        async with self._connection_slot(), self.client.pipeline(transaction=transaction) as pipe:
+            yield pipe
+
+    async def hset(self, key: str, mapping: Dict[str, Any], ttl_seconds: Optional[int] = None) -> None:
+        """Set raw hash fields (values as Redis stores them), optionally resetting the hash's TTL"""
+        if not self.available or not mapping:
+            return
+
+        try:
+            async with self.pipeline() as pipe:
+                pipe.hset(key, mapping=mapping)
+                if ttl_seconds is not None:
+                    pipe.expire(key, ttl_seconds)
+                await pipe.execute()
+        except Exception as e:
+            print(f"Redis hset error: {e}")
+
+    async def connect(self):
+        """Create the connection pool and test the connection"""
+        try:
+            self.pool = aioredis.ConnectionPool.from_url(
+                self.redis_url,
+                max_connections=self.max_connections,
+                socket_timeout=self.socket_timeout,
+                socket_connect_timeout=self.connect_timeout
+            )
+            self.client = aioredis.Redis(connection_pool=self.pool)
+            await self.client.ping()  # Test connection
+            self.is_connected = True
+            print(f"Connected to Redis (async, pool size {self.max_connections})")
+        except Exception as e:
+            print(f"Failed to connect to Redis: {e}")
+            self.is_connected = False
+
+    async def disconnect(self):
+        """Close the client and its connection pool"""
+        if self.client:
+            await self.client.aclose()
+        if self.pool:
+            await self.pool.disconnect()
+        self.is_connected = False
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value from cache"""
+        if not self.is_connected or not self.client:
+            return None
+
+        try:
+            async with self._connection_slot():
+                data = await self.client.get(key)
+            return self.serializer.loads(data) if data else None
+        except Exception as e:
+            print(f"Redis get error: {e}")
+            return None
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values in one round trip (MGET)"""
+        if not self.is_connected or not self.client or not keys:
+            return [None] * len(keys)
+
+        try:
+            async with self._connection_slot():
+                values = await self.client.mget(keys)
+            loads = self.serializer.loads
+            return [loads(data) if data else None for data in values]
+        except Exception as e:
+            print(f"Redis mget error: {e}")
+            return [None] * len(keys)
+
+    async def set(self, key: str, value: Any, ttl_seconds: int = 300,
+                  tags: Optional[Iterable[str]] = None) -> None:
+        """Set value in cache with TTL, registering the key under tags"""
+        await self.set_many({key: value}, ttl_seconds, tags)
+
+    async def set_many(self, items: Dict[str, Any], ttl_seconds: int = 300,
+                       tags: Optional[Iterable[str]] = None) -> None:
+        """Set several values (registered under tags) with one pipelined round trip"""
+        if not self.is_connected or not self.client or not items:
+            return
+
+        try:
+            dumps = self.serializer.dumps
+            serialized = {key: dumps(value) for key, value in items.items()}
+            async with self._connection_slot(), self.client.pipeline(transaction=False) as pipe:
+                for key, serialized_value in serialized.items():
+                    pipe.set(key, serialized_value, ex=ttl_seconds)
+                if tags:
+                    _register_tags(pipe, list(serialized), tags, ttl_seconds)
+                await pipe.execute()
+        except Exception as e:
+            print(f"Redis set error: {e}")
+
+    async def delete(self, key: str, *keys: str) -> None:
+        """Delete one or more keys from cache"""
+        if not self.is_connected or not self.client:
+            return
+
+        try:
+            async with self._connection_slot():
+                await self.client.delete(key, *keys)
+        except Exception as e:
+            print(f"Redis delete error: {e}")
+
+    async def delete_pattern(self, pattern: str) -> None:
+        """Delete keys matching pattern (incremental SCAN; prefer invalidate_tag)"""
+        if not self.is_connected or not self.client:
+            return
+
+        try:
+            async with self._connection_slot():
+                batch = []
+                async for key in self.client.scan_iter(match=pattern, count=INVALIDATION_BATCH_SIZE):
+                    batch.append(key)
+                    if len(batch) >= INVALIDATION_BATCH_SIZE:
+                        await self.client.unlink(*batch)
+                        batch = []
+                if batch:
+                    await self.client.unlink(*batch)
+        except Exception as e:
+            print(f"Redis delete pattern error: {e}")
+
+    async def invalidate_tag(self, tag: str) -> int:
+        """Delete every key registered under tag; O(keys for that tag)"""
+        return len(await self.invalidate_tag_keys(tag))
+
+    async def invalidate_tag_keys(self, tag: str) -> List[str]:
+        """Delete every key registered under tag and return the keys removed"""
+        if not self.is_connected or not self.client:
+            return []
+
+        removed = []
+        try:
+            async with self._connection_slot():
+                while True:
+                    popped = await self.client.zpopmin(tag_key(tag), INVALIDATION_BATCH_SIZE)
+                    if not popped:
+                        break
+                    keys = [key for key, _ in popped]
+                    await self.client.unlink(*keys)
+                    removed.extend(key.decode() for key in keys)
+        except Exception as e:
+            print(f"Redis invalidate tag error: {e}")
+        return removed
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        """Publish a JSON message on a pub/sub channel"""
+        if not self.is_connected or not self.client:
+            return
+
+        try:
+            async with self._connection_slot():
+                await self.client.publish(channel, json.dumps(message))
+        except Exception as e:
+            print(f"Redis publish error: {e}")
+
+    async def acquire_lock(self, key: str, ttl_seconds: float) -> Optional[str]:
+        """Try to take the lock for key (SET NX PX); returns its token, or None if held"""
+        if not self.is_connected or not self.client:
+            return None
+
+        token = uuid.uuid4().hex
+        try:
+            async with self._connection_slot():
+                if await self.client.set(lock_key(key), token, nx=True, px=int(ttl_seconds * 1000)):
+                    return token
+        except Exception as e:
+            print(f"Redis lock error: {e}")
+        return None
+
+    async def release_lock(self, key: str, token: str) -> None:
+        """Release a lock taken with acquire_lock, unless it expired and was retaken"""
+        if not self.is_connected or not self.client:
+            return
+
+        try:
+            async with self._connection_slot(), self.client.pipeline(transaction=True) as pipe:
+                await pipe.watch(lock_key(key))
+                if await pipe.get(lock_key(key)) == token.encode():
+                    pipe.multi()
+                    pipe.delete(lock_key(key))
+                    await pipe.execute()
+        except Exception as e:
+            print(f"Redis unlock error: {e}")
+
+    async def exists(self, key: str) -> bool:
+        """Check if key exists"""
+        if not self.is_connected or not self.client:
+            return False
+
+        try:
+            async with self._connection_slot():
+                return bool(await self.client.exists(key))
+        except Exception as e:
+            print(f"Redis exists error: {e}")
+            return False
+
+    async def invalidate_user_cache(self, user_id: str) -> None:
+        """Invalidate all cache entries for a user"""
+        await self.invalidate_tag(user_tag(user_id))
+
+    async def invalidate_prediction_cache(self, user_id: str) -> None:
+        """Invalidate prediction cache for a user"""
+        await self.invalidate_tag(prediction_tag(user_id))
+
+    async def invalidate_model_cache(self, model_name: str) -> None:
+        """Invalidate cache for a specific model"""
+        await self.invalidate_tag(model_tag(model_name))
+
+
+class LocalLRUCache:
+    """In-process LRU cache bounded by entry count and per-entry TTL
+
+    Values are stored as the deserialized objects, so hits skip Redis and
+    json.loads entirely; callers must not mutate returned values. Keys can be
+    registered under tags like the Redis caches. Not thread-safe: use it from
+    the event loop only.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a live value, refreshing its LRU position"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None,
+            tags: Optional[Iterable[str]] = None) -> None:
+        """Store a value, evicting least recently used entries past max_entries"""
+        if self.max_entries <= 0:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        tags = tuple(tags or ())
+        self._entries[key] = (time.monotonic() + ttl, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """Drop a key if present"""
+        if key in self._entries:
+            self._remove(key)
+            self.invalidations += 1
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Drop every key registered under tag"""
+        keys = self._tags.pop(tag, set())
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        self._entries.clear()
+        self._tags.clear()
+
+    def _remove(self, key: str) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
+
+
+class CachePolicy:
+    """Soft-TTL policy for get_or_compute entries
+
+    Entries are fresh for ttl_seconds (randomly shortened by up to jitter, so
+    entries written together do not expire together), then served stale for up
+    to stale_seconds while they are refreshed. beta scales XFetch probabilistic
+    early refresh: the longer an entry took to compute, the earlier it tends
+    to be refreshed; 0 disables early refresh.
+    """
+
+    def __init__(self, ttl_seconds: float, stale_seconds: float = 0.0,
+                 beta: float = 1.0, jitter: float = 0.1):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.beta = beta
+        self.jitter = jitter
+
+    @classmethod
+    def from_env(cls, name: str, ttl_seconds: float, stale_seconds: float = 0.0,
+                 beta: float = 1.0, jitter: float = 0.1) -> "CachePolicy":
+        """Policy with defaults overridable by CACHE_<NAME>_{TTL_SECONDS,STALE_SECONDS,BETA,JITTER}"""
+        prefix = f"CACHE_{name.upper()}_"
+        return cls(
+            ttl_seconds=float(os.getenv(prefix + 'TTL_SECONDS', ttl_seconds)),
+            stale_seconds=float(os.getenv(prefix + 'STALE_SECONDS', stale_seconds)),
+            beta=float(os.getenv(prefix + 'BETA', beta)),
+            jitter=float(os.getenv(prefix + 'JITTER', jitter))
+        )
+
+    @property
+    def hard_ttl(self) -> int:
+        """Storage TTL: the entry is dropped once it is too stale to serve"""
+        return max(1, math.ceil(self.ttl_seconds + self.stale_seconds))
+
+    def wrap(self, value: Any, delta: float) -> Dict[str, Any]:
+        """Cache entry for value computed in delta seconds"""
+        ttl = self.ttl_seconds * (1.0 - self.jitter * random.random())
+        return {'_swr': 1, 'v': value, 'f': time.time() + ttl, 'd': delta}
+
+    def refresh_early(self, now: float, fresh_until: float, delta: float) -> bool:
+        """XFetch: refresh a fresh entry early with probability rising towards expiry"""
+        if self.beta <= 0 or delta <= 0:
+            return False
+        return now - delta * self.beta * math.log(1.0 - random.random()) >= fresh_until
+
+
+def _unwrap_entry(entry: Any) -> Optional[Tuple[Any, float, float]]:
+    """(value, fresh_until, delta) of a CachePolicy entry, or None if not one"""
+    if isinstance(entry, dict) and entry.get('_swr') == 1:
+        return entry['v'], entry['f'], entry['d']
+    return None
+
+
+class SingleFlight:
+    """Coalesces concurrent computations of the same key into one
+
+    The computation runs in its own task, so a caller that is cancelled (e.g.
+    a client disconnect) does not cancel it for the other waiters.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: str, compute: Callable[[], Awaitable[T]]) -> T:
+        """Run compute() for key, or wait for the run already in flight"""
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+
+class TieredCache:
+    """Two-tier cache: in-process LocalLRUCache (L1) in front of AsyncRedisCache (L2)
+
+    L1 entries live at most CACHE_L1_TTL_SECONDS. Deletes and tag invalidations
+    are applied locally and broadcast on a Redis pub/sub channel so every
+    replica drops its L1 copies too. When Redis is unavailable, L1 keeps
+    serving and absorbing writes; cross-replica staleness is then bounded by
+    the L1 TTL.
+    """
+
+    def __init__(self, remote: AsyncRedisCache, local: Optional[LocalLRUCache] = None):
+        self.remote = remote
+        self.local = local or LocalLRUCache(
+            max_entries=int(os.getenv('CACHE_L1_MAX_ENTRIES', '10000')),
+            ttl_seconds=float(os.getenv('CACHE_L1_TTL_SECONDS', '30'))
+        )
+        self.channel = os.getenv('CACHE_INVALIDATION_CHANNEL', 'ml-cache:invalidate')
+        self.instance_id = uuid.uuid4().hex
+        self.remote_hits = 0
+        self.remote_misses = 0
+        self._listener: Optional[asyncio.Task] = None
+
+        # Single-flight: one computation per key in this process and, with the
+        # distributed lock, across replicas
+        self.distributed_single_flight = os.getenv('CACHE_DISTRIBUTED_SINGLE_FLIGHT', 'true').lower() == 'true'
+        self.lock_timeout = float(os.getenv('CACHE_LOCK_TIMEOUT_SECONDS', '10'))
+        self._flights = SingleFlight()
+        self.lock_waits = 0
+
+        # Stale-while-revalidate
+        self._refreshes: Set[asyncio.Task] = set()
+        self.stale_served = 0
+        self.early_refreshes = 0
+        self.refresh_errors = 0
+
+    @property
+    def is_connected(self) -> bool:
+        return self.remote.is_connected
+
+    async def connect(self):
+        """Connect L2 and start listening for invalidations from other replicas"""
+        await self.remote.connect()
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen_for_invalidations())
+
+    async def disconnect(self):
+        """Stop the invalidation listener and disconnect L2"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self.remote.disconnect()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get from L1, falling back to L2 and promoting hits into L1"""
+        with CACHE_OPERATION_SECONDS.time('l1', 'get'):
+            value = self.local.get(key)
+        if value is not None:
+            CACHE_REQUESTS.inc('l1', 'hit')
+            return value
+        CACHE_REQUESTS.inc('l1', 'miss')
+
+        with CACHE_OPERATION_SECONDS.time('l2', 'get'):
+            value = await self.remote.get(key)
+        if value is None:
+            self.remote_misses += 1
+            CACHE_REQUESTS.inc('l2', 'miss')
+        else:
+            self.remote_hits += 1
+            CACHE_REQUESTS.inc('l2', 'hit')
+            self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any, ttl_seconds: int = 300,
+                  tags: Optional[Iterable[str]] = None) -> None:
+        """Write through both tiers"""
+        tags = list(tags or ())
+        with CACHE_OPERATION_SECONDS.time('l1', 'set'):
+            self.local.set(key, value, ttl_seconds, tags)
+        with CACHE_OPERATION_SECONDS.time('l2', 'set'):
+            await self.remote.set(key, value, ttl_seconds, tags)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]],
+                             policy: "CachePolicy", tags: Optional[Iterable[str]] = None,
+                             distributed: Optional[bool] = None) -> Any:
+        """Get key, or compute and cache it with at most one computation in flight
+
+        Entries follow policy's soft TTL: a fresh entry is returned as is; a
+        stale one (past its soft TTL but within stale_seconds) is returned
+        immediately while it is refreshed in the background. Fresh entries are
+        also refreshed early with a probability that grows near expiry
+        (XFetch), so popular keys rarely expire at all.
+
+        Concurrent misses for the same key in this process share one call to
+        compute(). With distributed single-flight, replicas also coordinate
+        through a Redis lock: the holder computes while other replicas poll
+        for its result, falling back to computing themselves if the holder
+        fails or the lock times out. Exceptions from compute() are not cached.
+        """
+        if distributed is None:
+            distributed = self.distributed_single_flight
+
+        entry = _unwrap_entry(await self.get(key))
+        if entry is not None:
+            value, fresh_until, delta = entry
+            now = time.time()
+            if now >= fresh_until:
+                self.stale_served += 1
+                self._refresh_in_background(key, compute, policy, tags, distributed)
+            elif policy.refresh_early(now, fresh_until, delta):
+                self.early_refreshes += 1
+                self._refresh_in_background(key, compute, policy, tags, distributed)
+            return value
+
+        return await self._flights.do(
+            key, lambda: self._compute_and_store(key, compute, policy, tags, distributed)
+        )
+
+    def _refresh_in_background(self, key: str, compute: Callable[[], Awaitable[Any]],
+                               policy: "CachePolicy", tags: Optional[Iterable[str]],
+                               distributed: bool) -> None:
+        """Recompute key without blocking the caller, at most one refresh per key at a time"""
+        async def refresh():
+            try:
+                await self._flights.do(
+                    f"{key}#refresh", lambda: self._compute_and_store(key, compute, policy, tags, distributed,
+                                                         background=True)
+                )
+            except Exception as e:
+                self.refresh_errors += 1
+                print(f"Cache refresh error for {key}: {e}")
+
+        task = asyncio.ensure_future(refresh())
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+
+    async def _compute_and_store(self, key: str, compute: Callable[[], Awaitable[Any]],
+                                 policy: "CachePolicy", tags: Optional[Iterable[str]],
+                                 distributed: bool, background: bool = False) -> Any:
+        token = None
+        if distributed and self.remote.is_connected:
+            token = await self.remote.acquire_lock(key, self.lock_timeout)
+            if token is None:
+                if background:
+                    return None  # another replica is already refreshing
+                value = await self._wait_for_remote(key)
+                if value is not None:
+                    return value
+
+        try:
+            start = time.monotonic()
+            value = await compute()
+            delta = time.monotonic() - start
+            await self.set(key, policy.wrap(value, delta), policy.hard_ttl, tags)
+            return value
+        finally:
+            if token is not None:
+                await self.remote.release_lock(key, token)
+
+    async def _wait_for_remote(self, key: str) -> Optional[Any]:
+        """Poll L2 for a fresh entry while another replica holds the lock for key"""
+        self.lock_waits += 1
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.01
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            lock_held = await self.remote.exists(lock_key(key))
+            raw = await self.remote.get(key)
+            entry = _unwrap_entry(raw)
+            if entry is not None and entry[1] > time.time():
+                self.local.set(key, raw)
+                return entry[0]
+            if not lock_held:
+                return None  # the holder gave up without storing a result
+            delay = min(delay * 2, 0.2)
+        return None
+
+    async def delete(self, key: str) -> None:
+        """Delete from both tiers and on every replica's L1"""
+        self.local.delete(key)
+        await self.remote.delete(key)
+        await self._broadcast(keys=[key])
+
+    async def invalidate_tag(self, tag: str) -> int:
+        """Invalidate a tag in both tiers and on every replica's L1"""
+        self.local.invalidate_tag(tag)
+        keys = await self.remote.invalidate_tag_keys(tag)
+        for key in keys:
+            self.local.delete(key)
+        await self._broadcast(tags=[tag], keys=keys)
+        return len(keys)
+
+    async def invalidate_user_cache(self, user_id: str) -> None:
+        """Invalidate all cache entries for a user"""
+        await self.invalidate_tag(user_tag(user_id))
+
+    async def invalidate_prediction_cache(self, user_id: str) -> None:
+        """Invalidate prediction cache for a user"""
+        await self.invalidate_tag(prediction_tag(user_id))
+
+    async def invalidate_model_cache(self, model_name: str) -> None:
+        """Invalidate cache for a specific model"""
+        await self.invalidate_tag(model_tag(model_name))
+
+    def stats(self) -> Dict[str, Any]:
+        """L1 counters plus L2 hit/miss counts for L1 misses"""
+        return {
+            'l1': self.local.stats(),
+            'l2': {
+                'connected': self.remote.is_connected,
+                'hits': self.remote_hits,
+                'misses': self.remote_misses,
+            },
+            'single_flight': {
+                'in_flight': len(self._flights),
+                'coalesced': self._flights.coalesced,
+                'lock_waits': self.lock_waits,
+            },
+            'refresh': {
+                'stale_served': self.stale_served,
+                'early_refreshes': self.early_refreshes,
+                'errors': self.refresh_errors,
+            },
+        }
+
+    async def _broadcast(self, tags: Iterable[str] = (), keys: Iterable[str] = ()) -> None:
+        """Tell other replicas to drop L1 entries"""
+        await self.remote.publish(self.channel, {
+            'origin': self.instance_id,
+            'tags': list(tags),
+            'keys': list(keys),
+        })
+
+    def _apply_invalidation(self, message: Dict[str, Any]) -> None:
+        """Drop L1 entries named in an invalidation message from another replica"""
+        if message.get('origin') == self.instance_id:
+            return
+        for tag in message.get('tags', ()):
+            self.local.invalidate_tag(tag)
+        for key in message.get('keys', ()):
+            self.local.delete(key)
+
+    async def _listen_for_invalidations(self) -> None:
+        """Apply invalidations broadcast by other replicas, reconnecting on errors"""
+        delay = 1.0
+        while True:
+            if not self.remote.is_connected or self.remote.client is None:
+                await asyncio.sleep(delay)
+                continue
+            try:
+                async with self.remote.client.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    delay = 1.0
+                    async for message in pubsub.listen():
+                        if message.get('type') == 'message':
+                            self._apply_invalidation(json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Cache invalidation listener error: {e}")
+                # Entries written while we were deaf may be stale on this replica
+                self.local.clear()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
 
 
-# Global cache instance
-redis_cache = RedisCache()
\ No newline at end of file
+# Global cache instances (the tiered one is used by the FastAPI handlers)
+redis_cache = RedisCache()
+async_redis_cache = AsyncRedisCache()
+tiered_cache = TieredCache(async_redis_cache)
\ No newline at end of file
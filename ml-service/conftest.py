@@ -0,0 +1,41 @@
+"""
+Shared test fixtures
+Redis clients backed by an in-process fakeredis server (tests using them skip without fakeredis)
+"""
+
+import pytest
+
+from cache import AsyncRedisCache, RedisCache
+
+
+@pytest.fixture
+def redis_server():
+    """fakeredis server shared by every client a test creates"""
+    return pytest.importorskip("fakeredis").FakeServer()
+
+@pytest.fixture
+def make_async_redis(redis_server):
+    """Factory of connected AsyncRedisCache clients on the test's server (e.g. one per replica)"""
+    import fakeredis
+
+    def make() -> AsyncRedisCache:
+        remote = AsyncRedisCache()
+        remote.client = fakeredis.aioredis.FakeRedis(server=redis_server, decode_responses=False)
+        remote.is_connected = True
+        return remote
+    return make
+
+@pytest.fixture
+def async_redis(make_async_redis) -> AsyncRedisCache:
+    """Connected AsyncRedisCache on fakeredis"""
+    return make_async_redis()
+
+@pytest.fixture
+def sync_redis(redis_server) -> RedisCache:
+    """Connected RedisCache on fakeredis"""
+    import fakeredis
+
+    cache = RedisCache()
+    cache.client = fakeredis.FakeRedis(server=redis_server, decode_responses=False)
+    cache.is_connected = True
+    return cache
@@ -2,18 +2,28 @@
 Database connection and queries for ML service
 """
 
+import asyncio
 import os
+import json
+import threading
 import importlib
-from typing import Dict, List, Any, Optional, TYPE_CHECKING
+import importlib.util
+from typing import Dict, List, Any, Iterator, Optional, Tuple, TYPE_CHECKING
 from datetime import datetime
 
+from executor import PoolSaturatedError, io_pool
+from features import extract_feature_matrices
+from metrics import DB_QUERY_SECONDS, FEATURE_EXTRACTION_SECONDS
+
 # Type checking imports for when dependencies are available
 if TYPE_CHECKING:
     from sqlalchemy import create_engine, text  # type: ignore[import]
     from sqlalchemy.orm import sessionmaker  # type: ignore[import]
     from dotenv import load_dotenv  # type: ignore[import]
 
-# Try to import database dependencies (may not be available in all environments)
+# Database dependencies may not be available in all environments. SQLAlchemy
+# is the slowest import in the service, so it is only located here and
+# imported by _import_sqlalchemy when the first engine is created.
 DB_DEPENDENCIES_AVAILABLE = False
 create_engine = None
 text = None
@@ -21,306 +31,598 @@ sessionmaker = None
 load_dotenv = None
 
 try:
-    sqlalchemy = importlib.import_module('sqlalchemy')  # type: ignore[import]
-    sqlalchemy_orm = importlib.import_module('sqlalchemy.orm')  # type: ignore[import]
     dotenv = importlib.import_module('dotenv')  # type: ignore[import]
-    
-    create_engine = sqlalchemy.create_engine
-    text = sqlalchemy.text
-    sessionmaker = sqlalchemy_orm.sessionmaker
+
     load_dotenv = dotenv.load_dotenv
-    DB_DEPENDENCIES_AVAILABLE = True
+    DB_DEPENDENCIES_AVAILABLE = importlib.util.find_spec('sqlalchemy') is not None
 except ImportError:
+    pass
+if not DB_DEPENDENCIES_AVAILABLE:
     print("Database dependencies not available, running in limited mode")
 
+# Async backend (SQLAlchemy asyncio over asyncpg); without it, async callers
+# fall back to running the blocking queries on the I/O pool
+ASYNC_DB_AVAILABLE = DB_DEPENDENCIES_AVAILABLE and importlib.util.find_spec('asyncpg') is not None
+create_async_engine = None
+make_url = None
+
+if DB_DEPENDENCIES_AVAILABLE and not ASYNC_DB_AVAILABLE:
+    print("Async database driver (asyncpg) not available, using the I/O pool for database calls")
+
 # Load environment variables if dotenv is available
 if DB_DEPENDENCIES_AVAILABLE and load_dotenv is not None:
     load_dotenv()
 
+def _import_sqlalchemy() -> bool:
+    """Import SQLAlchemy (and its asyncio extension) on first use; False if that fails"""
+    global create_engine, text, sessionmaker, create_async_engine, make_url, ASYNC_DB_AVAILABLE
+    if text is not None:
+        return True
+    try:
+        sqlalchemy = importlib.import_module('sqlalchemy')  # type: ignore[import]
+        sqlalchemy_orm = importlib.import_module('sqlalchemy.orm')  # type: ignore[import]
+        make_url = importlib.import_module('sqlalchemy.engine').make_url
+        if ASYNC_DB_AVAILABLE:
+            sqlalchemy_asyncio = importlib.import_module('sqlalchemy.ext.asyncio')  # type: ignore[import]
+            create_async_engine = sqlalchemy_asyncio.create_async_engine
+    except ImportError as e:
+        print(f"Could not import database dependencies: {e}")
+        ASYNC_DB_AVAILABLE = False
+        return False
+
+    create_engine = sqlalchemy.create_engine
+    sessionmaker = sqlalchemy_orm.sessionmaker
+    text = sqlalchemy.text
+    return True
+
+def _json_rows(value: Any) -> List[list]:
+    """Decode a JSON aggregate column (drivers may return text or parsed JSON)"""
+    if value is None:
+        return []
+    if isinstance(value, (str, bytes)):
+        return json.loads(value)
+    return value
+
+def _with_timestamps(row: list, *indexes: int) -> list:
+    """Parse ISO timestamp strings produced by json_build_array back to datetimes"""
+    for i in indexes:
+        if isinstance(row[i], str):
+            row[i] = datetime.fromisoformat(row[i])
+    return row
+
+USER_QUERY = """
+    SELECT id, "currentWeek", "totalXP", "createdAt"
+    FROM "User" WHERE id = :user_id
+"""
+
+# Child tables by name, in _build_user_data argument order
+USER_CHILD_QUERIES = {
+    "progress": """
+        SELECT "weekId", "lessonId", completed, score, "completedAt"
+        FROM "Progress"
+        WHERE "userId" = :user_id
+        ORDER BY "weekId", "lessonId"
+    """,
+    "lab_sessions": """
+        SELECT "exerciseId", passed, "submittedAt"
+        FROM "LabSession"
+        WHERE "userId" = :user_id
+        ORDER BY "submittedAt"
+    """,
+    "aars": """
+        SELECT "lessonId", level, "completedAt", "qualityScore",
+               "whatWorkedWell", "whatDidNotWork", "wordCounts"
+        FROM "AfterActionReview"
+        WHERE "userId" = :user_id
+        ORDER BY "completedAt"
+    """,
+    "badges": """
+        SELECT "badgeType", "earnedAt"
+        FROM "Badge"
+        WHERE "userId" = :user_id
+        ORDER BY "earnedAt"
+    """,
+    "projects": """
+        SELECT "projectId", completed, "completedAt"
+        FROM "Project"
+        WHERE "userId" = :user_id
+    """,
+}
+
+# Each child table is aggregated into a JSON array of row tuples by a
+# correlated subquery, so Postgres returns the whole learner snapshot as one
+# row. Column order matches the sequential queries.
+SNAPSHOT_QUERY = """
+    SELECT u.id, u."currentWeek", u."totalXP", u."createdAt",
+        COALESCE((
+            SELECT json_agg(json_build_array(
+                p."weekId", p."lessonId", p.completed, p.score, p."completedAt"
+            ) ORDER BY p."weekId", p."lessonId")
+            FROM "Progress" p WHERE p."userId" = u.id
+        ), '[]'::json) AS progress,
+        COALESCE((
+            SELECT json_agg(json_build_array(
+                l."exerciseId", l.passed, l."submittedAt"
+            ) ORDER BY l."submittedAt")
+            FROM "LabSession" l WHERE l."userId" = u.id
+        ), '[]'::json) AS lab_sessions,
+        COALESCE((
+            SELECT json_agg(json_build_array(
+                a."lessonId", a.level, a."completedAt", a."qualityScore",
+                a."whatWorkedWell", a."whatDidNotWork", a."wordCounts"
+            ) ORDER BY a."completedAt")
+            FROM "AfterActionReview" a WHERE a."userId" = u.id
+        ), '[]'::json) AS aars,
+        COALESCE((
+            SELECT json_agg(json_build_array(
+                b."badgeType", b."earnedAt"
+            ) ORDER BY b."earnedAt")
+            FROM "Badge" b WHERE b."userId" = u.id
+        ), '[]'::json) AS badges,
+        COALESCE((
+            SELECT json_agg(json_build_array(
+                pr."projectId", pr.completed, pr."completedAt"
+            ))
+            FROM "Project" pr WHERE pr."userId" = u.id
+        ), '[]'::json) AS projects
+    FROM "User" u WHERE u.id = :user_id
+"""
+
+def async_database_url(database_url: str):
+    """Rewrite a PostgreSQL URL for the asyncpg driver, or None for other databases
+
+    asyncpg takes ssl= where libpq takes sslmode=, so that parameter is renamed.
+    """
+    _import_sqlalchemy()
+    url = make_url(database_url)
+    if url.get_backend_name() != "postgresql":
+        return None
+    query = dict(url.query)
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return url.set(drivername="postgresql+asyncpg", query=query)
+
 class DatabaseManager:
     """Manages database connections and queries for ML service"""
 
     def __init__(self):
+        # "snapshot" (single round trip, PostgreSQL only) or "sequential"
+        self.load_mode = os.getenv("ML_DB_LOAD_MODE", "snapshot")
+        # Rows per server-side cursor fetch for bulk loads
+        self.stream_chunk_size = int(os.getenv("ML_DB_STREAM_CHUNK_SIZE", "5000"))
+        # Connection pool per engine: pool_size kept open plus max_overflow under
+        # bursts; waiting longer than pool_timeout seconds for a connection fails
+        self.pool_size = int(os.getenv("ML_DB_POOL_SIZE", "10"))
+        self.max_overflow = int(os.getenv("ML_DB_MAX_OVERFLOW", "10"))
+        self.pool_timeout = float(os.getenv("ML_DB_POOL_TIMEOUT", "5"))
+        self.pool_recycle = int(os.getenv("ML_DB_POOL_RECYCLE", "1800"))
+        # Server-side limit per statement, so one slow query cannot pin a connection
+        self.statement_timeout_ms = int(os.getenv("ML_DB_STATEMENT_TIMEOUT_MS", "5000"))
+        # Prepared statements cached per asyncpg connection (0 behind PgBouncer in transaction mode)
+        self.statement_cache_size = int(os.getenv("ML_DB_STATEMENT_CACHE_SIZE", "500"))
+        # Await queries on the asyncpg pool instead of running them on the I/O pool
+        self.async_enabled = os.getenv("ML_DB_ASYNC", "true").lower() == "true"
+        # Async loads waiting for a connection beyond this are rejected (503)
+        self.max_waiting = int(os.getenv("ML_DB_QUEUE", "1024"))
+        self.database_url = None
+        self.async_engine = None
+        self._async_slots = None
+        self.waiting = 0
+        self.rejected = 0
+        self._engine = None
+        self._connect_lock = threading.Lock()
+        self.SessionLocal = None
+
         if not DB_DEPENDENCIES_AVAILABLE:
             print("Database dependencies not available")
-            self.engine = None
             return
 
         # Get database URL from environment (same as server)
         database_url = os.getenv("DATABASE_URL")
         if not database_url:
             print("Warning: DATABASE_URL not set, using mock data mode")
-            self.engine = None
             return
 
-        # Check if required functions are available
-        if create_engine is None or sessionmaker is None:
+        # Engines are created on first use (see the engine property), so
+        # importing this module stays cheap and service startup is fast
+        self.database_url = database_url
+
+    @property
+    def engine(self):
+        """Synchronous SQLAlchemy engine, created on first use; None in mock data mode"""
+        if self._engine is None and self.database_url:
+            with self._connect_lock:
+                if self._engine is None and self.database_url:
+                    self._connect()
+        return self._engine
+
+    def _connect(self):
+        """Import SQLAlchemy and create the synchronous engine and session factory"""
+        if not _import_sqlalchemy():
             print("Warning: SQLAlchemy functions not available, using mock data mode")
-            self.engine = None
+            self.database_url = None
             return
 
         try:
             # Create SQLAlchemy engine
-            self.engine = create_engine(database_url)
-            self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+            self._engine = create_engine(self.database_url, **self._engine_options(self.database_url))
+            self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self._engine)
             print("Database connection established")
         except Exception as e:
             print(f"Warning: Could not connect to database: {e}")
             print("Falling back to mock data mode")
-            self.engine = None
+            self.database_url = None
 
-    def get_user_data(self, user_id: str) -> Dict[str, Any]:
-        """Get comprehensive user data for ML analysis"""
+    def _engine_options(self, database_url: str) -> Dict[str, Any]:
+        """Pool and timeout settings for the synchronous PostgreSQL engine"""
+        if not database_url.startswith("postgres"):
+            return {}
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": True,
+            "connect_args": {"options": f"-c statement_timeout={self.statement_timeout_ms}"},
+        }
+
+    def _get_async_engine(self):
+        """Async engine over asyncpg, created on first use; None when unavailable
+
+        Only PostgreSQL URLs get one. Pooled asyncpg connections belong to the
+        event loop that opened them, so call dispose_async before the loop closes.
+        """
+        if self.async_engine is not None:
+            return self.async_engine
+        if not self.async_enabled or not ASYNC_DB_AVAILABLE or self.engine is None:
+            return None
+
+        url = async_database_url(self.database_url)
+        if url is None:
+            return None
+        url = url.update_query_dict({"prepared_statement_cache_size": str(self.statement_cache_size)})
+        self.async_engine = create_async_engine(
+            url,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_timeout=self.pool_timeout,
+            pool_recycle=self.pool_recycle,
+            pool_pre_ping=True,
+            connect_args={
+                "statement_cache_size": self.statement_cache_size,
+                "server_settings": {"statement_timeout": str(self.statement_timeout_ms)},
+            },
+        )
+        # Callers queue here in FIFO order rather than inside the connection pool,
+        # where waiters are not served fairly and time out under bursts
+        self._async_slots = asyncio.Semaphore(self.pool_size + self.max_overflow)
+        return self.async_engine
+
+    async def dispose_async(self):
+        """Close pooled async connections (on shutdown, before the event loop ends)"""
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+            self.async_engine = None
+            self._async_slots = None
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool usage per engine"""
+        stats = {}
+        for name, engine in (("sync", self._engine), ("async", self.async_engine)):
+            pool = getattr(engine, "pool", None)
+            if pool is not None and hasattr(pool, "checkedout"):
+                stats[name] = {
+                    "size": pool.size(),
+                    "checked_out": pool.checkedout(),
+                    "checked_in": pool.checkedin(),
+                    "overflow": max(pool.overflow(), 0),
+                }
+        if "async" in stats:
+            stats["async"].update(waiting=self.waiting, rejected=self.rejected)
+        return stats
+
+    def get_user_data(self, user_id: str, mode: Optional[str] = None) -> Dict[str, Any]:
+        """Get comprehensive user data for ML analysis
+
+        Args:
+            user_id: ID of the user to load
+            mode: "snapshot" loads everything in one round trip (PostgreSQL only),
+                "sequential" runs one query per table. Defaults to ML_DB_LOAD_MODE.
+        """
         if not DB_DEPENDENCIES_AVAILABLE or not self.engine or self.SessionLocal is None or text is None:
             # Return empty data when database dependencies are not available
             print("Database dependencies not available, returning empty data")
             return {}
 
+        mode = mode or self.load_mode
+        if mode == "snapshot" and self.engine.dialect.name == "postgresql":
+            return self._get_user_data_snapshot(user_id)
+        return self._get_user_data_sequential(user_id)
+
+    def _get_user_data_sequential(self, user_id: str) -> Dict[str, Any]:
+        """Load user data with one SELECT per table"""
+        with self.SessionLocal() as session:
+            try:
+                params = {"user_id": user_id}
+                with DB_QUERY_SECONDS.time("sync", "user"):
+                    user_result = session.execute(text(USER_QUERY), params).fetchone()
+
+                if not user_result:
+                    return {}
+
+                children = []
+                for table, query in USER_CHILD_QUERIES.items():
+                    with DB_QUERY_SECONDS.time("sync", table):
+                        children.append(session.execute(text(query), params).fetchall())
+                return self._build_user_data(user_result, *children)
+
+            except Exception as e:
+                print(f"Error fetching user data from database: {e}")
+                return {}
+
+    def _get_user_data_snapshot(self, user_id: str) -> Dict[str, Any]:
+        """Load user data in a single round trip (see SNAPSHOT_QUERY)"""
         with self.SessionLocal() as session:
             try:
-                # Get user basic info
-                user_query = text("""
-                    SELECT id, "currentWeek", "totalXP", "createdAt"
-                    FROM "User" WHERE id = :user_id
-                """)
-                user_result = session.execute(user_query, {"user_id": user_id}).fetchone()
+                with DB_QUERY_SECONDS.time("sync", "snapshot"):
+                    row = session.execute(text(SNAPSHOT_QUERY), {"user_id": user_id}).fetchone()
+                return self._build_snapshot(row) if row else {}
 
+            except Exception as e:
+                print(f"Error fetching user snapshot from database: {e}")
+                return {}
+
+    async def get_user_data_async(self, user_id: str, mode: Optional[str] = None) -> Dict[str, Any]:
+        """Awaitable get_user_data, same arguments and result
+
+        Queries run on the asyncpg connection pool, so the event loop keeps
+        serving other requests while they wait on the database. Without an
+        async engine (asyncpg missing, non-PostgreSQL URL or ML_DB_ASYNC=false)
+        the blocking get_user_data runs on the I/O pool instead.
+
+        Raises:
+            PoolSaturatedError: More than ML_DB_QUEUE loads are waiting for a connection
+        """
+        engine = self._get_async_engine()
+        if engine is None:
+            return await io_pool.run(self.get_user_data, user_id, mode)
+
+        if self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise PoolSaturatedError(f"database pool saturated ({self.waiting} loads waiting)")
+
+        self.waiting += 1
+        try:
+            await self._async_slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            return await self._load_user_data_async(engine, user_id, mode)
+        finally:
+            self._async_slots.release()
+
+    async def _load_user_data_async(self, engine, user_id: str, mode: Optional[str]) -> Dict[str, Any]:
+        """Run the user data queries on one pooled asyncpg connection"""
+        params = {"user_id": user_id}
+        try:
+            async with engine.connect() as conn:
+                if (mode or self.load_mode) == "snapshot":
+                    # One statement is consistent on its own; autocommit skips the
+                    # BEGIN and ROLLBACK round trips around it
+                    conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                    with DB_QUERY_SECONDS.time("async", "snapshot"):
+                        row = (await conn.execute(text(SNAPSHOT_QUERY), params)).fetchone()
+                    return self._build_snapshot(row) if row else {}
+
+                with DB_QUERY_SECONDS.time("async", "user"):
+                    user_result = (await conn.execute(text(USER_QUERY), params)).fetchone()
                 if not user_result:
                     return {}
+                children = []
+                for table, query in USER_CHILD_QUERIES.items():
+                    with DB_QUERY_SECONDS.time("async", table):
+                        children.append((await conn.execute(text(query), params)).fetchall())
+                return self._build_user_data(user_result, *children)
+
+        except Exception as e:
+            print(f"Error fetching user data from database: {e}")
+            return {}
+
+    def _build_snapshot(self, row) -> Dict[str, Any]:
+        """Shape a SNAPSHOT_QUERY row like the sequential loader's result"""
+        progress, labs, aars, badges, projects = (_json_rows(column) for column in row[4:9])
+        return self._build_user_data(
+            row[:4],
+            [_with_timestamps(p, 4) for p in progress],
+            [_with_timestamps(l, 2) for l in labs],
+            [_with_timestamps(a, 2) for a in aars],
+            [_with_timestamps(b, 1) for b in badges],
+            [_with_timestamps(p, 2) for p in projects]
+        )
+
+    def get_users_data(self, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get user data for many users with one set-based query per table
+
+        Child rows are streamed through a server-side cursor in chunks of
+        stream_chunk_size and grouped by user in memory. Returns a dict keyed
+        by user ID in input order; unknown users are omitted.
+        """
+        if not DB_DEPENDENCIES_AVAILABLE or not self.engine or self.SessionLocal is None or text is None:
+            print("Database dependencies not available, returning empty data")
+            return {}
+
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return {}
 
-                # Get progress data
-                progress_query = text("""
-                    SELECT "weekId", "lessonId", completed, score, "completedAt"
-                    FROM "Progress"
-                    WHERE "userId" = :user_id
-                    ORDER BY "weekId", "lessonId"
-                """)
-                progress_results = session.execute(progress_query, {"user_id": user_id}).fetchall()
-
-                # Get lab sessions
-                lab_query = text("""
-                    SELECT "exerciseId", passed, "submittedAt"
-                    FROM "LabSession"
-                    WHERE "userId" = :user_id
-                    ORDER BY "submittedAt"
-                """)
-                lab_results = session.execute(lab_query, {"user_id": user_id}).fetchall()
-
-                # Get AAR data
-                aar_query = text("""
-                    SELECT "lessonId", level, "completedAt", "qualityScore",
-                           "whatWorkedWell", "whatDidNotWork", "wordCounts"
-                    FROM "AfterActionReview"
-                    WHERE "userId" = :user_id
-                    ORDER BY "completedAt"
-                """)
-                aar_results = session.execute(aar_query, {"user_id": user_id}).fetchall()
-
-                # Get badges
-                badge_query = text("""
-                    SELECT "badgeType", "earnedAt"
-                    FROM "Badge"
-                    WHERE "userId" = :user_id
-                    ORDER BY "earnedAt"
-                """)
-                badge_results = session.execute(badge_query, {"user_id": user_id}).fetchall()
-
-                # Get projects
-                project_query = text("""
-                    SELECT "projectId", completed, "completedAt"
-                    FROM "Project"
-                    WHERE "userId" = :user_id
-                """)
-                project_results = session.execute(project_query, {"user_id": user_id}).fetchall()
+        if self.engine.dialect.name != "postgresql":
+            # ANY(:ids) needs array parameters; fall back to per-user loading
+            users = {}
+            for user_id in user_ids:
+                user_data = self.get_user_data(user_id)
+                if user_data:
+                    users[user_id] = user_data
+            return users
+
+        child_queries = {
+            "progress": """
+                SELECT "userId", "weekId", "lessonId", completed, score, "completedAt"
+                FROM "Progress" WHERE "userId" = ANY(:ids)
+                ORDER BY "userId", "weekId", "lessonId"
+            """,
+            "lab_sessions": """
+                SELECT "userId", "exerciseId", passed, "submittedAt"
+                FROM "LabSession" WHERE "userId" = ANY(:ids)
+                ORDER BY "userId", "submittedAt"
+            """,
+            "aars": """
+                SELECT "userId", "lessonId", level, "completedAt", "qualityScore",
+                       "whatWorkedWell", "whatDidNotWork", "wordCounts"
+                FROM "AfterActionReview" WHERE "userId" = ANY(:ids)
+                ORDER BY "userId", "completedAt"
+            """,
+            "badges": """
+                SELECT "userId", "badgeType", "earnedAt"
+                FROM "Badge" WHERE "userId" = ANY(:ids)
+                ORDER BY "userId", "earnedAt"
+            """,
+            "projects": """
+                SELECT "userId", "projectId", completed, "completedAt"
+                FROM "Project" WHERE "userId" = ANY(:ids)
+            """,
+        }
+
+        with self.SessionLocal() as session:
+            try:
+                with DB_QUERY_SECONDS.time("sync", "bulk_user"):
+                    user_rows = session.execute(text("""
+                        SELECT id, "currentWeek", "totalXP", "createdAt"
+                        FROM "User" WHERE id = ANY(:ids)
+                    """), {"ids": user_ids}).fetchall()
+                users_by_id = {row[0]: row for row in user_rows}
+
+                children = {key: {} for key in child_queries}
+                for key, query in child_queries.items():
+                    grouped = children[key]
+                    with DB_QUERY_SECONDS.time("sync", f"bulk_{key}"):
+                        for chunk in self._stream_rows(session, query, {"ids": user_ids}):
+                            for row in chunk:
+                                grouped.setdefault(row[0], []).append(row[1:])
 
                 return {
-                    "user_id": user_result[0],
-                    "current_week": user_result[1] or 1,
-                    "total_xp": user_result[2] or 0,
-                    "created_at": user_result[3],
-                    "progress": [
-                        {
-                            "week_id": p[0],
-                            "lesson_id": p[1],
-                            "completed": p[2],
-                            "score": p[3],
-                            "completed_at": p[4]
-                        } for p in progress_results
-                    ],
-                    "lab_sessions": [
-                        {
-                            "exercise_id": l[0],
-                            "passed": l[1],
-                            "submitted_at": l[2]
-                        } for l in lab_results
-                    ],
-                    "aars": [
-                        {
-                            "lesson_id": a[0],
-                            "level": a[1],
-                            "completed_at": a[2],
-                            "quality_score": a[3],
-                            "what_worked_well": a[4],
-                            "what_did_not_work": a[5],
-                            "word_counts": a[6]
-                        } for a in aar_results
-                    ],
-                    "badges": [
-                        {
-                            "badge_type": b[0],
-                            "earned_at": b[1]
-                        } for b in badge_results
-                    ],
-                    "projects": [
-                        {
-                            "project_id": p[0],
-                            "completed": p[1],
-                            "completed_at": p[2]
-                        } for p in project_results
-                    ]
+                    user_id: self._build_user_data(
+                        users_by_id[user_id],
+                        *(children[key].get(user_id, ()) for key in child_queries)
+                    )
+                    for user_id in user_ids if user_id in users_by_id
                 }
 
             except Exception as e:
-                print(f"Error fetching user data from database: {e}")
+                print(f"Error fetching bulk user data from database: {e}")
                 return {}
 
+    def iter_users_data(self, batch_size: Optional[int] = None,
+                        active_since: Optional[datetime] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Stream (user_id, user_data) pairs for every user, one batch at a time
+
+        User IDs are read through a server-side cursor and loaded with
+        get_users_data in batches of batch_size, so memory stays bounded by
+        the batch rather than the user count.
+
+        Args:
+            batch_size: Users per bulk load (defaults to stream_chunk_size)
+            active_since: Only include users with progress or lab activity
+                at or after this time
+        """
+        if not DB_DEPENDENCIES_AVAILABLE or not self.engine or self.SessionLocal is None or text is None:
+            return
+
+        batch_size = batch_size or self.stream_chunk_size
+        query = 'SELECT id FROM "User" u'
+        params: Dict[str, Any] = {}
+        if active_since is not None:
+            query += """
+                WHERE EXISTS (SELECT 1 FROM "Progress" p
+                              WHERE p."userId" = u.id AND p."completedAt" >= :since)
+                   OR EXISTS (SELECT 1 FROM "LabSession" l
+                              WHERE l."userId" = u.id AND l."submittedAt" >= :since)
+            """
+            params["since"] = active_since
+        query += " ORDER BY id"
+
+        with self.SessionLocal() as session:
+            for chunk in self._stream_rows(session, query, params, batch_size):
+                yield from self.get_users_data([row[0] for row in chunk]).items()
+
+    def _stream_rows(self, session, query: str, params: Dict[str, Any],
+                     chunk_size: Optional[int] = None) -> Iterator[list]:
+        """Yield result rows in bounded chunks from a server-side cursor"""
+        chunk_size = chunk_size or self.stream_chunk_size
+        result = session.execute(
+            text(query).execution_options(stream_results=True, yield_per=chunk_size),
+            params
+        )
+        yield from result.partitions(chunk_size)
+
+    def _build_user_data(self, user_result, progress_results, lab_results,
+                         aar_results, badge_results, project_results) -> Dict[str, Any]:
+        """Shape raw row tuples into the user data dict used by feature extraction"""
+        return {
+            "user_id": user_result[0],
+            "current_week": user_result[1] or 1,
+            "total_xp": user_result[2] or 0,
+            "created_at": user_result[3],
+            "progress": [
+                {
+                    "week_id": p[0],
+                    "lesson_id": p[1],
+                    "completed": p[2],
+                    "score": p[3],
+                    "completed_at": p[4]
+                } for p in progress_results
+            ],
+            "lab_sessions": [
+                {
+                    "exercise_id": l[0],
+                    "passed": l[1],
+                    "submitted_at": l[2]
+                } for l in lab_results
+            ],
+            "aars": [
+                {
+                    "lesson_id": a[0],
+                    "level": a[1],
+                    "completed_at": a[2],
+                    "quality_score": a[3],
+                    "what_worked_well": a[4],
+                    "what_did_not_work": a[5],
+                    "word_counts": a[6]
+                } for a in aar_results
+            ],
+            "badges": [
+                {
+                    "badge_type": b[0],
+                    "earned_at": b[1]
+                } for b in badge_results
+            ],
+            "projects": [
+                {
+                    "project_id": p[0],
+                    "completed": p[1],
+                    "completed_at": p[2]
+                } for p in project_results
+            ]
+        }
+
     def extract_ml_features(self, user_data: Dict[str, Any]) -> Dict[str, List[float]]:
-        """Extract ML features from user data for different models"""
-        if not user_data:
-            # Return default features for each model when no data available
-            return {
-                'learning_path': [0.0] * 21,  # 21 features
-                'performance': [0.0] * 8,     # 8 features
-                'learning_style': [0.0] * 8,  # 8 features
-                'skill_gap': [0.0] * 8,       # 8 features
-                'motivation': [0.0] * 5       # 5 features
-            }
-
-        features = {}
-
-        # Learning Path Predictor features (21 features)
-        learning_path_features = []
-
-        # Basic metrics
-        learning_path_features.append(user_data.get("current_week", 1))
-        learning_path_features.append(user_data.get("total_xp", 0) / 1000.0)
-
-        # Progress analysis
-        progress = user_data.get("progress", [])
-        if progress:
-            completed_count = sum(1 for p in progress if p["completed"])
-            total_score = sum(p["score"] or 0 for p in progress)
-            avg_score = total_score / len(progress) if progress else 0
-            completion_rate = completed_count / len(progress) if progress else 0
-
-            learning_path_features.extend([
-                completed_count / 50.0,  # completion count
-                avg_score / 100.0,       # avg score
-                completion_rate,         # completion rate
-                len(progress) / 50.0     # total attempts
-            ])
-        else:
-            learning_path_features.extend([0.0, 0.0, 0.0, 0.0])
-
-        # Lab performance
-        labs = user_data.get("lab_sessions", [])
-        if labs:
-            passed_count = sum(1 for l in labs if l["passed"])
-            pass_rate = passed_count / len(labs) if labs else 0
-            learning_path_features.extend([pass_rate, len(labs) / 20.0])
-        else:
-            learning_path_features.extend([0.0, 0.0])
-
-        # Topic-specific scores (simplified mapping)
-        # Map general progress to topic areas
-        topic_performance = {}
-        for p in progress:
-            lesson_id = p["lesson_id"]
-            if "git" in lesson_id.lower():
-                topic_performance["git"] = max(topic_performance.get("git", 0), p["score"] or 0)
-            elif "linux" in lesson_id.lower():
-                topic_performance["linux"] = max(topic_performance.get("linux", 0), p["score"] or 0)
-            elif "docker" in lesson_id.lower():
-                topic_performance["docker"] = max(topic_performance.get("docker", 0), p["score"] or 0)
-            elif "kubernetes" in lesson_id.lower() or "k8s" in lesson_id.lower():
-                topic_performance["k8s"] = max(topic_performance.get("k8s", 0), p["score"] or 0)
-            elif "aws" in lesson_id.lower():
-                topic_performance["aws"] = max(topic_performance.get("aws", 0), p["score"] or 0)
-            elif "terraform" in lesson_id.lower():
-                topic_performance["terraform"] = max(topic_performance.get("terraform", 0), p["score"] or 0)
-            elif "jenkins" in lesson_id.lower() or "ci" in lesson_id.lower():
-                topic_performance["jenkins"] = max(topic_performance.get("jenkins", 0), p["score"] or 0)
-            elif "monitoring" in lesson_id.lower():
-                topic_performance["monitoring"] = max(topic_performance.get("monitoring", 0), p["score"] or 0)
-
-        # Add topic scores (8 topics)
-        for topic in ["git", "linux", "docker", "k8s", "aws", "terraform", "jenkins", "monitoring"]:
-            score = topic_performance.get(topic, 0) / 100.0
-            learning_path_features.append(score)
-
-        # Add topic attempts (8 topics) - simplified
-        for topic in ["git", "linux", "docker", "k8s", "aws", "terraform", "jenkins", "monitoring"]:
-            attempts = sum(1 for p in progress if topic in p["lesson_id"].lower())
-            learning_path_features.append(min(attempts / 10.0, 1.0))  # Normalize
-
-        features['learning_path'] = learning_path_features
-
-        # Performance Predictor features (8 features)
-        performance_features = []
-        performance_features.append(len(user_data.get("progress", [])))  # study_streak proxy
-        performance_features.append(sum(p.get("score", 0) for p in user_data.get("progress", [])) /
-                                   max(len(user_data.get("progress", [])), 1) / 100.0)  # avg_score
-        performance_features.append(sum(1 for p in user_data.get("progress", []) if p.get("completed", False)) /
-                                   max(len(user_data.get("progress", [])), 1))  # completion_rate
-        performance_features.append(1.0)  # struggle_time_hours (placeholder)
-
-        # Learning style one-hot (simplified)
-        labs_passed = sum(1 for l in user_data.get("lab_sessions", []) if l.get("passed", False))
-        total_labs = len(user_data.get("lab_sessions", []))
-        pass_rate = labs_passed / max(total_labs, 1)
-
-        if pass_rate > 0.8:
-            performance_features.extend([0.2, 0.8, 0.6, 0.4])  # kinesthetic heavy
-        elif pass_rate > 0.6:
-            performance_features.extend([0.6, 0.4, 0.8, 0.2])  # reading heavy
-        else:
-            performance_features.extend([0.8, 0.3, 0.4, 0.5])  # visual heavy
-
-        features['performance'] = performance_features
-
-        # Learning Style Detector features (8 features) - simplified
-        style_features = [0.5] * 8  # Default neutral
-        if user_data.get("aars"):
-            # Analyze AAR content for learning style indicators
-            aar_count = len(user_data["aars"])
-            style_features[0] = min(aar_count / 10.0, 1.0)  # Visual indicators
-
-        features['learning_style'] = style_features
-
-        # Skill Gap Analyzer features (8 features)
-        skill_features = []
-        for topic in ["git", "linux", "docker", "k8s", "aws", "terraform", "jenkins", "monitoring"]:
-            # Calculate gap as 1 - performance
-            performance = topic_performance.get(topic, 0) / 100.0
-            gap = 1.0 - performance
-            skill_features.append(gap)
-
-        features['skill_gap'] = skill_features
-
-        # Motivational Analyzer features (5 features)
-        motivation_features = []
-        recent_activity = len([p for p in user_data.get("progress", [])
-                              if p.get("completed_at") and
-                              (datetime.now() - p["completed_at"].replace(tzinfo=None)).days < 7])
-        motivation_features.append(recent_activity / 7.0)  # weekly activity
-        motivation_features.append(len(user_data.get("badges", [])) / 10.0)  # achievement score
-        motivation_features.append(len(user_data.get("projects", [])) / 3.0)  # project completion
-        motivation_features.append(len(user_data.get("aars", [])) / 20.0)  # reflection score
-        motivation_features.append(user_data.get("total_xp", 0) / 5000.0)  # xp progress
-
-        features['motivation'] = motivation_features
-
-        return features
+        """Extract ML features from user data for different models
+
+        Thin single-user wrapper around features.extract_feature_matrices;
+        use that directly to extract features for many users at once.
+        """
+        with FEATURE_EXTRACTION_SECONDS.time():
+            matrices = extract_feature_matrices([user_data], dtype=float)
+        return {key: matrix[0].tolist() for key, matrix in matrices.items()}
 
 # Global database manager instance
 db_manager = DatabaseManager()
\ No newline at end of file
@@ -0,0 +1,233 @@
+"""
+Learning event ingestion
+Applies Progress/LabSession/AAR/Badge/Project changes from the Node server to the feature store
+and insight snapshot, and invalidates only the affected user's cached predictions and insights
+"""
+
+import asyncio
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from executor import PoolSaturatedError
+from feature_store import FeatureStore
+from insight_snapshots import InsightSnapshotStore
+from metrics import EVENT_ERRORS, LEARNING_EVENTS
+
+# Events accepted but not yet applied beyond this are rejected (503)
+EVENT_QUEUE_SIZE = int(os.getenv('ML_EVENT_QUEUE', '10000'))
+# Queued events applied per worker pass (grouped into one Redis round trip per user)
+EVENT_BATCH_SIZE = int(os.getenv('ML_EVENT_BATCH_SIZE', '500'))
+
+# Prisma model name -> feature store event type
+EVENT_TYPES = {
+    'Progress': 'progress',
+    'LabSession': 'lab_session',
+    'AfterActionReview': 'aar',
+    'Badge': 'badge',
+    'Project': 'project',
+    'User': 'user',
+}
+
+# Prisma (camelCase) column -> get_user_data row key, per event type
+EVENT_FIELDS = {
+    'progress': {'weekId': 'week_id', 'lessonId': 'lesson_id', 'completed': 'completed',
+                 'score': 'score', 'completedAt': 'completed_at'},
+    'lab_session': {'exerciseId': 'exercise_id', 'passed': 'passed', 'submittedAt': 'submitted_at'},
+    'aar': {'lessonId': 'lesson_id'},
+    'badge': {'badgeType': 'badge_type'},
+    'project': {'projectId': 'project_id', 'completed': 'completed'},
+    'user': {'currentWeek': 'current_week', 'totalXP': 'total_xp'},
+}
+
+
+# Columns the feature store does arithmetic on, and the timestamps it parses
+NUMERIC_FIELDS = ('score', 'weekId', 'currentWeek', 'totalXP')
+TIMESTAMP_FIELDS = ('completedAt', 'submittedAt')
+
+
+def _row(kind: str, record: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if record is None:
+        return None
+    return {key: record[column] for column, key in EVENT_FIELDS[kind].items() if column in record}
+
+def _validate(kind: str, record: Dict[str, Any], name: str) -> None:
+    """Reject a record the feature store could not apply, so it fails the request instead of the worker"""
+    if kind == 'progress' and not isinstance(record.get('lessonId'), str):
+        raise ValueError(f"Progress events need lessonId in {name}")
+    for column in NUMERIC_FIELDS:
+        value = record.get(column)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise ValueError(f"{name}.{column} must be a number")
+    for column in TIMESTAMP_FIELDS:
+        value = record.get(column)
+        if value is None:
+            continue
+        try:
+            datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except (AttributeError, ValueError):
+            raise ValueError(f"{name}.{column} must be an ISO 8601 timestamp")
+
+def store_event(model: str, action: str, data: Dict[str, Any], previous: Optional[Dict[str, Any]] = None,
+                committed_at: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Translate a Prisma change (model name, create/update/delete, record) to a feature store event
+
+    Returns None for changes that leave the aggregates as they are (updates
+    of count-only records), and an event with 'rebuild' set for changes that
+    cannot be applied incrementally (an update without the previous record,
+    a deleted user); those drop the user's aggregates. committed_at (epoch
+    seconds) is carried on the event for FeatureStore.apply_events.
+
+    Raises:
+        ValueError: Unknown model or action, a progress record without
+            lessonId, or a non-numeric score or unparseable timestamp (in
+            data or previous)
+    """
+    kind = EVENT_TYPES.get(model)
+    if kind is None:
+        raise ValueError(f"Unknown event model: {model}")
+    if action not in ('create', 'update', 'delete'):
+        raise ValueError(f"Unknown event action: {action}")
+    _validate(kind, data, 'data')
+    if previous is not None:
+        _validate(kind, previous, 'previous')
+
+    if kind == 'user' and action == 'delete':
+        return {'type': kind, 'rebuild': True}
+    if action == 'update' and kind in ('aar', 'badge', 'project'):
+        return None  # only their counts are aggregated
+    if action == 'update' and previous is None and kind != 'user':
+        return {'type': kind, 'rebuild': True}
+
+    event = {'type': kind, 'data': _row(kind, data)}
+    if action == 'update' and kind != 'user':
+        event['previous'] = _row(kind, previous)
+    if action == 'delete':
+        event['deleted'] = True
+    if committed_at is not None:
+        event['committed_at'] = committed_at
+    return event
+
+
+class EventProcessor:
+    """Bounded queue of learning events, applied by a background worker
+
+    For each user in a batch the worker first applies the events to the
+    feature store, marks the user's materialized insights stale and then
+    invalidates their cached insights and predictions, so a request
+    arriving in between never caches results computed from the old data.
+    A user whose events cannot be applied has their aggregates dropped for
+    a rebuild instead, without holding up the rest of the batch. The worker
+    starts with the first event and stops on shutdown.
+    """
+
+    def __init__(self, store: FeatureStore, cache, snapshots: Optional[InsightSnapshotStore] = None,
+                 max_queue: int = EVENT_QUEUE_SIZE, batch_size: int = EVENT_BATCH_SIZE):
+        self.store = store
+        self.cache = cache
+        self.snapshots = snapshots
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.accepted = 0
+        self.applied = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def submit(self, events: List[Tuple[str, Optional[Dict[str, Any]]]]) -> None:
+        """Queue (user_id, store event) pairs; all are accepted or none
+
+        Raises:
+            PoolSaturatedError: The queue cannot take every event
+        """
+        if self._worker is not None and self._worker.get_loop() is not asyncio.get_running_loop():
+            # Started on another event loop (which has since closed)
+            self._queue = self._worker = None
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._queue.qsize() + len(events) > self.max_queue:
+            self.rejected += len(events)
+            raise PoolSaturatedError(f"event queue full ({self._queue.qsize()} events pending)")
+
+        for item in events:
+            self._queue.put_nowait(item)
+        self.accepted += len(events)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            counted = self.applied + self.failed
+            try:
+                await self.process(batch)
+            except Exception:
+                # Only the events process() had not already counted
+                uncounted = len(batch) - (self.applied + self.failed - counted)
+                self.failed += uncounted
+                LEARNING_EVENTS.inc('failed', amount=uncounted)
+                EVENT_ERRORS.inc('batch')
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def process(self, events: List[Tuple[str, Optional[Dict[str, Any]]]]) -> None:
+        """Apply events to the feature store and snapshot, then invalidate each affected user's cache entries"""
+        by_user: Dict[str, List[Optional[Dict[str, Any]]]] = OrderedDict()
+        for user_id, event in events:
+            by_user.setdefault(user_id, []).append(event)
+
+        for user_id, user_events in by_user.items():
+            try:
+                if any(event is not None and event.get('rebuild') for event in user_events):
+                    await self.store.delete(user_id)
+                else:
+                    await self.store.apply_events(user_id, [event for event in user_events if event is not None])
+                self.applied += len(user_events)
+                LEARNING_EVENTS.inc('applied', amount=len(user_events))
+            except Exception:
+                # Nothing was written for the user; rebuild rather than miss their events
+                self.failed += len(user_events)
+                LEARNING_EVENTS.inc('failed', amount=len(user_events))
+                EVENT_ERRORS.inc('apply')
+                try:
+                    await self.store.delete(user_id)
+                except Exception:
+                    EVENT_ERRORS.inc('rebuild')
+            try:
+                if self.snapshots is not None:
+                    await self.snapshots.record_activity(user_id)
+                await self.cache.invalidate_user_cache(user_id)
+                await self.cache.invalidate_prediction_cache(user_id)
+            except Exception:
+                # The events are in the store; cached entries expire on their TTL
+                EVENT_ERRORS.inc('invalidate')
+
+    async def drain(self) -> None:
+        """Wait until every queued event has been applied"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self) -> None:
+        """Cancel the worker (events still queued are dropped; the store heals on rebuild)"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and counters"""
+        return {
+            'pending': self._queue.qsize() if self._queue is not None else 0,
+            'accepted': self.accepted,
+            'applied': self.applied,
+            'rejected': self.rejected,
+            'failed': self.failed,
+        }
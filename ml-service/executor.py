@@ -0,0 +1,183 @@
+"""
+Execution pools for blocking work
+Runs blocking database I/O on a bounded thread pool and large inference batches on a process pool
+"""
+
+import asyncio
+import importlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from models.artifacts import read_metadata
+
+T = TypeVar('T')
+
+# Batches with at least this many rows are scored on the process pool
+PROCESS_POOL_MIN_ROWS = int(os.getenv('ML_PROCESS_POOL_MIN_ROWS', '20000'))
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when a pool's queue is full; handlers turn it into a 503"""
+
+class ModelVersionMismatchError(RuntimeError):
+    """Raised in a pool worker when the saved artifact is not the version the caller serves"""
+
+
+class BoundedPool:
+    """Executor admitting at most max_workers running plus max_queue waiting tasks
+
+    Work beyond that is rejected with PoolSaturatedError instead of queueing
+    without bound. With max_workers 0, work runs inline on the caller's thread.
+    The executor is created on first use.
+
+    A task counts as pending until it finishes on the executor, even when the
+    request awaiting it is cancelled first, so abandoned work still occupies
+    its slot. Finished tasks count as completed, failed (raised) or cancelled
+    (dropped from the queue before starting).
+    """
+
+    def __init__(self, name: str, executor_factory: Callable[[int], Executor],
+                 max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor_factory = executor_factory
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run fn(*args) on the pool and await its result"""
+        if self.max_workers <= 0:
+            return fn(*args)
+
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise PoolSaturatedError(f"{self.name} pool saturated ({self.pending} tasks pending)")
+
+        if self._executor is None:
+            self._executor = self._executor_factory(self.max_workers)
+
+        with self._lock:
+            self.pending += 1
+        try:
+            future = self._executor.submit(partial(fn, *args))
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            raise
+        # Runs on the worker (or here, if already done) once the task itself finishes
+        future.add_done_callback(self._task_done)
+        return await asyncio.wrap_future(future)
+
+    def _task_done(self, future: Future):
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled():
+                self.cancelled += 1
+            elif future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def shutdown(self):
+        """Stop the executor; queued work is cancelled"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and counters"""
+        return {
+            'workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'pending': self.pending,
+            'completed': self.completed,
+            'failed': self.failed,
+            'cancelled': self.cancelled,
+            'rejected': self.rejected,
+        }
+
+
+def _thread_pool(max_workers: int) -> Executor:
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ml-io")
+
+def _process_pool(max_workers: int) -> Executor:
+    # spawn: the service process runs threads (DB, Redis), which fork does not copy safely
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+# Models loaded inside process pool workers, keyed by class
+_worker_models: Dict[Tuple[str, str], Any] = {}
+
+
+def _saved_version(model) -> Optional[str]:
+    try:
+        return read_metadata(model.artifact_path)['version']
+    except (OSError, ValueError, KeyError):
+        return None
+
+def predict_batch_in_worker(module: str, class_name: str, version: str, X: np.ndarray) -> np.ndarray:
+    """Score a batch in a pool worker with the model class loaded from its saved artifact
+
+    The worker keeps one instance per model class. When the caller serves
+    another version (e.g. after /train saved a new artifact), the model is
+    reloaded only if the artifact's sidecar has that version.
+
+    Raises:
+        ModelVersionMismatchError: The saved artifact is another version
+            (e.g. a concurrent /train has not finished swapping models)
+    """
+    key = (module, class_name)
+    model = _worker_models.get(key)
+    if model is None or (model.version != version and _saved_version(model) == version):
+        model = getattr(importlib.import_module(module), class_name)()
+        _worker_models[key] = model
+    if model.version != version:
+        raise ModelVersionMismatchError(f"{class_name} artifact is version {model.version}, not {version}")
+    return model.predict_batch(X)
+
+async def predict_batch(model, X: np.ndarray) -> np.ndarray:
+    """Score a batch inline, or on the process pool when it has PROCESS_POOL_MIN_ROWS rows"""
+    if X.shape[0] < PROCESS_POOL_MIN_ROWS or cpu_pool.max_workers <= 0:
+        return model.predict_batch(X)
+    cls = type(model)
+    try:
+        return await cpu_pool.run(predict_batch_in_worker, cls.__module__, cls.__name__, model.version, X)
+    except ModelVersionMismatchError:
+        # Workers only score the saved version; score this one here instead
+        return model.predict_batch(X)
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Stats for both pools"""
+    return {'io': io_pool.stats(), 'cpu': cpu_pool.stats()}
+
+def shutdown_pools():
+    """Stop both pools"""
+    io_pool.shutdown()
+    cpu_pool.shutdown()
+
+
+# Blocking DB I/O: threads wait on sockets, so the pool can exceed the core count
+io_pool = BoundedPool(
+    "io", _thread_pool,
+    max_workers=int(os.getenv('ML_IO_THREADS', '16')),
+    max_queue=int(os.getenv('ML_IO_QUEUE', '256'))
+)
+# CPU-bound inference: one process per core sidesteps the GIL
+cpu_pool = BoundedPool(
+    "cpu", _process_pool,
+    max_workers=int(os.getenv('ML_CPU_PROCESSES', str(min(4, os.cpu_count() or 1)))),
+    max_queue=int(os.getenv('ML_CPU_QUEUE', '32'))
+)
@@ -0,0 +1,360 @@
+"""
+Incremental per-user feature store
+Keeps each learner's running aggregates in Redis, updated in O(1) per learning event
+"""
+
+import os
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from redis.exceptions import WatchError
+
+from cache import AsyncRedisCache, async_redis_cache
+from features import AGGREGATE_COLUMNS, aggregate_users, feature_matrices_from_aggregates
+from metrics import FEATURE_EXTRACTION_SECONDS, FEATURE_STORE_READS
+from models.topics import TOPIC_KEYS, lesson_topic_index
+
+# ML_FEATURE_STORE=true serves features from the store. Enable it once the
+# Node server sends learning events (POST /events); without them stored
+# aggregates only change when they expire.
+FEATURE_STORE_ENABLED = os.getenv('ML_FEATURE_STORE', 'false').lower() == 'true'
+# Aggregates are rebuilt from the database after this long without updates,
+# which also repairs any drift from missed events
+FEATURE_STORE_TTL_SECONDS = int(os.getenv('ML_FEATURE_STORE_TTL_SECONDS', str(7 * 86400)))
+
+# Recent activity is kept as per-day completion counts; the motivation
+# features count the last ACTIVITY_DAYS calendar days, today included
+ACTIVITY_DAYS = 7
+# Older day buckets removed on each update (inactive hashes simply expire)
+PRUNE_DAYS = 30
+# Attempts to apply a user's events while rebuilds keep replacing their hash
+APPLY_RETRIES = 3
+
+# Stored scalars: everything in AGGREGATE_COLUMNS except 'recent', which is
+# summed from the day buckets when read
+STORED_COLUMNS = tuple(column for column in AGGREGATE_COLUMNS if column != 'recent')
+
+
+def aggregates_key(user_id: str) -> str:
+    """Redis hash of a user's scalar aggregates, per-topic attempts and day buckets"""
+    return f"ml:features:{user_id}"
+
+def best_scores_key(user_id: str) -> str:
+    """Redis sorted set of a user's best score per topic slot (updated with ZADD GT)"""
+    return f"ml:features:{user_id}:best"
+
+def version_key(user_id: str) -> str:
+    """Redis counter bumped by every change applied to a user (kept apart so deletes bump it too)"""
+    return f"ml:features:{user_id}:version"
+
+
+def _day(timestamp: Any) -> Optional[int]:
+    """Calendar day ordinal of a datetime or ISO string (wall time), or None"""
+    if timestamp is None:
+        return None
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    return timestamp.date().toordinal()
+
+def _recent(activity: Dict[int, float], today: int) -> float:
+    return float(sum(count for day, count in activity.items() if today - ACTIVITY_DAYS < day <= today))
+
+def _activity(user_data: Dict[str, Any], today: int) -> Dict[int, float]:
+    """Completions per day ordinal within the ACTIVITY_DAYS window ending today"""
+    activity: Dict[int, float] = {}
+    for progress in user_data.get('progress', []):
+        day = _day(progress.get('completed_at'))
+        if day is not None and today - ACTIVITY_DAYS < day <= today:
+            activity[day] = activity.get(day, 0.0) + 1
+    return activity
+
+def recent_count(user_data: Dict[str, Any], today: int) -> float:
+    """'recent' as the store computes it: completions in the last ACTIVITY_DAYS calendar days
+
+    aggregate_users counts a rolling 7x24h window instead; paths whose
+    results must match the store's (rebuilds, materialized insights) use this.
+    """
+    return _recent(_activity(user_data, today), today)
+
+
+def user_aggregates(user_data: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Aggregates of one user's full history, as stored by FeatureStore
+
+    Returns the AGGREGATE_COLUMNS scalars, 'topic_best' and 'topic_attempts'
+    lists and 'activity' (completions per day ordinal within the window).
+    """
+    now = now or datetime.now()
+    columns = aggregate_users([user_data], now)
+    aggregates = {column: float(columns[column][0]) for column in AGGREGATE_COLUMNS}
+    aggregates['topic_best'] = columns['topic_best'][0].tolist()
+    aggregates['topic_attempts'] = columns['topic_attempts'][0].tolist()
+
+    today = now.date().toordinal()
+    aggregates['activity'] = _activity(user_data, today)
+    # Calendar days, as FeatureStore.get computes it, so hits and misses agree
+    aggregates['recent'] = _recent(aggregates['activity'], today)
+    return aggregates
+
+def aggregate_features(aggregates: Dict[str, Any]) -> Dict[str, List[float]]:
+    """Every model's feature block for one user from their aggregates
+
+    Same dict-of-lists shape as DatabaseManager.extract_ml_features.
+    """
+    with FEATURE_EXTRACTION_SECONDS.time():
+        columns = {column: np.array([aggregates[column]]) for column in AGGREGATE_COLUMNS}
+        columns['topic_best'] = np.array([aggregates['topic_best']])
+        columns['topic_attempts'] = np.array([aggregates['topic_attempts']])
+        columns['empty'] = np.zeros(1, dtype=bool)
+        matrices = feature_matrices_from_aggregates(columns, dtype=float)
+    return {key: matrix[0].tolist() for key, matrix in matrices.items()}
+
+
+def event_updates(event: Dict[str, Any], today: Optional[int] = None):
+    """Increments, best-score candidates and overwrites one learning event applies
+
+    event['type'] is the changed table ('progress', 'lab_session', 'aar',
+    'badge', 'project') or 'user'. event['data'] is the row with the same
+    keys as get_user_data rows; updates of an existing row also carry the
+    old row as event['previous'], and removals set event['deleted'].
+
+    Returns (increments by hash field, best score by topic slot, fields to set).
+    """
+    today = today or date.today().toordinal()
+    kind = event['type']
+    data = event.get('data') or {}
+    increments: Dict[str, float] = {}
+    best: Dict[int, float] = {}
+
+    if kind == 'user':
+        overwrite = {}
+        if data.get('current_week') is not None:
+            overwrite['current_week'] = float(data['current_week'])
+        if data.get('total_xp') is not None:
+            overwrite['total_xp'] = float(data['total_xp'])
+        return increments, best, overwrite
+
+    def add(field: str, amount: float):
+        if amount:
+            increments[field] = increments.get(field, 0.0) + amount
+
+    def apply_row(row: Dict[str, Any], sign: int):
+        if kind == 'progress':
+            score = float(row.get('score') or 0.0)
+            add('progress', sign)
+            add('completed', sign * bool(row.get('completed')))
+            add('score_sum', sign * score)
+            score_topic, attempt_mask = lesson_topic_index.lookup(row['lesson_id'])
+            for t in range(len(TOPIC_KEYS)):
+                if (attempt_mask >> t) & 1:
+                    add(f'attempts:{t}', sign)
+            if sign > 0 and score_topic >= 0:
+                # Best scores only ever rise: a lowered or removed score keeps the old best
+                best[score_topic] = max(best.get(score_topic, 0.0), score)
+            day = _day(row.get('completed_at'))
+            if day is not None and today - ACTIVITY_DAYS < day <= today:
+                add(f'day:{day}', sign)
+        elif kind == 'lab_session':
+            add('labs', sign)
+            add('labs_passed', sign * bool(row.get('passed')))
+        elif kind in ('aar', 'badge', 'project'):
+            add(f'{kind}s', sign)
+        else:
+            raise ValueError(f"Unknown event type: {kind}")
+
+    if event.get('previous'):
+        apply_row(event['previous'], -1)
+    if not event.get('deleted'):
+        apply_row(data, 1)
+    elif not event.get('previous'):
+        apply_row(data, -1)
+    return increments, best, {}
+
+
+class FeatureStore:
+    """Per-user running aggregates in Redis, read in one round trip
+
+    Each user has a hash of scalar aggregates, per-topic attempt counts and
+    per-day activity counts, plus a sorted set of best scores per topic
+    (kept as a running maximum with ZADD GT). Events apply their increments
+    in one MULTI, so every update is O(1) however long the user's history.
+    Hashes are rebuilt from the user's full history when missing and expire
+    FEATURE_STORE_TTL_SECONDS after their last update. Redis failures fall
+    back to rebuilding, like cache misses.
+
+    Rebuilds race with events, so each user also has a version counter that
+    every event and delete bumps. A rebuild reads the version before loading
+    the history and only stores its result if the version is unchanged
+    (WATCH), and the hash records when it was built: events committed
+    before then may already be counted in it, so they drop the hash for
+    another rebuild instead of adding their increments a second time.
+    """
+
+    def __init__(self, remote: AsyncRedisCache, enabled: bool = FEATURE_STORE_ENABLED,
+                 ttl_seconds: int = FEATURE_STORE_TTL_SECONDS):
+        self.remote = remote
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and self.remote.available
+
+    async def get(self, user_id: str, today: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Stored aggregates for user_id (see user_aggregates), or None if not built"""
+        if not self.available:
+            return None
+
+        try:
+            async with self.remote.pipeline() as pipe:
+                pipe.hgetall(aggregates_key(user_id))
+                pipe.zrange(best_scores_key(user_id), 0, -1, withscores=True)
+                fields, best_scores = await pipe.execute()
+        except Exception as e:
+            print(f"Feature store read error: {e}")
+            return None
+
+        fields = {field.decode(): float(value) for field, value in fields.items()}
+        if 'built' not in fields:
+            FEATURE_STORE_READS.inc('miss')
+            return None
+        FEATURE_STORE_READS.inc('hit')
+
+        aggregates: Dict[str, Any] = {column: fields.get(column, 0.0) for column in STORED_COLUMNS}
+        aggregates['topic_attempts'] = [fields.get(f'attempts:{t}', 0.0) for t in range(len(TOPIC_KEYS))]
+        topic_best = [0.0] * len(TOPIC_KEYS)
+        for slot, score in best_scores:
+            topic_best[int(slot)] = score
+        aggregates['topic_best'] = topic_best
+        aggregates['activity'] = {
+            int(field[4:]): count for field, count in fields.items() if field.startswith('day:')
+        }
+        aggregates['recent'] = _recent(aggregates['activity'], today or date.today().toordinal())
+        return aggregates
+
+    async def version(self, user_id: str) -> Optional[int]:
+        """user_id's version, read before loading their history for put(); None if unavailable"""
+        if not self.available:
+            return None
+
+        try:
+            async with self.remote.pipeline() as pipe:
+                pipe.get(version_key(user_id))
+                (version,) = await pipe.execute()
+        except Exception as e:
+            print(f"Feature store version error: {e}")
+            return None
+        return int(version or 0)
+
+    async def put(self, user_id: str, aggregates: Dict[str, Any], version: Optional[int]) -> bool:
+        """Replace user_id's stored aggregates (after rebuilding them from history)
+
+        version is what version() returned before the history was loaded.
+        If anything was applied to the user since, the rebuilt aggregates
+        may be missing it and are not stored; the next read rebuilds again.
+        Returns whether they were stored.
+        """
+        if not self.available or version is None:
+            return False
+
+        fields: Dict[str, float] = {column: aggregates[column] for column in STORED_COLUMNS}
+        fields.update({f'attempts:{t}': count for t, count in enumerate(aggregates['topic_attempts'])})
+        fields.update({f'day:{day}': count for day, count in aggregates['activity'].items()})
+        # Taken after the history was loaded: everything committed before it is counted
+        fields['built'] = datetime.now().timestamp()
+        best = {str(t): score for t, score in enumerate(aggregates['topic_best']) if score}
+
+        key, best_key, versions = aggregates_key(user_id), best_scores_key(user_id), version_key(user_id)
+        try:
+            async with self.remote.pipeline(transaction=True) as pipe:
+                await pipe.watch(versions)
+                if int(await pipe.get(versions) or 0) != version:
+                    return False
+                pipe.multi()
+                pipe.delete(key, best_key)
+                pipe.hset(key, mapping=fields)
+                if best:
+                    pipe.zadd(best_key, best)
+                pipe.expire(key, self.ttl_seconds)
+                pipe.expire(best_key, self.ttl_seconds)
+                pipe.expire(versions, self.ttl_seconds)
+                await pipe.execute()
+            return True
+        except WatchError:
+            return False
+        except Exception as e:
+            print(f"Feature store write error: {e}")
+            return False
+
+    async def apply_events(self, user_id: str, events: List[Dict[str, Any]]) -> None:
+        """Apply a user's learning events (see event_updates) in one transaction
+
+        event['committed_at'] (epoch seconds) is when the change was
+        committed; events without it are taken to be newer than the hash. If
+        any event committed before the hash was built, the hash is dropped
+        instead. Users without stored aggregates only get their version
+        bumped, so a rebuild in flight is discarded.
+
+        Raises:
+            ValueError, KeyError, TypeError: A malformed event (see
+                event_updates); raised before anything is written
+        """
+        if not self.available or not events:
+            return
+
+        today = date.today().toordinal()
+        updates = [event_updates(event, today) for event in events]
+        committed = [event['committed_at'] for event in events if event.get('committed_at') is not None]
+        key, best_key, versions = aggregates_key(user_id), best_scores_key(user_id), version_key(user_id)
+        try:
+            async with self.remote.pipeline(transaction=True) as pipe:
+                for _ in range(APPLY_RETRIES):
+                    try:
+                        # A rebuild storing a new hash meanwhile makes EXEC fail; then look again
+                        await pipe.watch(key)
+                        built = await pipe.hget(key, 'built')
+                        pipe.multi()
+                        if built is not None and committed and min(committed) <= float(built):
+                            pipe.delete(key, best_key)
+                        elif built is not None:
+                            self._queue_updates(pipe, key, best_key, updates, today)
+                        pipe.incr(versions)
+                        pipe.expire(versions, self.ttl_seconds)
+                        await pipe.execute()
+                        return
+                    except WatchError:
+                        continue
+        except Exception as e:
+            print(f"Feature store update error: {e}")
+            return
+        # Still contended after every retry: leave the user to a fresh rebuild
+        await self.delete(user_id)
+
+    def _queue_updates(self, pipe, key: str, best_key: str, updates, today: int) -> None:
+        for increments, best, overwrite in updates:
+            for field, amount in increments.items():
+                pipe.hincrbyfloat(key, field, amount)
+            if best:
+                pipe.zadd(best_key, {str(t): score for t, score in best.items()}, gt=True)
+            if overwrite:
+                pipe.hset(key, mapping=overwrite)
+        pipe.hdel(key, *(f'day:{today - ACTIVITY_DAYS - d}' for d in range(PRUNE_DAYS)))
+        pipe.expire(key, self.ttl_seconds)
+        pipe.expire(best_key, self.ttl_seconds)
+
+    async def delete(self, user_id: str) -> None:
+        """Drop user_id's aggregates so the next read rebuilds them, discarding any rebuild in flight"""
+        if not self.available:
+            return
+        try:
+            async with self.remote.pipeline(transaction=True) as pipe:
+                pipe.delete(aggregates_key(user_id), best_scores_key(user_id))
+                pipe.incr(version_key(user_id))
+                pipe.expire(version_key(user_id), self.ttl_seconds)
+                await pipe.execute()
+        except Exception as e:
+            print(f"Feature store delete error: {e}")
+
+
+# Global feature store on the shared async Redis connection pool
+feature_store = FeatureStore(async_redis_cache)
@@ -0,0 +1,234 @@
+"""
+Columnar feature extraction for ML models
+Computes every model's feature block for many users at once with NumPy group-bys
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from models.topics import TOPIC_KEYS, lesson_topic_index
+
+# Feature block width per model (same keys as DatabaseManager.extract_ml_features).
+# The learning path block carries 8 topic scores and 8 topic attempts after its
+# 8 summary features; LearningPathPredictor reads the first 21 columns.
+FEATURE_SIZES = {
+    'learning_path': 24,
+    'performance': 8,
+    'learning_style': 8,
+    'skill_gap': 8,
+    'motivation': 5,
+}
+
+# Feature block scored by each model (keys of the models dict in main.py)
+MODEL_FEATURE_KEYS = {
+    'learning-path-predictor': 'learning_path',
+    'performance-predictor': 'performance',
+    'learning-style-detector': 'learning_style',
+    'skill-gap-analyzer': 'skill_gap',
+    'motivational-analyzer': 'motivation',
+}
+
+# Performance feature learning-style blocks, chosen by lab pass rate
+STYLE_KINESTHETIC = [0.2, 0.8, 0.6, 0.4]
+STYLE_READING = [0.6, 0.4, 0.8, 0.2]
+STYLE_VISUAL = [0.8, 0.3, 0.4, 0.5]
+
+# Per-user scalar aggregates the feature blocks are computed from; with the
+# per-topic 'topic_best' and 'topic_attempts' they are everything
+# feature_matrices_from_aggregates needs ('recent' counts progress completed
+# in the last 7 days)
+AGGREGATE_COLUMNS = (
+    'current_week', 'total_xp', 'progress', 'completed', 'score_sum', 'recent',
+    'labs', 'labs_passed', 'aars', 'badges', 'projects'
+)
+
+
+def _within_window(timestamps: List[Optional[datetime]], cutoff: datetime) -> np.ndarray:
+    """1.0 where a timestamp is set and later than cutoff, compared as naive wall time"""
+    try:
+        recent = [t is not None and t > cutoff for t in timestamps]
+    except TypeError:
+        # tz-aware values cannot be compared with a naive cutoff
+        recent = [t is not None and t.replace(tzinfo=None) > cutoff for t in timestamps]
+    return np.array(recent, dtype=np.float64)
+
+
+def extract_feature_matrices(users: Sequence[Dict[str, Any]], now: Optional[datetime] = None,
+                             dtype=np.float32) -> Dict[str, np.ndarray]:
+    """Extract all model feature blocks for many users in one columnar pass
+
+    Progress, lab and activity rows from every user are flattened into column
+    arrays once, then aggregated per user with bincount/maximum.at group-bys.
+    Values match DatabaseManager.extract_ml_features row for row; empty user
+    dicts produce all-zero rows.
+
+    Args:
+        users: User data dicts as returned by DatabaseManager.get_user_data
+        now: Reference time for the 7-day activity window (defaults to now)
+        dtype: Output dtype of the feature matrices
+
+    Returns:
+        Dict mapping model feature key to an (n_users, n_features) matrix
+    """
+    return feature_matrices_from_aggregates(aggregate_users(users, now), dtype)
+
+
+def aggregate_users(users: Sequence[Dict[str, Any]], now: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+    """Per-user aggregates the feature blocks are computed from (see AGGREGATE_COLUMNS)
+
+    Returns a dict of (n_users,) columns, plus (n_users, n_topics)
+    'topic_best' (best raw score) and 'topic_attempts' matrices and an
+    'empty' mask of users without data.
+    """
+    n_users = len(users)
+    cutoff = (now or datetime.now()) - timedelta(days=7)
+
+    # Per-user scalar columns
+    current_week = np.zeros(n_users)
+    total_xp = np.zeros(n_users)
+    n_labs = np.zeros(n_users)
+    labs_passed = np.zeros(n_users)
+    n_aars = np.zeros(n_users)
+    n_badges = np.zeros(n_users)
+    n_projects = np.zeros(n_users)
+    n_progress = np.zeros(n_users, dtype=np.int64)
+    empty = np.zeros(n_users, dtype=bool)
+
+    progress_rows: List[Dict[str, Any]] = []
+
+    for i, user_data in enumerate(users):
+        if not user_data:
+            empty[i] = True
+            continue
+
+        current_week[i] = user_data.get("current_week", 1)
+        total_xp[i] = user_data.get("total_xp", 0)
+
+        labs = user_data.get("lab_sessions", [])
+        n_labs[i] = len(labs)
+        labs_passed[i] = sum(1 for lab in labs if lab.get("passed", False))
+        n_aars[i] = len(user_data.get("aars", []))
+        n_badges[i] = len(user_data.get("badges", []))
+        n_projects[i] = len(user_data.get("projects", []))
+
+        progress = user_data.get("progress", [])
+        n_progress[i] = len(progress)
+        progress_rows.extend(progress)
+
+    # Flatten progress rows into columns
+    owner = np.repeat(np.arange(n_users), n_progress)
+    completed_arr = np.array([p["completed"] for p in progress_rows], dtype=bool).astype(np.float64)
+    scores_arr = np.nan_to_num(np.array([p["score"] for p in progress_rows], dtype=np.float64), nan=0.0)
+    recent_arr = _within_window([p.get("completed_at") for p in progress_rows], cutoff)
+    lesson_ids = [p["lesson_id"] for p in progress_rows]
+
+    # Topic slots come from the shared precompiled lesson index
+    codes = np.array(lesson_topic_index.codes(lesson_ids), dtype=np.int64)
+    score_topic = (codes & 0xF) - 1
+    attempt_mask = codes >> 4
+
+    # Per-user group-bys over progress rows
+    topic_best = np.zeros((n_users, len(TOPIC_KEYS)))
+    matched = score_topic >= 0
+    np.maximum.at(topic_best, (owner[matched], score_topic[matched]), scores_arr[matched])
+
+    topic_attempts = np.column_stack([
+        np.bincount(owner, weights=(attempt_mask >> t) & 1, minlength=n_users)
+        for t in range(len(TOPIC_KEYS))
+    ]) if n_users else np.zeros((0, len(TOPIC_KEYS)))
+
+    return {
+        'current_week': current_week,
+        'total_xp': total_xp,
+        'progress': n_progress.astype(np.float64),
+        'completed': np.bincount(owner, weights=completed_arr, minlength=n_users),
+        'score_sum': np.bincount(owner, weights=scores_arr, minlength=n_users),
+        'recent': np.bincount(owner, weights=recent_arr, minlength=n_users),
+        'labs': n_labs,
+        'labs_passed': labs_passed,
+        'aars': n_aars,
+        'badges': n_badges,
+        'projects': n_projects,
+        'topic_best': topic_best,
+        'topic_attempts': topic_attempts,
+        'empty': empty,
+    }
+
+
+def feature_matrices_from_aggregates(aggregates: Dict[str, np.ndarray], dtype=np.float32) -> Dict[str, np.ndarray]:
+    """Every model feature block from per-user aggregates (as returned by aggregate_users)"""
+    n_users = len(aggregates['empty'])
+    current_week = aggregates['current_week']
+    total_xp = aggregates['total_xp']
+    n_progress = aggregates['progress']
+    completed_count = aggregates['completed']
+    score_sum = aggregates['score_sum']
+    recent_count = aggregates['recent']
+    n_labs = aggregates['labs']
+    labs_passed = aggregates['labs_passed']
+    n_aars = aggregates['aars']
+    n_badges = aggregates['badges']
+    n_projects = aggregates['projects']
+    topic_scores = aggregates['topic_best'] / 100.0
+    topic_attempts = aggregates['topic_attempts']
+    empty = aggregates['empty']
+
+    has_progress = n_progress > 0
+    progress_div = np.maximum(n_progress, 1)
+    avg_score = score_sum / progress_div
+    completion_rate = completed_count / progress_div
+    lab_pass_rate = labs_passed / np.maximum(n_labs, 1)
+
+    learning_path = np.column_stack([
+        current_week,
+        total_xp / 1000.0,
+        completed_count / 50.0,
+        np.where(has_progress, avg_score / 100.0, 0.0),
+        np.where(has_progress, completion_rate, 0.0),
+        n_progress / 50.0,
+        lab_pass_rate,
+        n_labs / 20.0,
+        topic_scores,
+        np.minimum(topic_attempts / 10.0, 1.0),
+    ])
+
+    style_block = np.where(
+        (lab_pass_rate > 0.8)[:, None], STYLE_KINESTHETIC,
+        np.where((lab_pass_rate > 0.6)[:, None], STYLE_READING, STYLE_VISUAL)
+    )
+    performance = np.column_stack([
+        n_progress,
+        avg_score / 100.0,
+        completion_rate,
+        np.ones(n_users),  # struggle_time_hours (placeholder)
+        style_block,
+    ])
+
+    learning_style = np.full((n_users, FEATURE_SIZES['learning_style']), 0.5)
+    learning_style[:, 0] = np.where(n_aars > 0, np.minimum(n_aars / 10.0, 1.0), 0.5)
+
+    skill_gap = 1.0 - topic_scores
+
+    motivation = np.column_stack([
+        recent_count / 7.0,
+        n_badges / 10.0,
+        n_projects / 3.0,
+        n_aars / 20.0,
+        total_xp / 5000.0,
+    ])
+
+    matrices = {
+        'learning_path': learning_path,
+        'performance': performance,
+        'learning_style': learning_style,
+        'skill_gap': skill_gap,
+        'motivation': motivation,
+    }
+    for key, matrix in matrices.items():
+        matrix = matrix.reshape(n_users, FEATURE_SIZES[key]).astype(dtype)
+        matrix[empty] = 0.0
+        matrices[key] = matrix
+
+    return matrices
@@ -0,0 +1,114 @@
+"""
+Materialized coaching insights
+Nightly snapshot of every active learner's insights in one Redis hash, served by direct lookup
+"""
+
+import os
+import time
+from typing import Any, Dict, Optional
+
+from cache import AsyncRedisCache, async_redis_cache
+from metrics import INSIGHT_SNAPSHOT_READS
+
+# ML_INSIGHTS_SNAPSHOT=true serves /coach/insights from the latest snapshot
+# (materialize_insights.py). Enable it once the Node server sends learning
+# events (POST /events); they record the activity that makes a user's entry stale.
+SNAPSHOT_ENABLED = os.getenv('ML_INSIGHTS_SNAPSHOT', 'false').lower() == 'true'
+# Entries older than this are never served (covers a nightly run plus slack,
+# and bounds the drift of the 7-day activity window since the snapshot)
+SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv('ML_INSIGHTS_SNAPSHOT_MAX_AGE_SECONDS', str(26 * 3600)))
+
+SNAPSHOT_KEY = "ml:insights:snapshot"
+# A run writes here and renames it over SNAPSHOT_KEY when complete
+BUILDING_KEY = "ml:insights:snapshot:building"
+# Hash of user ID -> time of their latest learning event
+ACTIVITY_KEY = "ml:insights:activity"
+# Snapshot field holding the run's metadata (user IDs are cuids, never this)
+META_FIELD = "_meta"
+
+
+class InsightSnapshotStore:
+    """Snapshot of precomputed insights per user, with per-user freshness
+
+    A run stores every user's insights as one field of a Redis hash, plus a
+    metadata field with the run's start time and model versions, and swaps
+    the finished hash in atomically. A lookup reads the user's entry, the
+    metadata and the user's last-activity time in one round trip, and only
+    serves the entry when the models are unchanged, the snapshot is younger
+    than max_age_seconds and the user has had no learning events since the
+    run started. Redis failures read as misses, like the response cache;
+    the run's writes raise them, so a failed run never replaces the snapshot.
+    """
+
+    def __init__(self, remote: AsyncRedisCache, enabled: bool = SNAPSHOT_ENABLED,
+                 max_age_seconds: int = SNAPSHOT_MAX_AGE_SECONDS):
+        self.remote = remote
+        self.enabled = enabled
+        self.max_age_seconds = max_age_seconds
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and self.remote.available
+
+    async def get(self, user_id: str, models_version: str) -> Optional[Dict[str, Any]]:
+        """user_id's materialized insights, or None if missing or stale"""
+        if not self.available:
+            return None
+
+        try:
+            async with self.remote.pipeline() as pipe:
+                pipe.hmget(SNAPSHOT_KEY, [user_id, META_FIELD])
+                pipe.hget(ACTIVITY_KEY, user_id)
+                (entry, meta), last_activity = await pipe.execute()
+        except Exception as e:
+            print(f"Insight snapshot read error: {e}")
+            return None
+
+        if entry is None or meta is None:
+            INSIGHT_SNAPSHOT_READS.inc('miss')
+            return None
+        meta = self.remote.serializer.loads(meta)
+        if (meta['models_version'] != models_version
+                or time.time() - meta['computed_at'] > self.max_age_seconds
+                or (last_activity is not None and float(last_activity) >= meta['computed_at'])):
+            INSIGHT_SNAPSHOT_READS.inc('stale')
+            return None
+        INSIGHT_SNAPSHOT_READS.inc('hit')
+        return self.remote.serializer.loads(entry)
+
+    async def record_activity(self, user_id: str, timestamp: Optional[float] = None) -> None:
+        """Note a learning event for user_id, making their current entry stale"""
+        if self.available:
+            # Older activity can only predate any snapshot still young enough to serve
+            await self.remote.hset(ACTIVITY_KEY, {user_id: timestamp or time.time()}, self.max_age_seconds)
+
+    async def begin(self) -> None:
+        """Start a run, discarding any unfinished one"""
+        async with self.remote.pipeline() as pipe:
+            pipe.delete(BUILDING_KEY)
+            await pipe.execute()
+
+    async def write(self, insights: Dict[str, Dict[str, Any]]) -> None:
+        """Add users' insights (user ID -> insights) to the run in progress"""
+        if insights:
+            dumps = self.remote.serializer.dumps
+            async with self.remote.pipeline() as pipe:
+                pipe.hset(BUILDING_KEY, mapping={user_id: dumps(value) for user_id, value in insights.items()})
+                await pipe.execute()
+
+    async def commit(self, computed_at: float, models_version: str, users: int) -> None:
+        """Replace the served snapshot with the run in progress
+
+        computed_at is when the run started loading user data: events after
+        it may be missing from the entries, so they mark a user stale.
+        """
+        meta = {'computed_at': computed_at, 'models_version': models_version, 'users': users}
+        async with self.remote.pipeline(transaction=True) as pipe:
+            pipe.hset(BUILDING_KEY, META_FIELD, self.remote.serializer.dumps(meta))
+            pipe.expire(BUILDING_KEY, self.max_age_seconds)
+            pipe.rename(BUILDING_KEY, SNAPSHOT_KEY)
+            await pipe.execute()
+
+
+# Global snapshot store on the shared async Redis connection pool
+insight_snapshots = InsightSnapshotStore(async_redis_cache)
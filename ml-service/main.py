@@ -4,14 +4,38 @@ Full ML service using trained models from the models directory
 """
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+import asyncio
+import hmac
+import io
 import os
+import time
 from pathlib import Path
 
+import numpy as np
+
+from batching import batcher_stats, get_batcher
+from cache import (
+    tiered_cache as response_cache, CachePolicy, feature_digest, model_tag, payload_digest, prediction_tag, user_tag
+)
+from events import EventProcessor, store_event
+from feature_store import aggregate_features, feature_store, recent_count, user_aggregates
+from features import (
+    AGGREGATE_COLUMNS, FEATURE_SIZES, MODEL_FEATURE_KEYS, aggregate_users, feature_matrices_from_aggregates
+)
+from metrics import INSIGHT_STAGE_SECONDS, render_metrics
+from executor import PoolSaturatedError, pool_stats, predict_batch as run_predict_batch, shutdown_pools
+from insight_snapshots import insight_snapshots
+from models.fused import get_fused_engine
+from models.registry import ModelRegistry
+from models.topics import TOPIC_SLUGS
+from training_stream import NDJSON_MEDIA_TYPE, ndjson_chunks, npy_chunks
+
 # Import database manager (optional)
 try:
     from database import db_manager
@@ -56,40 +80,82 @@ except ImportError as e:
     print(f"Motivational analyzer not available: {e}")
     MOTIVATIONAL_AVAILABLE = False
 
-# Import Redis cache (optional)
+# Import Redis client (optional; the caches fall back to their in-process tier without it)
 try:
-    from cache import redis_cache
+    import redis.asyncio
     REDIS_AVAILABLE = True
 except ImportError:
     print("Redis cache not available, running without caching")
     REDIS_AVAILABLE = False
 
+# Soft-TTL cache policies per endpoint (CACHE_<NAME>_TTL_SECONDS etc. override):
+# predictions are fresh for 15 minutes, insights for 10, and either may be
+# served up to 5 minutes stale while being refreshed in the background
+PREDICTION_CACHE_POLICY = CachePolicy.from_env('PREDICTION', ttl_seconds=900, stale_seconds=300)
+INSIGHTS_CACHE_POLICY = CachePolicy.from_env('INSIGHTS', ttl_seconds=600, stale_seconds=300)
+
+# Learning events from the Node server update the feature store, mark the
+# user's materialized insights stale and invalidate their cached results (POST /events)
+event_processor = EventProcessor(feature_store, response_cache, insight_snapshots)
+
+# ML_WARMUP=true loads every model, the fused engine and a database connection
+# in the background once the service is accepting requests
+WARMUP_ENABLED = os.getenv("ML_WARMUP", "true").lower() == "true"
+
+def _warm_up_models():
+    """Load every model and build the fused engine (blocking; runs off the event loop)"""
+    get_fused_engine(models.load_all(), MODEL_FEATURE_KEYS, FEATURE_SIZES)
+
+async def warm_up():
+    """Load models and open the first database connection without delaying startup"""
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(_warm_up_models)
+        print(f"Models warmed up in {(time.perf_counter() - start) * 1000:.0f} ms")
+        if DB_AVAILABLE:
+            # Creating the engine imports SQLAlchemy; keep that off the event loop too
+            await asyncio.to_thread(lambda: db_manager.engine)
+            await db_manager.get_user_data_async("test")
+            print("Database connection successful")
+    except Exception as e:
+        print(f"Warning: Warm-up failed, loading on first use instead: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("Application startup event triggered")
+    warmup_task = None
     try:
-        if DB_AVAILABLE:
-            # Test database connection
-            test_user = db_manager.get_user_data("test")
-            print("Database connection successful")
-        else:
+        if not DB_AVAILABLE:
             print("Running in mock mode (no database)")
 
         if REDIS_AVAILABLE:
-            # Initialize Redis connection
-            redis_cache.connect()
+            # Initialize Redis connection pool and L1 invalidation listener
+            await response_cache.connect()
             print("Redis cache initialized")
         else:
             print("Running without Redis cache")
 
+        if WARMUP_ENABLED:
+            warmup_task = asyncio.create_task(warm_up())
+
     except Exception as e:
         print(f"Warning: Service initialization issue: {e}")
         print("Continuing with limited functionality")
     yield
     # Shutdown
+    if warmup_task is not None:
+        warmup_task.cancel()
     if REDIS_AVAILABLE:
-        redis_cache.disconnect()
+        try:
+            await asyncio.wait_for(event_processor.drain(), EVENT_DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            print("Warning: shutting down with learning events still queued")
+        await event_processor.stop()
+        await response_cache.disconnect()
+    if DB_AVAILABLE:
+        await db_manager.dispose_async()
+    shutdown_pools()
 
 app = FastAPI(
     title="DevOps Roadmap ML Service",
@@ -107,31 +173,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize ML models with correct naming (hyphens to match client expectations)
-try:
-    models = {}
-    
-    if LEARNING_PATH_AVAILABLE:
-        models['learning-path-predictor'] = LearningPathPredictor()
-    if PERFORMANCE_AVAILABLE:
-        models['performance-predictor'] = PerformancePredictor()
-    if LEARNING_STYLE_AVAILABLE:
-        models['learning-style-detector'] = LearningStyleDetector()
-    if SKILL_GAP_AVAILABLE:
-        models['skill-gap-analyzer'] = SkillGapAnalyzer()
-    if MOTIVATIONAL_AVAILABLE:
-        models['motivational-analyzer'] = MotivationalAnalyzer()
-    
-    print(f"Models initialized successfully: {len(models)} models loaded")
-except Exception as e:
-    print(f"Failed to initialize models: {e}")
-    raise
+# Register ML models with correct naming (hyphens to match client expectations).
+# Each model is loaded on first use, or by the background warm-up after startup.
+MODEL_CLASSES = {}
+if LEARNING_PATH_AVAILABLE:
+    MODEL_CLASSES['learning-path-predictor'] = LearningPathPredictor
+if PERFORMANCE_AVAILABLE:
+    MODEL_CLASSES['performance-predictor'] = PerformancePredictor
+if LEARNING_STYLE_AVAILABLE:
+    MODEL_CLASSES['learning-style-detector'] = LearningStyleDetector
+if SKILL_GAP_AVAILABLE:
+    MODEL_CLASSES['skill-gap-analyzer'] = SkillGapAnalyzer
+if MOTIVATIONAL_AVAILABLE:
+    MODEL_CLASSES['motivational-analyzer'] = MotivationalAnalyzer
+
+models = ModelRegistry(MODEL_CLASSES)
+print(f"Models registered: {len(models)} models (loaded on first use)")
+
+# Model-specific explanations returned with predictions
+MODEL_EXPLANATIONS = {
+    'learning-path-predictor': 'Recommended learning path based on user performance data',
+    'performance-predictor': 'Performance prediction for completion probability',
+    'learning-style-detector': 'Detected learning style preferences (visual, kinesthetic, reading, auditory)',
+    'skill-gap-analyzer': 'Identified skill gaps and areas needing improvement',
+    'motivational-analyzer': 'Motivational analysis and engagement predictions',
+}
+
+# Binary batch payloads are NumPy .npy documents (self-describing dtype and shape)
+NPY_MEDIA_TYPE = "application/x-npy"
+MAX_BATCH_ROWS = int(os.getenv("ML_MAX_BATCH_ROWS", "100000"))
+
+# POST /events: shared secret the Node server sends as a bearer token (unset
+# accepts unauthenticated events), events per batch request, and how long
+# shutdown waits for queued events to be applied
+EVENTS_TOKEN = os.getenv("ML_EVENTS_TOKEN", "")
+MAX_EVENT_BATCH = int(os.getenv("ML_MAX_EVENT_BATCH", "1000"))
+EVENT_DRAIN_SECONDS = float(os.getenv("ML_EVENT_DRAIN_SECONDS", "5"))
 
 # Pydantic models for API
 class MLInput(BaseModel):
     features: List[float]
     metadata: Optional[Dict[str, Any]] = None
 
+class MLBatchInput(BaseModel):
+    features: List[List[float]]
+    metadata: Optional[Dict[str, Any]] = None
+
 class PredictionResponse(BaseModel):
     prediction: List[float]
     confidence: float
@@ -156,6 +243,19 @@ class CoachContext(BaseModel):
     timeSpentPerTopic: Dict[str, int]
     errorPatterns: Dict[str, int]
 
+class LearningEvent(BaseModel):
+    userId: str
+    table: str  # Prisma model: Progress, LabSession, AfterActionReview, Badge, Project or User
+    action: str = "create"  # create, update or delete
+    data: Dict[str, Any] = {}  # the record (after the change; the deleted record for deletes)
+    previous: Optional[Dict[str, Any]] = None  # the record before an update
+    # When the change was committed (defaults to when it was received, which
+    # can double-count a change committed before a concurrent feature rebuild)
+    committedAt: Optional[datetime] = None
+
+class LearningEventBatch(BaseModel):
+    events: List[LearningEvent]
+
 class MLCoachInsights(BaseModel):
     learningStyle: Dict[str, Any]
     skillGaps: List[Dict[str, Any]]
@@ -178,11 +278,23 @@ async def health():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
+        # null until a model has been loaded (on first use or by the warm-up)
         "models": {
-            name: model.is_loaded() for name, model in models.items()
-        }
+            name: models[name].is_loaded() if models.is_loaded(name) else None for name in models
+        },
+        "cache": response_cache.stats() if REDIS_AVAILABLE else None,
+        "pools": pool_stats(),
+        "batching": batcher_stats(),
+        "events": event_processor.stats() if REDIS_AVAILABLE else None,
+        "database": db_manager.pool_stats() if DB_AVAILABLE else None,
+        "insight_stages": _insight_stage_stats()
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Latency histograms and counters in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.post("/predict/{model_name}")
 async def predict(model_name: str, input_data: MLInput):
     """Run prediction on specified model"""
@@ -190,53 +302,112 @@ async def predict(model_name: str, input_data: MLInput):
         raise HTTPException(status_code=404, detail=f"Model {model_name} not found")
 
     try:
-        # Create cache key based on model and input features
-        cache_key = f"predict:{model_name}:{hash(str(input_data.features))}"
+        # Cache key from the model version and a stable digest of the input
+        # features, so replicas share entries and retraining starts a fresh keyspace
+        model = models[model_name]
+        cache_key = f"predict:{model_name}:{model.version}:{feature_digest(input_data.features)}"
+
+        # Served from cache under PREDICTION_CACHE_POLICY, indexed by model (and
+        # user, when known) for targeted invalidation. Predictions are cheap, so
+        # misses are only coalesced within this process.
+        tags = [model_tag(model_name)]
+        if input_data.metadata and input_data.metadata.get('user_id'):
+            tags.append(prediction_tag(str(input_data.metadata['user_id'])))
+        return await response_cache.get_or_compute(
+            cache_key, lambda: _compute_prediction(model_name, input_data.features),
+            PREDICTION_CACHE_POLICY, tags=tags, distributed=False
+        )
 
-        # Try to get from cache first
-        cached_result = redis_cache.get(cache_key)
-        if cached_result:
-            return cached_result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
-        model = models[model_name]
+async def _compute_prediction(model_name: str, features: List[float]) -> Dict[str, Any]:
+    """Run a single-row prediction and build the /predict response"""
+    model = models[model_name]
 
-        # Use the ML model's predict method with features array
-        prediction_result = model.predict(input_data.features)
+    # Concurrent single-row requests for the model are scored together in
+    # one vectorized micro-batch (ML_BATCH_MAX_SIZE, ML_BATCH_MAX_WAIT_MS)
+    prediction_result = await get_batcher(model_name, model).predict(features)
 
-        # Convert numpy array to list if needed
-        if hasattr(prediction_result, 'tolist'):
-            prediction_list = prediction_result.tolist()
-        else:
-            prediction_list = list(prediction_result) if isinstance(prediction_result, (list, tuple)) else [float(prediction_result)]
-
-        # Create response based on model type
-        response_data = {
-            'prediction': prediction_list,
-            'confidence': 0.8,  # Default confidence
-            'probabilities': None,
-            'explanation': f'Prediction from {model_name} model',
-            'feature_importance': None
-        }
+    # Convert numpy array to list if needed
+    if hasattr(prediction_result, 'tolist'):
+        prediction_list = prediction_result.tolist()
+    else:
+        prediction_list = list(prediction_result) if isinstance(prediction_result, (list, tuple)) else [float(prediction_result)]
 
-        # Add model-specific explanations
-        if model_name == 'learning-path-predictor':
-            response_data['explanation'] = 'Recommended learning path based on user performance data'
-        elif model_name == 'performance-predictor':
-            response_data['explanation'] = 'Performance prediction for completion probability'
-        elif model_name == 'learning-style-detector':
-            response_data['explanation'] = 'Detected learning style preferences (visual, kinesthetic, reading, auditory)'
-        elif model_name == 'skill-gap-analyzer':
-            response_data['explanation'] = 'Identified skill gaps and areas needing improvement'
-        elif model_name == 'motivational-analyzer':
-            response_data['explanation'] = 'Motivational analysis and engagement predictions'
+    # Create response based on model type
+    return {
+        'prediction': prediction_list,
+        'confidence': 0.8,  # Default confidence
+        'probabilities': None,
+        'explanation': MODEL_EXPLANATIONS.get(model_name, f'Prediction from {model_name} model'),
+        'feature_importance': None
+    }
 
-        # Cache the result for 15 minutes (predictions are relatively stable)
-        redis_cache.set(cache_key, response_data, 900)
+def _decode_npy(body: bytes) -> np.ndarray:
+    """Decode a binary .npy request body into a float matrix"""
+    try:
+        matrix = np.load(io.BytesIO(body), allow_pickle=False)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid {NPY_MEDIA_TYPE} payload: {e}")
+    if matrix.dtype.kind not in "fiu":
+        raise HTTPException(status_code=400, detail="Feature matrix must be numeric")
+    return matrix
+
+def _encode_npy(matrix: np.ndarray) -> bytes:
+    """Encode a prediction matrix as a binary .npy document"""
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(matrix, dtype=np.float32), allow_pickle=False)
+    return buffer.getvalue()
+
+@app.post("/predict/{model_name}/batch")
+async def predict_batch(model_name: str, request: Request):
+    """Run one vectorized prediction over a 2-D feature matrix
+
+    Accepts either JSON ({"features": [[...], ...]}) or a binary .npy matrix
+    sent as application/x-npy. Binary requests that also accept
+    application/x-npy get the prediction matrix back in the same format.
+    """
+    if model_name not in models:
+        raise HTTPException(status_code=404, detail=f"Model {model_name} not found")
 
-        return response_data
+    body = await request.body()
+    binary_request = request.headers.get("content-type", "").startswith(NPY_MEDIA_TYPE)
+    if binary_request:
+        X = _decode_npy(body)
+    else:
+        try:
+            batch = MLBatchInput.model_validate_json(body)
+            # Rows of different lengths do not form a matrix
+            X = np.asarray(batch.features, dtype=np.float64)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid batch payload: {e}")
+
+    if X.ndim != 2 or X.shape[0] == 0:
+        raise HTTPException(status_code=400, detail="Features must be a non-empty 2-D matrix")
+    if not np.isfinite(X).all():
+        raise HTTPException(status_code=400, detail="Features must be finite numbers")
+    if X.shape[0] > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_ROWS} rows")
 
+    try:
+        # Large batches are scored on the process pool, off the event loop
+        predictions = await run_predict_batch(models[model_name], X)
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+    if binary_request and NPY_MEDIA_TYPE in request.headers.get("accept", ""):
+        return Response(content=_encode_npy(predictions), media_type=NPY_MEDIA_TYPE)
+
+    # Plain floats only, so skip FastAPI's per-element jsonable_encoder pass
+    return JSONResponse(content={
+        'predictions': np.round(predictions.reshape(X.shape[0], -1), 6).tolist(),
+        'count': int(X.shape[0]),
+        'confidence': 0.8,  # Default confidence
+        'explanation': MODEL_EXPLANATIONS.get(model_name, f'Prediction from {model_name} model')
+    })
 
 class MLTrainingData(BaseModel):
     inputs: List[List[float]]
@@ -253,13 +424,15 @@ async def train_model(model_name: str, training_data: MLTrainingData):
         model = models[model_name]
 
         # Convert to numpy arrays
-        import numpy as np
         X = np.array(training_data.inputs)
         y = np.array(training_data.outputs)
 
         # Train the model
         model.train(X, y)
 
+        # Drop cached results produced by the previous weights
+        await response_cache.invalidate_model_cache(model_name)
+
         return {
             "message": f"Model {model_name} training completed successfully",
             "status": "success"
@@ -268,78 +441,301 @@ async def train_model(model_name: str, training_data: MLTrainingData):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
 
+@app.post("/train/{model_name}/stream")
+async def train_model_stream(model_name: str, request: Request, resume: bool = False):
+    """Train a model from a streamed dataset, one bounded chunk at a time
+
+    Accepts NDJSON (application/x-ndjson, one {"input": [...], "output": [...]}
+    example per line) or binary chunks (application/x-npy, concatenated .npy
+    documents: each inputs matrix followed by its outputs). Every chunk is
+    passed to partial_fit as it arrives, so memory is bounded by the chunk
+    size rather than the dataset. The model is trained on a new instance
+    and replaces the served one once the whole stream has been used.
+
+    By default this is a full retrain from fresh weights. With ?resume=true
+    training continues from the served model's weights and scaler (a fresh
+    start if it is untrained), e.g. to fine-tune on recent data only.
+    """
+    if model_name not in models:
+        raise HTTPException(status_code=404, detail=f"Model {model_name} not found")
+
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith(NPY_MEDIA_TYPE):
+        chunks = npy_chunks(request.stream())
+    elif content_type.startswith(NDJSON_MEDIA_TYPE):
+        chunks = ndjson_chunks(request.stream())
+    else:
+        raise HTTPException(status_code=415, detail=f"Send {NDJSON_MEDIA_TYPE} or {NPY_MEDIA_TYPE}")
+
+    # Requests keep using the current weights until training completes
+    model = MODEL_CLASSES[model_name]()
+    model.start_partial_fit(resume_from=models[model_name] if resume else None)
+    rows = n_chunks = 0
+    try:
+        async for X, y in chunks:
+            await asyncio.to_thread(model.partial_fit, X, y)
+            rows += len(X)
+            n_chunks += 1
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid training stream: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
+    if not rows:
+        raise HTTPException(status_code=400, detail="Training stream contained no rows")
+
+    await asyncio.to_thread(model.finish_partial_fit)
+    models.replace(model_name, model)
+
+    # Drop cached results produced by the previous weights
+    await response_cache.invalidate_model_cache(model_name)
+
+    return {
+        "message": f"Model {model_name} training completed successfully",
+        "status": "success",
+        "rows": rows,
+        "chunks": n_chunks,
+        "metrics": model.metrics,
+    }
+
+@app.post("/events", status_code=202)
+async def ingest_event(event: LearningEvent, request: Request):
+    """Accept one learning event from the Node server (see ingest_events)"""
+    return _ingest_events([event], request)
+
+@app.post("/events/batch", status_code=202)
+async def ingest_events(batch: LearningEventBatch, request: Request):
+    """Accept learning events (Progress, LabSession, AAR, Badge, Project and User changes)
+
+    Events are queued and applied in the background: each user's feature
+    store aggregates are updated incrementally, then only that user's cached
+    insights and predictions are invalidated. Updates should carry the old
+    record as previous; without it the user's aggregates are rebuilt.
+    """
+    if len(batch.events) > MAX_EVENT_BATCH:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_EVENT_BATCH} events")
+    return _ingest_events(batch.events, request)
+
+def _ingest_events(events: List[LearningEvent], request: Request) -> Dict[str, Any]:
+    if EVENTS_TOKEN and not hmac.compare_digest(
+            request.headers.get("authorization", "").encode(), f"Bearer {EVENTS_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid events token")
+
+    received = time.time()
+    queued = []
+    for i, event in enumerate(events):
+        committed_at = event.committedAt.timestamp() if event.committedAt else received
+        try:
+            queued.append((event.userId, store_event(event.table, event.action, event.data, event.previous,
+                                                     committed_at)))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Event {i}: {e}")
+
+    try:
+        event_processor.submit(queued)
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return {"accepted": len(queued), "users": len({user_id for user_id, _ in queued})}
+
 @app.post("/coach/insights")
 async def get_coach_insights(context: CoachContext):
     """Get comprehensive ML-enhanced coaching insights using real user data"""
     try:
-        # Create cache key based on user ID and context
-        cache_key = f"coach:insights:{context.userId}:{context.currentWeek}:{hash(str(context.dict()))}"
-
-        # Try to get from cache first
-        cached_result = redis_cache.get(cache_key)
-        if cached_result:
-            return cached_result
-
-        # Fetch real user data from database
-        user_data = db_manager.get_user_data(context.userId)
-
-        if not user_data:
-            # Return error when no database data available
-            raise HTTPException(status_code=404, detail="User data not found")
-
-        # Extract ML features from real data
-        features = db_manager.extract_ml_features(user_data)
-
-        # Get predictions from actual ML models using appropriate features
-        learning_path_result = models['learning_path_predictor'].predict(features['learning_path'])
-        performance_result = models['performance_predictor'].predict(features['performance'])
-        learning_style_result = models['learning_style_detector'].predict(features['learning_style'])
-        skill_gap_result = models['skill_gap_analyzer'].predict(features['skill_gap'])
-        motivation_result = models['motivational_analyzer'].predict(features['motivation'])
-
-        # Process learning path recommendations
-        learning_path_recommendations = models['learning_path_predictor'].get_recommended_topics(features, top_k=5)
-
-        # Process all insights using helper functions
-        skill_gaps = _process_skill_gaps(skill_gap_result)
-        learning_style_info = _determine_learning_style(user_data)
-        performance_prediction = _calculate_performance_prediction(performance_result)
-        motivation_profile = _determine_motivation_profile(user_data)
-
-        insights = {
-            'learningStyle': learning_style_info,
-            'skillGaps': skill_gaps[:5],  # Top 5 gaps
-            'optimalPath': {
-                'recommended_topics': learning_path_recommendations,
-                'reasoning': 'Based on your current progress and performance patterns'
-            },
-            'performancePrediction': performance_prediction,
-            'motivationalProfile': motivation_profile
+        # Cache key from user ID, every model version and a stable digest of the context
+        models_version = current_models_version()
+        cache_key = (f"coach:insights:{context.userId}:{context.currentWeek}:"
+                     f"{models_version}:{payload_digest(context.model_dump())}")
+
+        # Concurrent identical requests share one computation (single-flight);
+        # served under INSIGHTS_CACHE_POLICY, indexed by user and by every model used
+        tags = [user_tag(context.userId)] + [model_tag(name) for name in models]
+        return await response_cache.get_or_compute(
+            cache_key, lambda: _load_coach_insights(context, models_version), INSIGHTS_CACHE_POLICY, tags=tags
+        )
+
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        print(f"Error generating insights: {e}")
+        raise HTTPException(status_code=500, detail="Failed to generate coaching insights")
+
+
+# Per-stage timing totals of the insight pipeline, reported by /health
+INSIGHT_STAGE_TIMINGS: Dict[str, Dict[str, float]] = {}
+
+
+async def _run_stage(timings: Dict[str, float], name: str, fn, *args):
+    """Run one pipeline stage (sync or async), recording its duration in ms"""
+    start = time.perf_counter()
+    result = fn(*args)
+    if asyncio.iscoroutine(result):
+        result = await result
+    timings[name] = (time.perf_counter() - start) * 1000
+    return result
+
+def _record_stage_timings(timings: Dict[str, float]):
+    """Fold one pipeline run's stage durations into INSIGHT_STAGE_TIMINGS and /metrics"""
+    for name, elapsed_ms in timings.items():
+        INSIGHT_STAGE_SECONDS.observe(elapsed_ms / 1000, name)
+        totals = INSIGHT_STAGE_TIMINGS.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        totals['count'] += 1
+        totals['total_ms'] += elapsed_ms
+        totals['max_ms'] = max(totals['max_ms'], elapsed_ms)
+
+def _insight_stage_stats() -> Dict[str, Dict[str, float]]:
+    """Mean and max duration per insight pipeline stage"""
+    return {
+        name: {
+            'count': int(totals['count']),
+            'mean_ms': round(totals['total_ms'] / totals['count'], 3),
+            'max_ms': round(totals['max_ms'], 3),
         }
+        for name, totals in INSIGHT_STAGE_TIMINGS.items()
+    }
 
-        # Cache the result for 10 minutes
-        redis_cache.set(cache_key, insights, 600)
 
-        return insights
+def current_models_version() -> str:
+    """Digest of every model's version (materialized insights are only served for the same models)"""
+    return payload_digest({name: model.version for name, model in models.items()})
 
-    except Exception as e:
-        print(f"Error generating insights: {e}")
-        raise HTTPException(status_code=500, detail="Failed to generate coaching insights")
+
+async def _load_coach_insights(context: CoachContext, models_version: str) -> Dict[str, Any]:
+    """A user's materialized insights if still fresh, else computed live"""
+    insights = await insight_snapshots.get(context.userId, models_version)
+    if insights is not None:
+        return insights
+    return await _compute_coach_insights(context)
+
+
+def _score_profile(features: Dict[str, List[float]]) -> Dict[str, np.ndarray]:
+    """Score one user's feature blocks with every model in a single fused pass"""
+    return get_fused_engine(models, MODEL_FEATURE_KEYS, FEATURE_SIZES).predict_one(features)
+
+
+async def _load_user_aggregates(user_id: str) -> Optional[Dict[str, Any]]:
+    """A user's aggregates from the feature store, rebuilt from the database on a miss"""
+    aggregates = await feature_store.get(user_id)
+    if aggregates is not None:
+        return aggregates
+
+    # Read first: the rebuild is only stored if no event arrives while loading
+    version = await feature_store.version(user_id)
+    # Fetch real user data from database without blocking the event loop
+    # (asyncpg pool, or the I/O pool when no async driver is available)
+    user_data = await db_manager.get_user_data_async(user_id)
+    if not user_data:
+        return None
+    aggregates = user_aggregates(user_data)
+    await feature_store.put(user_id, aggregates, version)
+    return aggregates
+
+
+async def _compute_coach_insights(context: CoachContext) -> Dict[str, Any]:
+    """Compute coaching insights for a user from database data and model predictions
+
+    Stages run in order: user data, features, the fused model heads, the
+    user-data profiles, then the stages that post-process model outputs.
+    Only loading user data awaits I/O; the rest are short CPU-bound calls,
+    so they run inline on the event loop and each is timed separately.
+    Top-k topic recommendations reuse the learning path predictions instead
+    of predicting again.
+    """
+    timings: Dict[str, float] = {}
+
+    # Per-user aggregates from the feature store (one Redis round trip), or
+    # rebuilt from the user's full history in the database on a miss
+    aggregates = await _run_stage(timings, 'user_data', _load_user_aggregates, context.userId)
+
+    if not aggregates:
+        # Return error when no database data available
+        raise HTTPException(status_code=404, detail="User data not found")
+
+    # Every model's feature block from the aggregates
+    features = await _run_stage(timings, 'features', aggregate_features, aggregates)
+
+    # Every model head (one fused multiply), then the user profiles
+    outputs = await _run_stage(timings, 'models', _score_profile, features)
+    learning_style_info = await _run_stage(timings, 'learning_style_profile', _determine_learning_style, aggregates)
+    motivation_profile = await _run_stage(timings, 'motivation_profile', _determine_motivation_profile, aggregates)
+    learning_path_result = outputs['learning-path-predictor']
+    performance_result = outputs['performance-predictor']
+    skill_gap_result = outputs['skill-gap-analyzer']
+    learning_path_model = models['learning-path-predictor']
+
+    # Stages that post-process model outputs
+    learning_path_recommendations = await _run_stage(
+        timings, 'recommendations', learning_path_model.recommend_topics, learning_path_result, 5
+    )
+    skill_gaps = await _run_stage(timings, 'skill_gaps', _process_skill_gaps, skill_gap_result)
+    performance_prediction = _calculate_performance_prediction(performance_result)
+
+    _record_stage_timings(timings)
+
+    return _insights_document(learning_style_info, skill_gaps, learning_path_recommendations,
+                              performance_prediction, motivation_profile)
+
+
+def compute_insights_batch(users: Dict[str, Dict[str, Any]],
+                           now: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+    """Coaching insights for many users at once (see materialize_insights.py)
+
+    Aggregates and feature blocks are built column-wise for every user and
+    all model heads are scored in one fused pass over the whole matrix; only
+    the per-user post-processing runs row by row. Each user gets the same
+    insights as _compute_coach_insights would return.
+
+    Args:
+        users: User data (as from get_users_data) keyed by user ID
+    """
+    if not users:
+        return {}
+    user_ids = list(users)
+    now = now or datetime.now()
+    columns = aggregate_users([users[user_id] for user_id in user_ids], now)
+    # Calendar-day activity, like the live path's aggregates (see user_aggregates)
+    today = now.date().toordinal()
+    columns['recent'] = np.array([recent_count(users[user_id], today) for user_id in user_ids])
+    features = feature_matrices_from_aggregates(columns, dtype=float)
+    outputs = get_fused_engine(models, MODEL_FEATURE_KEYS, FEATURE_SIZES).predict(features)
+    learning_path_model = models['learning-path-predictor']
+
+    insights = {}
+    for i, user_id in enumerate(user_ids):
+        aggregates = {column: float(columns[column][i]) for column in AGGREGATE_COLUMNS}
+        row = {name: output[i:i + 1] for name, output in outputs.items()}
+        insights[user_id] = _insights_document(
+            _determine_learning_style(aggregates),
+            _process_skill_gaps(row['skill-gap-analyzer']),
+            learning_path_model.recommend_topics(row['learning-path-predictor'], 5),
+            _calculate_performance_prediction(row['performance-predictor']),
+            _determine_motivation_profile(aggregates),
+        )
+    return insights
+
+
+def _insights_document(learning_style_info, skill_gaps, learning_path_recommendations,
+                       performance_prediction, motivation_profile) -> Dict[str, Any]:
+    """MLCoachInsights payload from the pipeline's stage results"""
+    return {
+        'learningStyle': learning_style_info,
+        'skillGaps': skill_gaps[:5],  # Top 5 gaps
+        'optimalPath': {
+            'recommended_topics': learning_path_recommendations,
+            'reasoning': 'Based on your current progress and performance patterns'
+        },
+        'performancePrediction': performance_prediction,
+        'motivationalProfile': motivation_profile
+    }
 
 
 def _process_skill_gaps(skill_gap_result):
     """Process skill gap predictions and return formatted skill gaps list"""
     skill_gaps = []
     if hasattr(skill_gap_result, '__len__') and len(skill_gap_result) > 0:
-        # Map skill gap predictions to topics
-        topic_names = ['git_basics', 'linux_commands', 'docker_fundamentals',
-                      'kubernetes_basics', 'aws_services', 'terraform_intro',
-                      'ci_cd_jenkins', 'monitoring_prometheus']
-
-        for i, gap_score in enumerate(skill_gap_result[0][:len(topic_names)]):
+        # Map skill gap predictions to topics (untrained models return a flat default)
+        for i, gap_score in enumerate(np.atleast_2d(skill_gap_result)[0][:len(TOPIC_SLUGS)]):
             if gap_score > 0.3:  # Threshold for identifying gaps
                 skill_gaps.append({
-                    'topic': topic_names[i],
+                    'topic': TOPIC_SLUGS[i],
                     'gap_score': float(gap_score),
                     'priority': 'high' if gap_score > 0.7 else 'medium'
                 })
@@ -349,16 +745,14 @@ def _process_skill_gaps(skill_gap_result):
     return skill_gaps
 
 
-def _determine_learning_style(user_data):
+def _determine_learning_style(aggregates):
     """Determine learning style based on user behavior patterns"""
     learning_style = "visual"  # Default
     style_confidence = 0.6
 
-    if user_data.get("lab_sessions"):
+    if aggregates['labs']:
         # Analyze lab session patterns to determine learning style
-        passed_labs = sum(1 for lab in user_data["lab_sessions"] if lab["passed"])
-        total_labs = len(user_data["lab_sessions"])
-        pass_rate = passed_labs / total_labs if total_labs > 0 else 0
+        pass_rate = aggregates['labs_passed'] / aggregates['labs']
 
         if pass_rate > 0.8:
             learning_style = "hands_on"
@@ -383,7 +777,7 @@ def _determine_learning_style(user_data):
 
 def _calculate_performance_prediction(performance_result):
     """Calculate performance prediction from ML model results"""
-    performance_score = float(performance_result[0]) if hasattr(performance_result, '__len__') else float(performance_result)
+    performance_score = float(np.ravel(performance_result)[0])
     return {
         'completion_probability': min(max(performance_score, 0.0), 1.0),
         'estimated_time_to_completion': max(1, int((1 - performance_score) * 12)),  # weeks
@@ -391,19 +785,17 @@ def _calculate_performance_prediction(performance_result):
     }
 
 
-def _determine_motivation_profile(user_data):
+def _determine_motivation_profile(aggregates):
     """Determine motivation level and generate recommendations based on activity patterns"""
     motivation_level = "medium"
     study_streak = 0
 
-    if user_data.get("progress"):
-        # Calculate recent activity
-        recent_progress = [p for p in user_data["progress"]
-                         if p.get("completed_at") and
-                         (datetime.now() - p["completed_at"]).days < 7]
-        if len(recent_progress) > 3:
+    if aggregates['progress']:
+        # Lessons completed in the last 7 days
+        recent_progress = aggregates['recent']
+        if recent_progress > 3:
             motivation_level = "high"
-        elif len(recent_progress) > 1:
+        elif recent_progress > 1:
             motivation_level = "medium"
         else:
             motivation_level = "low"
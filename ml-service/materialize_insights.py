@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Insight Materialization Job
+Computes coaching insights for every recently active learner in bulk and publishes them as the
+snapshot /coach/insights serves from (ML_INSIGHTS_SNAPSHOT=true); run nightly, e.g. from cron
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from cache import async_redis_cache
+from database import db_manager
+from insight_snapshots import insight_snapshots
+from main import compute_insights_batch, current_models_version
+
+
+async def materialize(batch_size: int, active_days: int) -> int:
+    """Build and publish a snapshot of every user active in the last active_days; returns the user count"""
+    # Taken before any user data is read: events after this mark a user's entry stale
+    started = time.time()
+    now = datetime.now()
+    models_version = current_models_version()
+
+    await insight_snapshots.begin()
+    users = 0
+    batch = {}
+    for user_id, user_data in db_manager.iter_users_data(batch_size, active_since=now - timedelta(days=active_days)):
+        batch[user_id] = user_data
+        if len(batch) >= batch_size:
+            await insight_snapshots.write(compute_insights_batch(batch, now))
+            users += len(batch)
+            batch = {}
+    await insight_snapshots.write(compute_insights_batch(batch, now))
+    users += len(batch)
+
+    await insight_snapshots.commit(started, models_version, users)
+    return users
+
+
+async def run(args) -> int:
+    if db_manager.engine is None:
+        print("❌ DATABASE_URL not set or database unavailable")
+        return 1
+    await async_redis_cache.connect()
+    if not async_redis_cache.is_connected:
+        print("❌ Redis unavailable (REDIS_URL)")
+        return 1
+
+    start = time.perf_counter()
+    try:
+        users = await materialize(args.batch_size, args.active_days)
+    finally:
+        await async_redis_cache.disconnect()
+    print(f"✅ Materialized insights for {users} users in {time.perf_counter() - start:.1f} s")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=1000, help="users loaded and scored per batch")
+    parser.add_argument("--active-days", type=int, default=30,
+                        help="include users with progress or lab activity in this many days")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Service metrics
+Prometheus-style counters and latency histograms, rendered in the text exposition format by /metrics
+"""
+
+import os
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# ML_METRICS_ENABLED=false turns every observation into a no-op
+METRICS_ENABLED = os.getenv('ML_METRICS_ENABLED', 'true').lower() == 'true'
+
+# Latency buckets in seconds, 50 us to 10 s: model stages take microseconds,
+# database loads milliseconds
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+REGISTRY: List["Metric"] = []
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+
+def _braced(label_text: str) -> str:
+    return f"{{{label_text}}}" if label_text else ""
+
+
+class Metric:
+    """A named metric family with fixed label names, registered for /metrics"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        """Exposition lines for this family"""
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    """Monotonic count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        """Add amount to the series for labels (given in labelnames order)"""
+        if METRICS_ENABLED:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_braced(_label_text(self.labelnames, labels))} {value:g}")
+        return lines
+
+    def clear(self):
+        self.values.clear()
+
+
+class Histogram(Metric):
+    """Bucketed distribution per label set
+
+    Observations only bump one bucket counter and a sum (bucket counts are
+    made cumulative at render time), so recording costs about a microsecond.
+    Updates are not locked: increments racing across threads may rarely be
+    lost, which is acceptable for monitoring.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket..., count above the last bucket, sum]
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        """Record one value for labels (given in labelnames order)"""
+        if not METRICS_ENABLED:
+            return
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def time(self, *labels: str) -> "_Timer":
+        """Context manager observing the elapsed seconds of its block"""
+        return _Timer(self, labels)
+
+    def count(self, *labels: str) -> int:
+        """Number of observations recorded for labels"""
+        series = self.series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, series in self.series.items():
+            label_text = _label_text(self.labelnames, labels)
+            prefix = f"{label_text}," if label_text else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{_braced(label_text)} {series[-1]:.9g}")
+            lines.append(f"{self.name}_count{_braced(label_text)} {cumulative}")
+        return lines
+
+    def clear(self):
+        self.series.clear()
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+def render_metrics() -> str:
+    """Every registered metric in the Prometheus text exposition format"""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Database
+DB_QUERY_SECONDS = Histogram(
+    "ml_db_query_seconds", "Database query latency per table (snapshot: all tables in one query)",
+    ("backend", "table")
+)
+FEATURE_EXTRACTION_SECONDS = Histogram(
+    "ml_feature_extraction_seconds", "Feature extraction latency per user data load"
+)
+FEATURE_STORE_READS = Counter(
+    "ml_feature_store_reads_total", "Feature store lookups by result (miss: rebuilt from the database)", ("result",)
+)
+LEARNING_EVENTS = Counter(
+    "ml_learning_events_total",
+    "Learning events processed by result (failed: the user's aggregates are dropped for a rebuild)", ("result",)
+)
+EVENT_ERRORS = Counter(
+    "ml_event_errors_total", "Event processing errors per stage (apply, rebuild, invalidate, batch)", ("stage",)
+)
+INSIGHT_SNAPSHOT_READS = Counter(
+    "ml_insight_snapshot_reads_total",
+    "Insight snapshot lookups by result (miss or stale: computed live)", ("result",)
+)
+
+# Models
+MODEL_STAGE_SECONDS = Histogram(
+    "ml_model_stage_seconds",
+    "Model inference latency per stage (preprocess, scale, predict; *_batch for predict_batch)",
+    ("model", "stage")
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "ml_model_load_seconds", "Model load latency (constructing the model and mapping its artifact) on first use",
+    ("model",)
+)
+MODEL_BATCH_SIZE = Histogram(
+    "ml_model_batch_size", "Single-row /predict requests coalesced into each micro-batch", ("model",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+MODEL_BATCH_WAIT_SECONDS = Histogram(
+    "ml_model_batch_wait_seconds", "Time a /predict request waits in the micro-batch queue", ("model",)
+)
+MODEL_ERRORS = Counter("ml_model_errors_total", "Predictions that failed and returned the default", ("model",))
+
+# Cache
+CACHE_OPERATION_SECONDS = Histogram(
+    "ml_cache_operation_seconds", "Cache get/set latency per tier (l1 in-process, l2 Redis)",
+    ("tier", "operation")
+)
+CACHE_REQUESTS = Counter("ml_cache_requests_total", "Cache lookups per tier and result", ("tier", "result"))
+CACHE_SERIALIZATION_SECONDS = Histogram(
+    "ml_cache_serialization_seconds", "Cache value encode/decode latency per format",
+    ("operation", "format")
+)
+
+# /coach/insights pipeline
+INSIGHT_STAGE_SECONDS = Histogram(
+    "ml_insight_stage_seconds", "Coach insight pipeline latency per stage", ("stage",)
+)
@@ -0,0 +1,87 @@
+"""
+Memory-Mapped Model Artifacts
+Stores each model array as a .npy file beside a JSON metadata sidecar, loaded zero-copy with np.load(mmap_mode='r')
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+# Layout: <model>.json is the sidecar (metadata, array names and the
+# directory holding them); <model>.arrays/<id>/<name>.npy are the arrays of
+# one save. Each save writes a new directory and then swaps the sidecar, so
+# readers see either the old or the new artifact, never a mix.
+ARTIFACT_SUFFIX = ".json"
+ARRAYS_SUFFIX = ".arrays"
+
+
+def _arrays_root(path: Path) -> Path:
+    return path.with_suffix(ARRAYS_SUFFIX)
+
+
+def read_metadata(path: Path) -> Dict[str, Any]:
+    """Metadata of the artifact at path (its sidecar only; no arrays are read)"""
+    return json.loads(path.read_text())['metadata']
+
+
+def save_artifact(path: Path, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]) -> None:
+    """Write arrays and JSON-serializable metadata as the artifact at path (the sidecar)
+
+    Array directories older than the one being replaced are removed; the
+    replaced one stays for a reader that has just read the old sidecar, and
+    processes that mapped older arrays keep their mappings.
+    """
+    root = _arrays_root(path)
+    directory = root / uuid.uuid4().hex
+    directory.mkdir(parents=True)
+    for name, array in arrays.items():
+        np.save(directory / f"{name}.npy", np.ascontiguousarray(array))
+
+    try:
+        previous = json.loads(path.read_text())['directory']
+    except (OSError, ValueError, KeyError):
+        previous = None
+    sidecar = {'metadata': metadata, 'directory': directory.relative_to(path.parent).as_posix(),
+               'arrays': list(arrays)}
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(sidecar, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+    keep = {directory.name, previous and Path(previous).name}
+    for old in root.iterdir():
+        if old.name not in keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def load_artifact(path: Path) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Map an artifact written by save_artifact
+
+    Returns (arrays, metadata). Arrays are read-only memory maps of the .npy
+    files, so every process loading the same artifact shares its pages
+    instead of holding a private copy. Zero-dimensional arrays come back as
+    Python scalars.
+    """
+    sidecar = json.loads(path.read_text())
+    directory = path.parent / sidecar['directory']
+    arrays = {}
+    for name in sidecar['arrays']:
+        file = directory / f"{name}.npy"
+        try:
+            array = np.asarray(np.load(file, mmap_mode='r'))
+        except ValueError:
+            # Empty arrays cannot be memory-mapped
+            array = np.load(file)
+        arrays[name] = array.item() if array.ndim == 0 else array
+    return arrays, sidecar['metadata']
@@ -3,20 +3,30 @@ Base ML Model Class - Simplified version without sklearn dependencies
 """
 
 import numpy as np
-import joblib
+import hashlib
 import os
+import uuid
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from abc import ABC, abstractmethod
 
+from metrics import MODEL_ERRORS, MODEL_STAGE_SECONDS
+from .artifacts import ARTIFACT_SUFFIX, load_artifact, save_artifact
+
 
 class BaseMLModel(ABC):
     """Base class for all ML models"""
 
+    # Learned parameters saved in the model artifact (attributes that are None are skipped)
+    artifact_arrays: Tuple[str, ...] = ('weights', 'scaler_mean', 'scaler_std')
+    # Rows per gradient step in partial_fit
+    mini_batch_size = 64
+
     def __init__(self, model_name: str):
         self.model_name = model_name
         self.model = None
         self.is_trained = False
+        self.version = 'untrained'
         self.metrics = {
             'accuracy': 0.0,
             'precision': 0.0,
@@ -25,13 +35,12 @@ class BaseMLModel(ABC):
         }
         self.feature_names = []
 
-        # Create models directory if it doesn't exist
+        # Created by save_model when the first model is trained
         self.models_dir = Path(__file__).parent / "saved_models"
-        self.models_dir.mkdir(exist_ok=True)
 
-        # Try to load existing model, otherwise create new one
-        if not self.load_model():
-            self._create_model()
+        # Load the saved artifact if there is one. Untrained models keep their
+        # default (None) weights; train() creates them with _create_model.
+        self.load_model()
 
     @abstractmethod
     def _create_model(self):
@@ -73,6 +82,7 @@ class BaseMLModel(ABC):
             self._evaluate(X_test_scaled, y_test)
 
             self.is_trained = True
+            self.version = uuid.uuid4().hex[:12]
             self.save_model()
 
             return True
@@ -81,6 +91,83 @@ class BaseMLModel(ABC):
             print(f"Training failed for {self.model_name}: {e}")
             return False
 
+    def start_partial_fit(self, resume_from: Optional["BaseMLModel"] = None):
+        """Begin incremental training (see partial_fit)
+
+        Starts from fresh weights and an empty scaler, or from a copy of a
+        trained resume_from's weights and scaler. A resumed run keeps that
+        scaler fixed, since the copied weights were fit to inputs scaled by it.
+        """
+        if resume_from is not None and resume_from.is_trained:
+            for name in self.artifact_arrays:
+                value = getattr(resume_from, name, None)
+                # Copied: the served model's arrays may be read-only memory maps
+                setattr(self, name, np.array(value) if isinstance(value, np.ndarray) else value)
+            self._scaler_count = None  # Fixed scaler
+        else:
+            self._create_model()
+            self._scaler_count = 0
+        self._scaler_m2 = None
+        self._fit_rows = 0
+        self._fit_correct = 0
+        self._fit_evaluated = 0
+
+    def partial_fit(self, X: np.ndarray, y: np.ndarray):
+        """Train on one chunk of a dataset with mini-batch gradient descent
+
+        Folds the chunk into the scaler's running mean and variance, then
+        takes one gradient step per mini_batch_size rows, so memory stays
+        bounded by the chunk however large the dataset is. Each mini-batch
+        is scored before it is trained on (progressive validation), which
+        finish_partial_fit turns into the run's metrics. Rows are padded or
+        truncated to the model's feature count. Starts a fresh run if
+        start_partial_fit was not called.
+
+        Raises:
+            ValueError: X and y differ in length, or y has the wrong number of outputs
+        """
+        if getattr(self, '_fit_rows', None) is None:
+            self.start_partial_fit()
+
+        X = self._preprocess_batch(X)
+        y = np.asarray(y, dtype=np.float64)
+        if y.ndim == 1:
+            y = y.reshape(-1, 1)
+        if len(y) != len(X):
+            raise ValueError(f"{len(X)} input rows but {len(y)} output rows")
+        weights = getattr(self, 'weights', None)
+        if weights is not None and weights.ndim == 2 and y.shape[1] != weights.shape[1]:
+            raise ValueError(f"{self.model_name} expects {weights.shape[1]} outputs per row, got {y.shape[1]}")
+        if not len(X):
+            return
+
+        if self._scaler_count is not None:
+            self._update_scaler(X)
+        X_scaled = self._scale_features(X)
+        for start in range(0, len(X), self.mini_batch_size):
+            X_batch = X_scaled[start:start + self.mini_batch_size]
+            y_batch = y[start:start + self.mini_batch_size]
+            if self._fit_rows:
+                self._fit_correct += int(np.sum(self._prediction_matches(X_batch, y_batch)))
+                self._fit_evaluated += len(X_batch)
+            self._gradient_step(X_batch, y_batch)
+            self._fit_rows += len(X_batch)
+
+    def finish_partial_fit(self) -> bool:
+        """Complete an incremental run: record its metrics, version the weights and save them
+
+        Returns False (leaving the model as it was) if no rows were trained on.
+        """
+        if not getattr(self, '_fit_rows', None):
+            return False
+
+        self._set_accuracy(self._fit_correct / self._fit_evaluated if self._fit_evaluated else 0.0)
+        self.is_trained = True
+        self.version = uuid.uuid4().hex[:12]
+        self.save_model()
+        self._fit_rows = None
+        return True
+
     def predict(self, features: List[float]) -> np.ndarray:
         """Make prediction for single input"""
         if not self.is_trained:
@@ -88,21 +175,140 @@ class BaseMLModel(ABC):
 
         try:
             # Preprocess features
-            X = self._preprocess_features(features)
-            X_scaled = self._scale_features(X)
+            with MODEL_STAGE_SECONDS.time(self.model_name, 'preprocess'):
+                X = self._preprocess_features(features)
+            with MODEL_STAGE_SECONDS.time(self.model_name, 'scale'):
+                X_scaled = self._scale_features(X)
 
             # Make prediction
-            return self._predict_model(X_scaled)
+            with MODEL_STAGE_SECONDS.time(self.model_name, 'predict'):
+                return self._predict_model(X_scaled)
 
         except Exception as e:
             print(f"Prediction failed for {self.model_name}: {e}")
+            MODEL_ERRORS.inc(self.model_name)
             return np.array([0.5])
 
+    def predict_batch(self, features: np.ndarray) -> np.ndarray:
+        """Make predictions for a 2-D feature matrix in one vectorized pass
+
+        Args:
+            features: Feature matrix of shape (n_samples, n_features). Rows are
+                padded with zeros or truncated to the model's feature count.
+
+        Returns:
+            Prediction matrix with one row per input sample
+        """
+        with MODEL_STAGE_SECONDS.time(self.model_name, 'preprocess_batch'):
+            X = self._preprocess_batch(features)
+        if not self.is_trained:
+            return np.full((X.shape[0], 1), 0.5)  # Default prediction
+
+        try:
+            with MODEL_STAGE_SECONDS.time(self.model_name, 'scale_batch'):
+                X_scaled = self._scale_features(X)
+            with MODEL_STAGE_SECONDS.time(self.model_name, 'predict_batch'):
+                return self._predict_model(X_scaled)
+
+        except Exception as e:
+            print(f"Batch prediction failed for {self.model_name}: {e}")
+            MODEL_ERRORS.inc(self.model_name)
+            return np.full((X.shape[0], 1), 0.5)
+
+    def predict_rows(self, rows: List[List[float]]) -> List[np.ndarray]:
+        """Make predictions for several single inputs with one predict_batch call
+
+        Rows may differ in length; each is padded with zeros or truncated to
+        the model's feature count, as predict does. Every result has the
+        values and shape predict would return for that row.
+        """
+        n_features = len(self.feature_names)
+        X = np.zeros((len(rows), n_features))
+        for i, row in enumerate(rows):
+            row = row[:n_features]
+            X[i, :len(row)] = row
+
+        predictions = self.predict_batch(X)
+        if not self.is_trained:
+            return [np.array([0.5]) for _ in rows]  # Default prediction
+        return [self._single_prediction(prediction) for prediction in predictions]
+
+    def _single_prediction(self, prediction: np.ndarray) -> np.ndarray:
+        """Shape one predict_batch row like a predict result (one-row matrix by default)"""
+        return prediction.reshape(1, -1)
+
+    def _preprocess_batch(self, features: np.ndarray) -> np.ndarray:
+        """Coerce a feature matrix to shape (n_samples, n_features)"""
+        X = np.asarray(features, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        n_features = len(self.feature_names)
+        if X.shape[1] < n_features:
+            # Pad with zeros
+            X = np.pad(X, ((0, 0), (0, n_features - X.shape[1])))
+        elif X.shape[1] > n_features:
+            # Truncate
+            X = X[:, :n_features]
+
+        return X
+
+    def inference_head(self) -> Optional[Tuple[np.ndarray, np.ndarray, str]]:
+        """Linear head over raw features for fused inference
+
+        Returns (weights, bias, activation) such that predict_batch(X) equals
+        activation(X @ weights + bias), with the fitted scaler folded into the
+        weights and bias; None if the model cannot be expressed that way.
+        """
+        n_features = len(self.feature_names)
+        if not self.is_trained:
+            return np.zeros((n_features, 1)), np.full(1, 0.5), 'identity'  # Default prediction
+
+        head = self._inference_head()
+        if head is None:
+            return None
+
+        weights, bias, activation = head
+        weights = np.asarray(weights, dtype=np.float64).reshape(n_features, -1)
+        bias = np.broadcast_to(np.asarray(bias, dtype=np.float64), weights.shape[1]).copy()
+        if getattr(self, 'scaler_mean', None) is not None:
+            # ((x - mean) / std) @ W + b == x @ (W / std) + (b - (mean / std) @ W)
+            bias -= (self.scaler_mean / self.scaler_std) @ weights
+            weights = weights / self.scaler_std[:, None]
+        return weights, bias, activation
+
+    def _inference_head(self) -> Optional[Tuple[np.ndarray, Any, str]]:
+        """(weights, bias, activation) of _predict_model on scaled features
+
+        activation is one of 'identity', 'clip' (to [0, 1]), 'sigmoid' or
+        'softmax'. Models that cannot be expressed this way return None.
+        """
+        return None
+
     def _fit_scaler(self, X: np.ndarray):
         """Fit scaler on training data"""
         self.scaler_mean = np.mean(X, axis=0)
         self.scaler_std = np.std(X, axis=0) + 1e-8  # Add small value to avoid division by zero
 
+    def _update_scaler(self, X: np.ndarray):
+        """Fold a chunk into the scaler's running mean and variance (Chan et al. pairwise update)"""
+        n_chunk = len(X)
+        chunk_mean = np.mean(X, axis=0)
+        chunk_m2 = np.sum((X - chunk_mean) ** 2, axis=0)
+        n_seen = self._scaler_count
+        if n_seen == 0:
+            mean, m2 = chunk_mean, chunk_m2
+        else:
+            n_total = n_seen + n_chunk
+            delta = chunk_mean - self.scaler_mean
+            mean = self.scaler_mean + delta * n_chunk / n_total
+            m2 = self._scaler_m2 + chunk_m2 + delta ** 2 * n_seen * n_chunk / n_total
+
+        self._scaler_count = n_seen + n_chunk
+        self._scaler_m2 = m2
+        self.scaler_mean = mean
+        self.scaler_std = np.sqrt(m2 / self._scaler_count) + 1e-8  # Same epsilon as _fit_scaler
+
     def _scale_features(self, X: np.ndarray) -> np.ndarray:
         """Scale features using fitted scaler"""
         if not hasattr(self, 'scaler_mean'):
@@ -119,59 +325,89 @@ class BaseMLModel(ABC):
         """Make predictions with the trained model"""
         pass
 
+    @abstractmethod
+    def _gradient_step(self, X: np.ndarray, y: np.ndarray, learning_rate: float = 0.01):
+        """One gradient descent update of the weights on a batch of scaled features (used by partial_fit)"""
+        pass
+
     def _evaluate(self, X_test: np.ndarray, y_test: np.ndarray):
         """Evaluate model performance"""
         try:
-            predictions = self._predict_model(X_test)
-
-            # Simple accuracy calculation
-            if len(y_test.shape) > 1 and y_test.shape[1] > 1:
-                # Multi-class
-                pred_classes = np.argmax(predictions, axis=1)
-                true_classes = np.argmax(y_test, axis=1)
-                accuracy = np.mean(pred_classes == true_classes)
-            else:
-                # Binary
-                pred_binary = (predictions > 0.5).astype(int).flatten()
-                y_test_flat = y_test.flatten()
-                accuracy = np.mean(pred_binary == y_test_flat)
-
-            self.metrics['accuracy'] = float(accuracy)
-            self.metrics['precision'] = float(accuracy)  # Simplified
-            self.metrics['recall'] = float(accuracy)     # Simplified
-            self.metrics['f1_score'] = float(accuracy)   # Simplified
-
+            self._set_accuracy(np.mean(self._prediction_matches(X_test, y_test)))
         except Exception as e:
             print(f"Evaluation failed: {e}")
             self.metrics['accuracy'] = 0.5
 
+    def _prediction_matches(self, X: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Per-row correctness of predictions on scaled features"""
+        predictions = self._predict_model(X)
+
+        # Simple accuracy calculation
+        if len(y.shape) > 1 and y.shape[1] > 1:
+            # Multi-class
+            return np.argmax(predictions, axis=1) == np.argmax(y, axis=1)
+        # Binary
+        return (predictions > 0.5).astype(int).flatten() == y.flatten()
+
+    def _set_accuracy(self, accuracy: float):
+        self.metrics['accuracy'] = float(accuracy)
+        self.metrics['precision'] = float(accuracy)  # Simplified
+        self.metrics['recall'] = float(accuracy)     # Simplified
+        self.metrics['f1_score'] = float(accuracy)   # Simplified
+
+    @property
+    def artifact_path(self) -> Path:
+        """Metadata sidecar of the saved artifact (see models/artifacts.py)"""
+        return self.models_dir / f"{self.model_name}{ARTIFACT_SUFFIX}"
+
     def save_model(self):
-        """Save model to disk"""
+        """Save model to disk as a memory-mappable artifact (see models/artifacts.py)"""
         try:
-            model_path = self.models_dir / f"{self.model_name}.joblib"
-            model_data = {
-                'model': self.model,
-                'scaler_mean': getattr(self, 'scaler_mean', None),
-                'scaler_std': getattr(self, 'scaler_std', None),
+            self.models_dir.mkdir(exist_ok=True)
+            arrays = {
+                name: np.asarray(getattr(self, name))
+                for name in self.artifact_arrays if getattr(self, name, None) is not None
+            }
+            metadata = {
                 'is_trained': self.is_trained,
+                'version': self.version,
                 'metrics': self.metrics,
                 'feature_names': self.feature_names,
                 'model_name': self.model_name
             }
-            joblib.dump(model_data, model_path)
+            save_artifact(self.artifact_path, arrays, metadata)
         except Exception as e:
             print(f"Failed to save model {self.model_name}: {e}")
 
     def load_model(self) -> bool:
-        """Load model from disk"""
+        """Load model from disk
+
+        Arrays are mapped read-only from the artifact, so worker processes
+        share one copy of the weights. Legacy joblib artifacts still load.
+        """
         try:
+            artifact_path = self.artifact_path
+            if artifact_path.exists():
+                arrays, metadata = load_artifact(artifact_path)
+                for name, value in arrays.items():
+                    setattr(self, name, value)
+                self.is_trained = metadata.get('is_trained', False)
+                self.version = metadata['version']
+                self.metrics = metadata.get('metrics', {})
+                self.feature_names = metadata.get('feature_names', [])
+                return True
+
             model_path = self.models_dir / f"{self.model_name}.joblib"
             if model_path.exists():
+                import joblib  # only legacy artifacts need it; keeps it off the startup path
                 model_data = joblib.load(model_path)
                 self.model = model_data.get('model')
                 self.scaler_mean = model_data.get('scaler_mean')
                 self.scaler_std = model_data.get('scaler_std')
                 self.is_trained = model_data.get('is_trained', False)
+                # Artifacts saved before versioning are identified by their contents
+                self.version = model_data.get('version') or hashlib.blake2b(
+                    model_path.read_bytes(), digest_size=6).hexdigest()
                 self.metrics = model_data.get('metrics', {})
                 self.feature_names = model_data.get('feature_names', [])
                 return True
@@ -185,6 +421,7 @@ class BaseMLModel(ABC):
         return {
             'name': self.model_name,
             'is_trained': self.is_trained,
+            'version': self.version,
             'features': self.feature_names,
             'metrics': self.metrics,
             'type': self.__class__.__name__
@@ -0,0 +1,142 @@
+"""
+Fused Multi-Model Inference Engine
+Scores every model head with one matrix multiply over a block-diagonal weight matrix
+"""
+
+import numpy as np
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .base_model import BaseMLModel
+
+
+class FusedInferenceEngine:
+    """Block-structured inference over several linear/softmax model heads
+
+    Each model's scaler is folded into its weights, and the heads are laid out
+    block-diagonally in one (sum of inputs, sum of outputs) matrix. A batch is
+    packed into one input matrix, multiplied once, and the outputs are split
+    per model and activated in place. Feature columns a model would only
+    zero-pad are left out of the packed input, since they contribute nothing.
+    The batch is packed feature-major (one row per feature), so each model's
+    outputs are contiguous rows and the activations run at full memory speed.
+    Models without a fixed linear head (see BaseMLModel.inference_head) are
+    scored with their own predict_batch.
+    """
+
+    def __init__(self, models: Mapping[str, BaseMLModel], feature_keys: Mapping[str, str],
+                 feature_sizes: Optional[Mapping[str, int]] = None, dtype=np.float64):
+        self.dtype = dtype
+        self.feature_keys = dict(feature_keys)
+        self.versions = {name: model.version for name, model in models.items()}
+        # (model name, feature key, input start, input width, output start, output width, activation)
+        self.heads: List[Tuple[str, str, int, int, int, int, str]] = []
+        self.fallback: Dict[str, BaseMLModel] = {}
+
+        blocks = []
+        n_in = n_out = 0
+        for name, model in models.items():
+            head = model.inference_head()
+            if head is None:
+                self.fallback[name] = model
+                continue
+            weights, bias, activation = head
+            key = self.feature_keys[name]
+            width = min(weights.shape[0], (feature_sizes or {}).get(key, weights.shape[0]))
+            outputs = weights.shape[1]
+            self.heads.append((name, key, n_in, width, n_out, outputs, activation))
+            blocks.append((n_in, n_out, weights[:width], bias))
+            n_in += width
+            n_out += outputs
+
+        self.weights = np.zeros((n_in, n_out), dtype=dtype)
+        self.bias = np.zeros(n_out, dtype=dtype)
+        for row, col, weights, bias in blocks:
+            self.weights[row:row + weights.shape[0], col:col + weights.shape[1]] = weights
+            self.bias[col:col + weights.shape[1]] = bias
+        self._weights_t = np.ascontiguousarray(self.weights.T)
+        self._bias_t = self.bias[:, None]
+
+    def predict(self, features: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Score every model on its feature block
+
+        Args:
+            features: Feature matrices keyed like extract_feature_matrices
+                (one row per sample). Blocks are zero-padded or truncated to
+                each model's feature count, as in predict_batch.
+
+        Returns:
+            Dict mapping model name to its (n_samples, n_outputs) predictions
+        """
+        X = None
+        if self.heads:
+            n_samples = len(features[self.heads[0][1]])
+            X = np.zeros((self.weights.shape[0], n_samples), dtype=self.dtype)
+            for _, key, start, width, _, _, _ in self.heads:
+                block = np.asarray(features[key])[:, :width]
+                X[start:start + block.shape[1]] = block.T
+
+        outputs = self._score(X)
+        for name, model in self.fallback.items():
+            outputs[name] = model.predict_batch(features[self.feature_keys[name]])
+        return outputs
+
+    def predict_one(self, features: Mapping[str, Sequence[float]]) -> Dict[str, np.ndarray]:
+        """Score one sample given as feature lists (the per-request path)
+
+        Packs the lists with one array conversion; returns (1, n_outputs)
+        predictions per model like predict.
+        """
+        row: List[float] = []
+        for _, key, _, width, _, _, _ in self.heads:
+            block = list(features[key][:width])
+            row.extend(block)
+            if len(block) < width:
+                row.extend([0.0] * (width - len(block)))
+        X = np.array(row, dtype=self.dtype).reshape(-1, 1) if self.heads else None
+
+        outputs = self._score(X)
+        for name, model in self.fallback.items():
+            outputs[name] = model.predict_batch(np.asarray(features[self.feature_keys[name]]).reshape(1, -1))
+        return outputs
+
+    def _score(self, X: Optional[np.ndarray]) -> Dict[str, np.ndarray]:
+        """One matrix multiply over a packed (n_inputs, n_samples) batch, split and activated per model"""
+        if X is None:
+            return {}
+        Y = self._weights_t @ X
+        Y += self._bias_t
+
+        outputs = {}
+        for name, _, _, _, out_start, out_width, activation in self.heads:
+            head = Y[out_start:out_start + out_width]
+            _activate(head, activation)
+            outputs[name] = head.T
+        return outputs
+
+
+def _activate(Y: np.ndarray, activation: str) -> None:
+    """Apply a head activation in place to (n_outputs, n_samples) scores"""
+    if activation == 'clip':
+        np.clip(Y, 0.0, 1.0, out=Y)
+    elif activation == 'sigmoid':
+        np.negative(Y, out=Y)
+        np.exp(Y, out=Y)
+        Y += 1.0
+        np.reciprocal(Y, out=Y)
+    elif activation == 'softmax':
+        Y -= Y.max(axis=0)
+        np.exp(Y, out=Y)
+        Y /= Y.sum(axis=0)
+
+
+_engine: Optional[FusedInferenceEngine] = None
+
+
+def get_fused_engine(models: Mapping[str, BaseMLModel], feature_keys: Mapping[str, str],
+                     feature_sizes: Optional[Mapping[str, int]] = None) -> FusedInferenceEngine:
+    """Shared engine for models, rebuilt whenever a model's version changes"""
+    global _engine
+    versions = {name: model.version for name, model in models.items()}
+    if _engine is None or _engine.versions != versions:
+        _engine = FusedInferenceEngine(models, feature_keys, feature_sizes)
+    return _engine
@@ -6,35 +6,29 @@ Predicts optimal next topics based on current progress and performance
 import numpy as np
 from typing import List, Dict, Any, Optional
 from .base_model import BaseMLModel
+from .topics import TOPIC_KEYS, TOPIC_SLUGS
 
 
 class LearningPathPredictor(BaseMLModel):
     """Predicts optimal learning path based on user performance"""
 
     def __init__(self):
+        # Simple weights for prediction (learned during training, loaded from the artifact)
+        self.weights = None
         super().__init__("learning_path_predictor")
         self.feature_names = [
             'current_week', 'performance_score', 'time_spent_hours',
-            'hints_used', 'error_rate', 'git_score', 'linux_score',
-            'docker_score', 'k8s_score', 'aws_score', 'terraform_score',
-            'jenkins_score', 'monitoring_score', 'git_attempts',
-            'linux_attempts', 'docker_attempts', 'k8s_attempts',
-            'aws_attempts', 'terraform_attempts', 'jenkins_attempts',
-            'monitoring_attempts'
+            'hints_used', 'error_rate'
         ]
+        self.feature_names += [f'{key}_score' for key in TOPIC_KEYS]
+        self.feature_names += [f'{key}_attempts' for key in TOPIC_KEYS]
 
         # Topic names for predictions
-        self.topic_names = [
-            'git_basics', 'linux_commands', 'docker_fundamentals',
-            'kubernetes_basics', 'aws_services', 'terraform_intro',
-            'ci_cd_jenkins', 'monitoring_prometheus', 'advanced_docker',
-            'k8s_advanced', 'cloud_architecture', 'infrastructure_as_code',
-            'devsecops', 'microservices', 'observability'
+        self.topic_names = TOPIC_SLUGS + [
+            'advanced_docker', 'k8s_advanced', 'cloud_architecture',
+            'infrastructure_as_code', 'devsecops', 'microservices', 'observability'
         ]
 
-        # Simple weights for prediction (learned during training)
-        self.weights = None
-
     def _create_model(self):
         """Initialize the model"""
         # Simple linear model weights
@@ -79,11 +73,14 @@ class LearningPathPredictor(BaseMLModel):
             self.weights = np.random.randn(X.shape[1], y.shape[1]) * 0.1
 
         # Simple gradient descent-like update (very basic)
-        learning_rate = 0.01
         for _ in range(10):  # Few iterations
-            predictions = np.dot(X, self.weights)
-            errors = y - predictions
-            self.weights += learning_rate * np.dot(X.T, errors) / len(X)
+            self._gradient_step(X, y)
+
+    def _gradient_step(self, X: np.ndarray, y: np.ndarray, learning_rate: float = 0.01):
+        """One least-squares gradient update on a batch"""
+        predictions = np.dot(X, self.weights)
+        errors = y - predictions
+        self.weights += learning_rate * np.dot(X.T, errors) / len(X)
 
     def _predict_model(self, X: np.ndarray) -> np.ndarray:
         """Make predictions"""
@@ -99,6 +96,12 @@ class LearningPathPredictor(BaseMLModel):
 
         return predictions
 
+    def _inference_head(self):
+        """Sigmoid head; no fixed head while weights are unset (predictions are random)"""
+        if self.weights is None:
+            return None
+        return self.weights, 0.0, 'sigmoid'
+
     def generate_synthetic_data(self, n_samples: int = 1000) -> tuple:
         """
         Generate synthetic training data for learning path prediction
@@ -162,7 +165,11 @@ class LearningPathPredictor(BaseMLModel):
 
     def get_recommended_topics(self, features: List[float], top_k: int = 3) -> List[Dict[str, Any]]:
         """Get top recommended topics with scores"""
-        predictions = self.predict(features)[0]
+        return self.recommend_topics(self.predict(features), top_k)
+
+    def recommend_topics(self, predictions: np.ndarray, top_k: int = 3) -> List[Dict[str, Any]]:
+        """Top recommended topics from an existing predict() result"""
+        predictions = np.atleast_2d(predictions)[0]
 
         # Get top k recommendations
         top_indices = np.argsort(predictions)[-top_k:][::-1]
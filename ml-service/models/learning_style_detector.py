@@ -12,6 +12,8 @@ class LearningStyleDetector(BaseMLModel):
     """Detects user's learning style preferences"""
 
     def __init__(self):
+        # Simple classification weights (loaded from the artifact when saved)
+        self.weights = None
         self.learning_styles = ['visual', 'kinesthetic', 'reading', 'auditory']
         super().__init__("learning_style_detector")
         self.feature_names = [
@@ -19,9 +21,6 @@ class LearningStyleDetector(BaseMLModel):
             'error_rate', 'study_streak'
         ]
 
-        # Simple classification weights
-        self.weights = None
-
     def _create_model(self):
         """Initialize the model"""
         self.weights = np.random.randn(len(self.feature_names), len(self.learning_styles)) * 0.1
@@ -36,7 +35,7 @@ class LearningStyleDetector(BaseMLModel):
             # Truncate
             features = features[:len(self.feature_names)]
 
-        return np.array(features)
+        return np.array(features).reshape(1, -1)
 
     def _train_model(self, X: np.ndarray, y: np.ndarray):
         """
@@ -53,16 +52,19 @@ class LearningStyleDetector(BaseMLModel):
             self.weights = np.random.randn(X.shape[1], y.shape[1]) * 0.1
 
         # Simple gradient descent for multi-class
-        learning_rate = 0.01
         for _ in range(50):
-            logits = np.dot(X, self.weights)
-            # Softmax
-            exp_logits = np.exp(logits - np.max(logits, axis=1, keepdims=True))
-            probabilities = exp_logits / np.sum(exp_logits, axis=1, keepdims=True)
+            self._gradient_step(X, y)
+
+    def _gradient_step(self, X: np.ndarray, y: np.ndarray, learning_rate: float = 0.01):
+        """One softmax cross-entropy gradient update on a batch"""
+        logits = np.dot(X, self.weights)
+        # Softmax
+        exp_logits = np.exp(logits - np.max(logits, axis=1, keepdims=True))
+        probabilities = exp_logits / np.sum(exp_logits, axis=1, keepdims=True)
 
-            # Cross-entropy loss gradient
-            errors = probabilities - y
-            self.weights -= learning_rate * np.dot(X.T, errors) / len(X)
+        # Cross-entropy loss gradient
+        errors = probabilities - y
+        self.weights -= learning_rate * np.dot(X.T, errors) / len(X)
 
     def _predict_model(self, X: np.ndarray) -> np.ndarray:
         """Make predictions"""
@@ -77,6 +79,13 @@ class LearningStyleDetector(BaseMLModel):
 
         return probabilities
 
+    def _inference_head(self):
+        """Softmax head (uniform probabilities while weights are unset)"""
+        if self.weights is None:
+            n_styles = len(self.learning_styles)
+            return np.zeros((len(self.feature_names), n_styles)), 1 / n_styles, 'identity'
+        return self.weights, 0.0, 'softmax'
+
     def generate_synthetic_data(self, n_samples: int = 1000) -> tuple:
         """Generate synthetic training data for learning style detection"""
         np.random.seed(42)
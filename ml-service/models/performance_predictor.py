@@ -11,7 +11,12 @@ from .base_model import BaseMLModel
 class PerformancePredictor(BaseMLModel):
     """Predicts user performance and completion probability"""
 
+    artifact_arrays = BaseMLModel.artifact_arrays + ('bias',)
+
     def __init__(self):
+        # Simple linear regression weights (loaded from the artifact when saved)
+        self.weights = None
+        self.bias = 0.0
         super().__init__("performance_predictor")
         self.feature_names = [
             'study_streak', 'avg_score', 'completion_rate',
@@ -20,10 +25,6 @@ class PerformancePredictor(BaseMLModel):
             'learning_style_auditory'
         ]
 
-        # Simple linear regression weights
-        self.weights = None
-        self.bias = 0.0
-
     def _create_model(self):
         """Initialize the model"""
         self.weights = np.random.randn(len(self.feature_names)) * 0.1
@@ -57,12 +58,15 @@ class PerformancePredictor(BaseMLModel):
             self.bias = np.mean(y)
 
         # Simple gradient descent
-        learning_rate = 0.01
         for _ in range(50):
-            predictions = np.dot(X, self.weights) + self.bias
-            errors = y.flatten() - predictions
-            self.weights += learning_rate * np.dot(X.T, errors) / len(X)
-            self.bias += learning_rate * np.mean(errors)
+            self._gradient_step(X, y)
+
+    def _gradient_step(self, X: np.ndarray, y: np.ndarray, learning_rate: float = 0.01):
+        """One least-squares gradient update of weights and bias on a batch"""
+        predictions = np.dot(X, self.weights) + self.bias
+        errors = y.flatten() - predictions
+        self.weights += learning_rate * np.dot(X.T, errors) / len(X)
+        self.bias += learning_rate * np.mean(errors)
 
     def _predict_model(self, X: np.ndarray) -> np.ndarray:
         """Make predictions"""
@@ -76,6 +80,12 @@ class PerformancePredictor(BaseMLModel):
 
         return predictions.reshape(-1, 1)
 
+    def _inference_head(self):
+        """Clipped linear regression head"""
+        if self.weights is None:
+            return np.zeros((len(self.feature_names), 1)), 0.5, 'identity'
+        return self.weights.reshape(-1, 1), self.bias, 'clip'
+
     def generate_synthetic_data(self, n_samples: int = 1000) -> tuple:
         """Generate synthetic training data for performance prediction"""
         np.random.seed(42)
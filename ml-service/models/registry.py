@@ -0,0 +1,68 @@
+"""
+Lazy Model Registry
+Maps model names to model classes and loads each model on first use instead of at import
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterator, Mapping
+
+from metrics import MODEL_LOAD_SECONDS
+from .base_model import BaseMLModel
+
+
+class ModelRegistry(Mapping):
+    """Mapping of model name to model, loading each model when first accessed
+
+    Membership tests, len() and iterating over names never load a model, so
+    routing and 404 checks stay cheap; item access, values() and items() do.
+    Each model is constructed (and its artifact mapped) at most once, even
+    when requests and a background warm-up ask for it concurrently. Models
+    retrained on a separate instance are swapped in with replace().
+    """
+
+    def __init__(self, factories: Dict[str, Callable[[], BaseMLModel]]):
+        self._factories = dict(factories)
+        self._models: Dict[str, BaseMLModel] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> BaseMLModel:
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        factory = self._factories[name]
+        with self._lock:
+            model = self._models.get(name)
+            if model is None:
+                start = time.perf_counter()
+                model = factory()
+                MODEL_LOAD_SECONDS.observe(time.perf_counter() - start, model.model_name)
+                self._models[name] = model
+        return model
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._factories)
+
+    def __len__(self) -> int:
+        return len(self._factories)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._factories
+
+    def is_loaded(self, name: str) -> bool:
+        """Whether name has been loaded already (never triggers a load)"""
+        return name in self._models
+
+    def replace(self, name: str, model: BaseMLModel) -> None:
+        """Serve model under name from now on (requests already holding the old one finish with it)"""
+        if name not in self._factories:
+            raise KeyError(name)
+        with self._lock:
+            self._models[name] = model
+
+    def load_all(self) -> Mapping[str, BaseMLModel]:
+        """Load every model that is not loaded yet; returns the registry"""
+        for name in self._factories:
+            self[name]
+        return self
@@ -6,14 +6,17 @@ Analyzes skill gaps across different DevOps topics
 import numpy as np
 from typing import List, Dict, Any, Optional
 from .base_model import BaseMLModel
+from .topics import TOPIC_NAMES
 
 
 class SkillGapAnalyzer(BaseMLModel):
     """Analyzes skill gaps across DevOps topics"""
 
     def __init__(self):
+        # Simple regression weights (loaded from the artifact when saved)
+        self.weights = None
         # Topics to analyze
-        self.topics = ['git', 'linux', 'docker', 'kubernetes', 'aws', 'terraform', 'jenkins', 'monitoring']
+        self.topics = list(TOPIC_NAMES)
         super().__init__("skill_gap_analyzer")
 
         # Create feature names for each topic
@@ -26,9 +29,6 @@ class SkillGapAnalyzer(BaseMLModel):
                 f'{topic}_errors'
             ])
 
-        # Simple regression weights
-        self.weights = None
-
     def _create_model(self):
         """Initialize the model"""
         self.weights = np.random.randn(len(self.feature_names), len(self.topics)) * 0.1
@@ -62,11 +62,14 @@ class SkillGapAnalyzer(BaseMLModel):
             self.weights = np.random.randn(X.shape[1], y.shape[1]) * 0.1
 
         # Simple gradient descent
-        learning_rate = 0.01
         for _ in range(50):
-            predictions = np.dot(X, self.weights)
-            errors = y - predictions
-            self.weights += learning_rate * np.dot(X.T, errors) / len(X)
+            self._gradient_step(X, y)
+
+    def _gradient_step(self, X: np.ndarray, y: np.ndarray, learning_rate: float = 0.01):
+        """One least-squares gradient update on a batch"""
+        predictions = np.dot(X, self.weights)
+        errors = y - predictions
+        self.weights += learning_rate * np.dot(X.T, errors) / len(X)
 
     def _predict_model(self, X: np.ndarray) -> np.ndarray:
         """Make predictions"""
@@ -80,6 +83,16 @@ class SkillGapAnalyzer(BaseMLModel):
 
         return predictions
 
+    def _single_prediction(self, prediction: np.ndarray) -> np.ndarray:
+        """Single predictions are a flat vector of gap scores, one per topic"""
+        return prediction
+
+    def _inference_head(self):
+        """Clipped linear regression head"""
+        if self.weights is None:
+            return np.zeros((len(self.feature_names), len(self.topics))), 0.0, 'identity'
+        return self.weights, 0.0, 'clip'
+
     def generate_synthetic_data(self, n_samples: int = 1000) -> tuple:
         """Generate synthetic training data for skill gap analysis"""
         np.random.seed(42)
@@ -0,0 +1,122 @@
+"""
+DevOps Topic Vocabulary and Lesson-to-Topic Index
+Classifies lesson IDs into topic slots once so topic assignment is a dict lookup
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+# The eight core topic slots, in feature order. Each code path names them
+# differently, but slot i always refers to the same topic.
+TOPIC_KEYS = ['git', 'linux', 'docker', 'k8s', 'aws', 'terraform', 'jenkins', 'monitoring']
+TOPIC_NAMES = ['git', 'linux', 'docker', 'kubernetes', 'aws', 'terraform', 'jenkins', 'monitoring']
+TOPIC_SLUGS = [
+    'git_basics', 'linux_commands', 'docker_fundamentals', 'kubernetes_basics',
+    'aws_services', 'terraform_intro', 'ci_cd_jenkins', 'monitoring_prometheus'
+]
+
+# Keywords that assign a lesson's score to a slot; the first matching slot wins
+SCORE_KEYWORDS = [
+    ('git',), ('linux',), ('docker',), ('kubernetes', 'k8s'),
+    ('aws',), ('terraform',), ('jenkins', 'ci'), ('monitoring',)
+]
+
+CATALOG_PATH = Path(__file__).parent / "lesson_catalog.json"
+
+
+def classify_lesson(lesson_id: str) -> Tuple[int, int]:
+    """Classify a lesson ID into topic slots
+
+    Returns:
+        (score_topic, attempt_mask): the first slot whose SCORE_KEYWORDS occur
+        in the lesson ID (-1 if none), and a bitmask of every slot whose
+        TOPIC_KEYS name occurs in it (used to count attempts per topic)
+    """
+    lowered = lesson_id.lower()
+    score_topic = -1
+    for i, keywords in enumerate(SCORE_KEYWORDS):
+        if any(keyword in lowered for keyword in keywords):
+            score_topic = i
+            break
+
+    attempt_mask = 0
+    for i, key in enumerate(TOPIC_KEYS):
+        if key in lowered:
+            attempt_mask |= 1 << i
+
+    return score_topic, attempt_mask
+
+
+def pack_code(score_topic: int, attempt_mask: int) -> int:
+    """Pack a classification into one int: (score_topic + 1) | attempt_mask << 4"""
+    return (score_topic + 1) | (attempt_mask << 4)
+
+
+class _CodeTable(dict):
+    """Lesson ID -> packed code, classifying unseen IDs on first access"""
+
+    def __init__(self, max_size: int):
+        super().__init__()
+        self.max_size = max_size
+
+    def __missing__(self, lesson_id: str) -> int:
+        code = pack_code(*classify_lesson(lesson_id))
+        if len(self) < self.max_size:
+            self[lesson_id] = code
+        return code
+
+
+class LessonTopicIndex:
+    """Precompiled lesson -> topic slot index
+
+    Built once from the lesson catalogue; lesson IDs outside the catalogue are
+    classified on first use and memoized (up to max_size entries), so topic
+    assignment is an O(1) lookup on every later call.
+    """
+
+    def __init__(self, lesson_ids: Iterable[str] = (), max_size: int = 100_000):
+        self._codes = _CodeTable(max_size)
+        for lesson_id in lesson_ids:
+            self._codes[lesson_id]  # classified and stored by _CodeTable.__missing__
+
+    @classmethod
+    def from_catalog(cls, path: Path = CATALOG_PATH) -> "LessonTopicIndex":
+        """Build the index from the lesson catalogue JSON file"""
+        try:
+            with open(path) as f:
+                lesson_ids = json.load(f).get('lessons', [])
+        except (OSError, ValueError) as e:
+            print(f"Lesson catalogue not available ({e}), building topic index lazily")
+            lesson_ids = []
+        return cls(lesson_ids)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def code(self, lesson_id: str) -> int:
+        """Packed classification code for a lesson (see pack_code)"""
+        return self._codes[lesson_id]
+
+    def codes(self, lesson_ids: Iterable[str]) -> List[int]:
+        """Packed classification codes for many lessons"""
+        codes = self._codes
+        return [codes[lesson_id] for lesson_id in lesson_ids]
+
+    def lookup(self, lesson_id: str) -> Tuple[int, int]:
+        """(score_topic, attempt_mask) for a lesson, as returned by classify_lesson"""
+        code = self._codes[lesson_id]
+        return (code & 0xF) - 1, code >> 4
+
+    def topic_index(self, lesson_id: str) -> int:
+        """Topic slot a lesson's score counts towards, or -1"""
+        return (self._codes[lesson_id] & 0xF) - 1
+
+    def topic_key(self, lesson_id: str) -> Optional[str]:
+        """TOPIC_KEYS name of the lesson's topic slot, or None"""
+        slot = self.topic_index(lesson_id)
+        return TOPIC_KEYS[slot] if slot >= 0 else None
+
+
+# Shared index used by feature extraction, skill gap and learning path code
+lesson_topic_index = LessonTopicIndex.from_catalog()
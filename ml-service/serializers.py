@@ -0,0 +1,141 @@
+"""
+Cache value serializers
+Compact binary encodings for cached predictions and insights, with optional compression
+"""
+
+import json
+import os
+import zlib
+from abc import ABC, abstractmethod
+from array import array
+from typing import Any, Dict, Optional
+
+from metrics import CACHE_SERIALIZATION_SECONDS
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# Every encoded value starts with one header byte: the format id, with
+# COMPRESSED_FLAG set when the body is zlib-compressed. Header bytes are never
+# valid first bytes of JSON text, so values cached before serializers existed
+# still decode as plain JSON.
+FORMAT_JSON = 0x01
+FORMAT_MSGPACK = 0x02
+COMPRESSED_FLAG = 0x80
+
+# msgpack extension type for a list of floats packed as native-endian float64
+FLOAT_ARRAY_EXT = 1
+# Float lists shorter than this are left to msgpack's own float encoding
+FLOAT_ARRAY_MIN_LENGTH = 4
+
+# Bodies larger than this are zlib-compressed (if that makes them smaller)
+COMPRESS_MIN_BYTES = int(os.getenv('CACHE_COMPRESS_MIN_BYTES', '1024'))
+COMPRESS_LEVEL = int(os.getenv('CACHE_COMPRESS_LEVEL', '1'))
+
+
+class Serializer(ABC):
+    """Encodes JSON-compatible cache values to bytes and back"""
+
+    format_id = 0
+    name = ''
+
+    @abstractmethod
+    def encode(self, value: Any) -> bytes:
+        """Encode a value to a body without header"""
+        pass
+
+    @abstractmethod
+    def decode(self, body: bytes) -> Any:
+        """Decode a body produced by encode"""
+        pass
+
+    def dumps(self, value: Any) -> bytes:
+        """Encode a value with header byte, compressing large bodies"""
+        with CACHE_SERIALIZATION_SECONDS.time('dumps', self.name):
+            body = self.encode(value)
+            header = self.format_id
+            if COMPRESS_MIN_BYTES and len(body) >= COMPRESS_MIN_BYTES:
+                compressed = zlib.compress(body, COMPRESS_LEVEL)
+                if len(compressed) < len(body):
+                    body, header = compressed, header | COMPRESSED_FLAG
+            return bytes((header,)) + body
+
+    def loads(self, data: bytes) -> Any:
+        """Decode a value written by any registered serializer"""
+        return loads(data)
+
+
+class JSONSerializer(Serializer):
+    """Compact JSON text (readable with redis-cli)"""
+
+    format_id = FORMAT_JSON
+    name = 'json'
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(',', ':')).encode()
+
+    def decode(self, body: bytes) -> Any:
+        return json.loads(body)
+
+
+class MsgpackSerializer(Serializer):
+    """msgpack, with float lists packed as raw float64 arrays"""
+
+    format_id = FORMAT_MSGPACK
+    name = 'msgpack'
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(_pack_float_arrays(value), use_bin_type=True)
+
+    def decode(self, body: bytes) -> Any:
+        return msgpack.unpackb(body, raw=False, ext_hook=_unpack_ext, strict_map_key=False)
+
+
+def _pack_float_arrays(value: Any) -> Any:
+    """Replace float lists in a value with FLOAT_ARRAY_EXT extension objects"""
+    if isinstance(value, dict):
+        return {k: _pack_float_arrays(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if len(value) >= FLOAT_ARRAY_MIN_LENGTH and all(type(v) is float for v in value):
+            return msgpack.ExtType(FLOAT_ARRAY_EXT, array('d', value).tobytes())
+        return [_pack_float_arrays(v) for v in value]
+    return value
+
+def _unpack_ext(code: int, data: bytes) -> Any:
+    if code == FLOAT_ARRAY_EXT:
+        return array('d', data).tolist()
+    return msgpack.ExtType(code, data)
+
+
+SERIALIZERS: Dict[str, Serializer] = {'json': JSONSerializer()}
+if MSGPACK_AVAILABLE:
+    SERIALIZERS['msgpack'] = MsgpackSerializer()
+
+_BY_FORMAT = {serializer.format_id: serializer for serializer in SERIALIZERS.values()}
+
+
+def loads(data: bytes) -> Any:
+    """Decode a cached value from its header byte (legacy values are plain JSON)"""
+    header = data[0]
+    serializer = _BY_FORMAT.get(header & ~COMPRESSED_FLAG)
+    if serializer is None:
+        with CACHE_SERIALIZATION_SECONDS.time('loads', 'legacy'):
+            return json.loads(data)
+
+    with CACHE_SERIALIZATION_SECONDS.time('loads', serializer.name):
+        body = data[1:]
+        if header & COMPRESSED_FLAG:
+            body = zlib.decompress(body)
+        return serializer.decode(body)
+
+def get_serializer(name: Optional[str] = None) -> Serializer:
+    """Serializer named by name or CACHE_SERIALIZER (default msgpack, else json)"""
+    name = name or os.getenv('CACHE_SERIALIZER', 'msgpack')
+    serializer = SERIALIZERS.get(name)
+    if serializer is None:
+        print(f"Cache serializer '{name}' not available, using json")
+        serializer = SERIALIZERS['json']
+    return serializer
@@ -0,0 +1,57 @@
+"""
+Tests for micro-batching of single-row predictions
+"""
+
+import asyncio
+
+import numpy as np
+
+from batching import MicroBatcher
+from models.skill_gap_analyzer import SkillGapAnalyzer
+
+
+def _trained_skill_gap_analyzer():
+    model = SkillGapAnalyzer()
+    n_features = len(model.feature_names)
+    model.is_trained = True
+    model.weights = np.random.default_rng(0).normal(size=(n_features, len(model.topics))) * 0.1
+    model.scaler_mean = np.zeros(n_features)
+    model.scaler_std = np.ones(n_features)
+    return model
+
+def test_concurrent_rows_share_one_batch():
+    """Concurrent requests are scored in one batch and each gets predict's own result back"""
+    model = _trained_skill_gap_analyzer()
+    rows = [np.random.rand(len(model.feature_names) - k).tolist() for k in range(5)]
+
+    async def scenario():
+        batcher = MicroBatcher(model, max_batch_size=64, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.predict(list(row)) for row in rows))
+        return batcher, results
+
+    batcher, results = asyncio.run(scenario())
+    assert batcher.stats()['batches'] == 1 and batcher.stats()['rows'] == 5
+    for row, result in zip(rows, results):
+        expected = model.predict(list(row))
+        assert result.shape == expected.shape
+        np.testing.assert_allclose(result, expected)
+
+def test_full_batch_is_scored_without_waiting():
+    """A batch reaching max_batch_size is scored at once; the remainder waits for the timer"""
+    model = _trained_skill_gap_analyzer()
+    row = [0.5] * len(model.feature_names)
+
+    async def scenario():
+        batcher = MicroBatcher(model, max_batch_size=2, max_wait_ms=10_000)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(batcher.predict(row), batcher.predict(row))
+        assert loop.time() - start < 1
+        straggler = asyncio.ensure_future(batcher.predict(row))
+        await asyncio.sleep(0)
+        assert batcher.stats()['queued'] == 1
+        batcher.flush()
+        await straggler
+        return batcher.stats()
+
+    assert asyncio.run(scenario())['batches'] == 2
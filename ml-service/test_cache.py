@@ -0,0 +1,232 @@
+"""
+Tests for the Redis cache clients (run against fakeredis)
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import redis
+
+from cache import (
+    AsyncRedisCache, CachePolicy, LocalLRUCache, TieredCache, feature_digest, model_tag,
+    payload_digest, tag_key, user_tag
+)
+from serializers import COMPRESSED_FLAG, SERIALIZERS, loads
+
+
+def test_tag_invalidation_sync(sync_redis):
+    """Invalidating a tag deletes only the keys registered under it"""
+    cache = sync_redis
+    cache.set("coach:insights:u1:1", {"a": 1}, 60, tags=[user_tag("u1"), model_tag("m")])
+    cache.set("coach:insights:u2:1", {"a": 2}, 60, tags=[user_tag("u2"), model_tag("m")])
+    cache.set("untagged", {"a": 3}, 60)
+
+    cache.invalidate_user_cache("u1")
+    assert cache.get("coach:insights:u1:1") is None
+    assert cache.get("coach:insights:u2:1") == {"a": 2}
+    assert not cache.client.exists(tag_key(user_tag("u1")))
+
+    cache.invalidate_model_cache("m")
+    assert cache.get("coach:insights:u2:1") is None
+    assert cache.get("untagged") == {"a": 3}
+
+def test_tag_index_prunes_expired_keys(sync_redis, monkeypatch):
+    """Registering a key drops keys whose TTL has passed from the tag's index"""
+    cache = sync_redis
+    clock = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    for i in range(100):
+        cache.set(f"predict:m:{i}", [i], 60, tags=[model_tag("m")])
+    assert cache.client.zcard(tag_key(model_tag("m"))) == 100
+
+    clock[0] += 61
+    cache.set("predict:m:new", [0], 60, tags=[model_tag("m")])
+    assert cache.client.zrange(tag_key(model_tag("m")), 0, -1) == [b"predict:m:new"]
+
+def test_tag_invalidation_async(async_redis):
+    """The async client registers and invalidates tags the same way"""
+    async def scenario():
+        cache = async_redis
+        await cache.set_many({f"predict:m:{i}": [i] for i in range(1200)}, 60, tags=[model_tag("m")])
+        await cache.set("predict:other:1", [1], 60, tags=[model_tag("other")])
+        assert await cache.client.ttl(tag_key(model_tag("m"))) > 0
+
+        deleted = await cache.invalidate_tag(model_tag("m"))
+        assert deleted == 1200
+        assert await cache.get_many(["predict:m:0", "predict:other:1"]) == [None, [1]]
+
+    asyncio.run(scenario())
+
+def test_async_pipeline_and_hash_helpers(async_redis):
+    """pipeline() raises when disconnected (callers choose how to degrade); hset() degrades quietly"""
+    async def scenario():
+        cache = async_redis
+        await cache.hset("h", {"a": 1, "b": "x"}, ttl_seconds=60)
+        async with cache.pipeline() as pipe:
+            pipe.hgetall("h")
+            pipe.ttl("h")
+            fields, ttl = await pipe.execute()
+        assert fields == {b"a": b"1", b"b": b"x"} and 0 < ttl <= 60
+
+        cache.is_connected = False
+        await cache.hset("h", {"a": 2})
+        with pytest.raises(redis.ConnectionError):
+            async with cache.pipeline():
+                pass
+
+    asyncio.run(scenario())
+
+def test_delete_pattern_uses_scan(sync_redis):
+    """delete_pattern removes matching keys without KEYS"""
+    cache = sync_redis
+    for i in range(10):
+        cache.set(f"user:u1:{i}", i, 60)
+    cache.set("user:u2:0", 0, 60)
+    cache.delete_pattern("user:u1:*")
+    assert cache.client.keys("*") == [b"user:u2:0"]
+
+
+def test_local_lru_cache_eviction_and_expiry():
+    """L1 evicts least recently used entries and drops expired ones"""
+    cache = LocalLRUCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts b, the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    cache.set("d", 4, ttl_seconds=0)
+    assert cache.get("d") is None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['expirations']) == (2, 2, 2, 1)
+
+def test_tiered_cache_invalidation_fan_out(make_async_redis):
+    """Invalidating on one replica drops L1 copies on every replica"""
+    async def scenario():
+        replicas = [TieredCache(make_async_redis()) for _ in range(2)]
+        a, b = replicas
+        for replica in replicas:
+            replica._listener = asyncio.create_task(replica._listen_for_invalidations())
+        await asyncio.sleep(0.05)
+
+        await a.set("coach:insights:u1:1", {"a": 1}, 60, tags=[user_tag("u1")])
+        assert await b.get("coach:insights:u1:1") == {"a": 1}  # L2 hit, promoted to b's L1
+        assert await b.get("coach:insights:u1:1") == {"a": 1}
+        assert b.stats()['l1']['hits'] == 1
+
+        await a.invalidate_user_cache("u1")
+        await asyncio.sleep(0.05)
+        assert b.local.get("coach:insights:u1:1") is None
+        assert await b.get("coach:insights:u1:1") is None
+
+        for replica in replicas:
+            replica._listener.cancel()
+
+    asyncio.run(scenario())
+
+def test_single_flight_coalesces_concurrent_misses(make_async_redis):
+    """Concurrent misses for one key, on one or several replicas, compute once"""
+    async def scenario():
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"insights": len(calls)}
+
+        policy = CachePolicy(60)
+        replicas = [TieredCache(make_async_redis()) for _ in range(2)]
+        requests = [replica.get_or_compute("coach:insights:u1", compute, policy)
+                    for replica in replicas for _ in range(10)]
+        results = await asyncio.gather(*requests)
+        assert results == [{"insights": 1}] * 20
+        assert len(calls) == 1
+        assert replicas[0].stats()['single_flight']['coalesced'] == 9
+        assert not await replicas[0].remote.client.exists("lock:coach:insights:u1")
+
+        async def failing():
+            raise ValueError("no data")
+
+        with pytest.raises(ValueError):
+            await replicas[0].get_or_compute("coach:insights:u2", failing, policy)
+        assert await replicas[0].get_or_compute("coach:insights:u2", compute, policy) == {"insights": 2}
+
+    asyncio.run(scenario())
+
+def test_stale_while_revalidate(make_async_redis):
+    """Stale entries are served immediately and refreshed in the background"""
+    async def scenario():
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return len(calls)
+
+        cache = TieredCache(make_async_redis())
+        policy = CachePolicy(ttl_seconds=0.05, stale_seconds=60, beta=0, jitter=0)
+        assert await cache.get_or_compute("k", compute, policy) == 1
+        assert await cache.get_or_compute("k", compute, policy) == 1  # fresh
+        await asyncio.sleep(0.06)
+        assert await cache.get_or_compute("k", compute, policy) == 1  # stale, refresh scheduled
+        await asyncio.sleep(0.01)
+        assert await cache.get_or_compute("k", compute, policy) == 2
+        assert cache.stats()['refresh']['stale_served'] == 1
+        assert await cache.remote.client.ttl("k") == policy.hard_ttl
+
+    asyncio.run(scenario())
+
+def test_cache_policy_jitter_and_early_refresh():
+    """Soft TTLs are jittered and XFetch refreshes only near expiry"""
+    policy = CachePolicy(ttl_seconds=100, jitter=0.2, beta=1.0)
+    now = time.time()
+    expiries = [policy.wrap(None, 1.0)['f'] - now for _ in range(200)]
+    assert all(79.9 <= e <= 100.1 for e in expiries) and max(expiries) - min(expiries) > 5
+    assert not any(policy.refresh_early(now, now + 100, delta=0.1) for _ in range(1000))
+    assert all(policy.refresh_early(now, now, delta=0.1) for _ in range(1000))
+
+def test_tiered_cache_degrades_without_redis():
+    """With Redis down the tiered cache keeps serving from L1"""
+    async def scenario():
+        cache = TieredCache(AsyncRedisCache())
+        await cache.set("k", [1], 60)
+        assert await cache.get("k") == [1]
+        await cache.delete("k")
+        assert await cache.get("k") is None
+        assert cache.stats()['l2']['connected'] is False
+
+    asyncio.run(scenario())
+
+def test_cache_key_digests_are_stable():
+    """Digests ignore float noise and key order and match across processes"""
+    features = [0.1 + 0.2, 1.0, -0.0, 3]
+    assert feature_digest(features) == feature_digest([0.3, 1, 0.0, 3.0])
+    assert feature_digest(features) != feature_digest([0.3, 1.0, 0.0])
+    assert payload_digest({"a": 1, "b": [1, 2]}) == payload_digest({"b": [1, 2], "a": 1})
+
+    script = "from cache import feature_digest; print(feature_digest([0.3, 1, 0, 3]))"
+    other_process = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONHASHSEED": "12345"}, cwd=Path(__file__).parent
+    )
+    assert other_process.stdout.strip().splitlines()[-1] == feature_digest(features)
+
+def test_serializers_round_trip():
+    """Every serializer round-trips cache payloads; legacy JSON values still decode"""
+    prediction = {"prediction": [[0.1 * i for i in range(15)]], "confidence": 0.8,
+                  "probabilities": None, "explanation": "path", "counts": [1, 2, 3, 4]}
+    insights = {"skillGaps": [{"skill": f"topic_{i}", "gap": i / 7} for i in range(200)]}
+
+    for serializer in SERIALIZERS.values():
+        assert loads(serializer.dumps(prediction)) == prediction
+        blob = serializer.dumps(insights)
+        assert blob[0] & COMPRESSED_FLAG
+        assert loads(blob) == insights
+
+    assert loads(b'{"prediction": [0.5]}') == {"prediction": [0.5]}
@@ -0,0 +1,33 @@
+"""
+Tests for the database layer that do not need a live database
+"""
+
+import asyncio
+
+from database import DatabaseManager, async_database_url
+
+
+def test_async_database_url():
+    """PostgreSQL URLs switch to asyncpg with libpq's sslmode renamed; others get no async engine"""
+    url = async_database_url("postgresql://ml:secret@db:5432/roadmap?sslmode=require")
+    assert url.drivername == "postgresql+asyncpg"
+    assert url.database == "roadmap" and url.password == "secret"
+    assert dict(url.query) == {"ssl": "require"}
+
+    assert async_database_url("postgresql+psycopg2://ml@db/roadmap").drivername == "postgresql+asyncpg"
+    assert async_database_url("sqlite:///dev.db") is None
+
+def test_get_user_data_async_falls_back_to_blocking_loader():
+    """Without an async engine the blocking loader runs on the I/O pool with the same arguments"""
+    db = DatabaseManager()
+    calls = []
+
+    def get_user_data(user_id, mode=None):
+        calls.append((user_id, mode))
+        return {"user_id": user_id}
+
+    db.get_user_data = get_user_data
+    db.async_enabled = False
+
+    assert asyncio.run(db.get_user_data_async("user-1", "sequential")) == {"user_id": "user-1"}
+    assert calls == [("user-1", "sequential")]
@@ -0,0 +1,133 @@
+"""
+Tests for learning event ingestion
+"""
+
+import asyncio
+
+import pytest
+
+from cache import TieredCache, user_tag
+from events import EventProcessor, store_event
+from feature_store import FeatureStore, user_aggregates
+from metrics import EVENT_ERRORS
+
+
+def test_store_event_translation():
+    """Prisma changes map to store events; unappliable updates ask for a rebuild"""
+    event = store_event("Progress", "update", {"lessonId": "git-1", "completed": True, "score": 80},
+                        previous={"lessonId": "git-1", "completed": False, "score": None})
+    assert event == {"type": "progress", "data": {"lesson_id": "git-1", "completed": True, "score": 80},
+                     "previous": {"lesson_id": "git-1", "completed": False, "score": None}}
+    assert store_event("Badge", "update", {"badgeType": "streak"}) is None
+    assert store_event("LabSession", "update", {"passed": True}) == {"type": "lab_session", "rebuild": True}
+    assert store_event("User", "update", {"totalXP": 50}) == {"type": "user", "data": {"total_xp": 50}}
+    with pytest.raises(ValueError):
+        store_event("Session", "create", {})
+
+@pytest.mark.parametrize("data, previous", [
+    ({"lessonId": "git-1"}, {"completed": False}),
+    ({"lessonId": "git-1", "score": "high"}, None),
+    ({"lessonId": "git-1", "completedAt": "yesterday"}, None),
+])
+def test_store_event_rejects_records_the_store_cannot_apply(data, previous):
+    """Malformed records fail the request (400) instead of the background worker"""
+    with pytest.raises(ValueError):
+        store_event("Progress", "update" if previous else "create", data, previous)
+
+def test_events_update_store_then_invalidate_only_that_user(async_redis):
+    """Events reach the feature store and drop the user's cached entries, leaving other users' intact"""
+    cache = TieredCache(async_redis)
+    store = FeatureStore(async_redis, enabled=True)
+    processor = EventProcessor(store, cache)
+    user = {"current_week": 1, "total_xp": 0, "progress": [], "lab_sessions": []}
+
+    async def scenario():
+        await store.put("user-1", user_aggregates(user), 0)
+        for user_id in ("user-1", "user-2"):
+            await cache.set(f"coach:insights:{user_id}", {"cached": True}, 3600, tags=[user_tag(user_id)])
+
+        processor.submit([
+            ("user-1", store_event("LabSession", "create", {"exerciseId": "lab-1", "passed": True})),
+            ("user-1", store_event("User", "update", {"totalXP": 250})),
+        ])
+        await processor.drain()
+        await processor.stop()
+        return (await store.get("user-1"), await cache.get("coach:insights:user-1"),
+                await cache.get("coach:insights:user-2"))
+
+    aggregates, invalidated, kept = asyncio.run(scenario())
+    assert aggregates['labs'] == 1 and aggregates['labs_passed'] == 1 and aggregates['total_xp'] == 250
+    assert invalidated is None and kept == {"cached": True}
+    assert processor.stats()['applied'] == 2
+
+def test_bad_event_does_not_block_the_rest_of_its_batch(async_redis):
+    """A user whose events fail is rebuilt and invalidated; later users in the batch are still applied"""
+    cache = TieredCache(async_redis)
+    store = FeatureStore(async_redis, enabled=True)
+    processor = EventProcessor(store, cache)
+    user = {"current_week": 1, "total_xp": 0, "progress": [], "lab_sessions": []}
+    # Bypasses store_event's validation, like an event queued by an older release
+    bad = {"type": "progress", "data": {"lesson_id": "git-1", "completed": True},
+           "previous": {"completed": False}}
+    good = store_event("LabSession", "create", {"exerciseId": "lab-1", "passed": True})
+
+    async def scenario():
+        for user_id in ("user-1", "user-2"):
+            await store.put(user_id, user_aggregates(user), 0)
+            await cache.set(f"coach:insights:{user_id}", {"cached": True}, 3600, tags=[user_tag(user_id)])
+        await processor.process([("user-1", bad), ("user-2", good)])
+        return ([await store.get(user_id) for user_id in ("user-1", "user-2")],
+                [await cache.get(f"coach:insights:{user_id}") for user_id in ("user-1", "user-2")])
+
+    (rebuilt, applied), cached = asyncio.run(scenario())
+    assert rebuilt is None and applied['labs'] == 1
+    assert cached == [None, None]
+    assert processor.stats()['failed'] == 1 and processor.stats()['applied'] == 1
+
+def test_redis_errors_while_recovering_one_user_do_not_stop_the_batch(async_redis):
+    """A failing rebuild or invalidation is counted per user; later users are still applied and invalidated"""
+    class FlakyStore(FeatureStore):
+        async def apply_events(self, user_id, events):
+            if user_id == "user-1":
+                raise ConnectionError("redis down")
+            await super().apply_events(user_id, events)
+
+        async def delete(self, user_id):
+            raise ConnectionError("redis down")
+
+    class FlakyCache(TieredCache):
+        async def invalidate_user_cache(self, user_id):
+            if user_id == "user-1":
+                raise ConnectionError("redis down")
+            await super().invalidate_user_cache(user_id)
+
+    cache = FlakyCache(async_redis)
+    store = FlakyStore(async_redis, enabled=True)
+    processor = EventProcessor(store, cache)
+    user = {"current_week": 1, "total_xp": 0, "progress": [], "lab_sessions": []}
+    event = store_event("LabSession", "create", {"exerciseId": "lab-1", "passed": True})
+    errors = {stage: EVENT_ERRORS.values.get((stage,), 0) for stage in ("apply", "rebuild", "invalidate", "batch")}
+
+    async def scenario():
+        for user_id in ("user-1", "user-2"):
+            await store.put(user_id, user_aggregates(user), 0)
+            await cache.set(f"coach:insights:{user_id}", {"cached": True}, 3600, tags=[user_tag(user_id)])
+        processor.submit([("user-1", event), ("user-1", event), ("user-2", event)])
+        await processor.drain()
+        await processor.stop()
+        return await store.get("user-2"), await cache.get("coach:insights:user-2")
+
+    applied, invalidated = asyncio.run(scenario())
+    assert applied['labs'] == 1 and invalidated is None
+    assert processor.stats()['failed'] == 2 and processor.stats()['applied'] == 1
+    assert {stage: EVENT_ERRORS.values.get((stage,), 0) - count for stage, count in errors.items()} == {
+        "apply": 1, "rebuild": 1, "invalidate": 1, "batch": 0}
+
+def test_events_endpoint_rejects_unknown_tables():
+    """Invalid events are rejected before anything is queued"""
+    from fastapi.testclient import TestClient
+    from main import app
+
+    response = TestClient(app).post("/events", json={"userId": "user-1", "table": "Session", "data": {}})
+    assert response.status_code == 400
+    assert "Unknown event model" in response.json()["detail"]
@@ -0,0 +1,121 @@
+"""
+Tests for the blocking-work execution pools
+"""
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import executor
+from executor import (
+    BoundedPool, ModelVersionMismatchError, PoolSaturatedError, _process_pool, _thread_pool, predict_batch_in_worker
+)
+from models.performance_predictor import PerformancePredictor
+
+
+def test_io_pool_runs_off_the_event_loop():
+    """Blocking calls run on pool threads while the loop keeps ticking"""
+    async def scenario():
+        pool = BoundedPool("io", _thread_pool, max_workers=4, max_queue=0)
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        results = await asyncio.gather(
+            *(pool.run(lambda: (time.sleep(0.05), threading.current_thread().name)[1]) for _ in range(4)),
+            ticker()
+        )
+        pool.shutdown()
+        assert all(name.startswith("ml-io") for name in results[:4])
+        assert len(ticks) == 5 and ticks[-1] - ticks[0] < 0.2
+
+    asyncio.run(scenario())
+
+def test_pool_rejects_work_beyond_queue_limit():
+    """Work beyond workers + queue is rejected instead of queueing without bound"""
+    async def scenario():
+        pool = BoundedPool("io", _thread_pool, max_workers=1, max_queue=1)
+        running = [asyncio.ensure_future(pool.run(time.sleep, 0.05)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(time.sleep, 0)
+        await asyncio.gather(*running)
+        pool.shutdown()
+        assert pool.stats()['rejected'] == 1 and pool.stats()['completed'] == 2
+
+    asyncio.run(scenario())
+
+def test_cancelled_requests_hold_their_slot_until_work_finishes():
+    """Cancelling the awaiting request frees nothing while its task still runs; failures count apart"""
+    def fail():
+        raise ValueError("boom")
+
+    async def scenario():
+        pool = BoundedPool("io", _thread_pool, max_workers=1, max_queue=0)
+        started = threading.Event()
+        release = threading.Event()
+        request = asyncio.ensure_future(pool.run(lambda: (started.set(), release.wait(1))))
+        await asyncio.to_thread(started.wait, 1)
+        request.cancel()
+        await asyncio.sleep(0)
+        assert pool.pending == 1
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(time.sleep, 0)
+
+        release.set()
+        while pool.pending:
+            await asyncio.sleep(0.01)
+        with pytest.raises(ValueError):
+            await pool.run(fail)
+        pool.shutdown()
+        return pool.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats['pending'], stats['completed'], stats['failed'], stats['rejected']) == (0, 1, 1, 1)
+
+def test_process_pool_batch_prediction():
+    """Batches scored in a worker process match in-process batch predictions"""
+    model = PerformancePredictor()
+    X = np.random.rand(50, len(model.feature_names))
+
+    async def scenario():
+        pool = BoundedPool("cpu", _process_pool, max_workers=1, max_queue=0)
+        try:
+            return await pool.run(predict_batch_in_worker, PerformancePredictor.__module__,
+                                  "PerformancePredictor", model.version, X)
+        finally:
+            pool.shutdown()
+
+    np.testing.assert_allclose(asyncio.run(scenario()), model.predict_batch(X))
+
+def test_worker_rejects_other_model_versions_without_reloading(tmp_path, monkeypatch):
+    """A worker serves only the caller's version, reloading once the artifact has it"""
+    loads = []
+    original_load = PerformancePredictor.load_model
+
+    def load_model(self):
+        self.models_dir = tmp_path
+        loads.append(1)
+        return original_load(self)
+
+    monkeypatch.setattr(PerformancePredictor, "load_model", load_model)
+    monkeypatch.setattr(executor, "_worker_models", {})
+    X = np.random.rand(5, 8)
+    module = PerformancePredictor.__module__
+
+    predict_batch_in_worker(module, "PerformancePredictor", "untrained", X)
+    for _ in range(3):
+        with pytest.raises(ModelVersionMismatchError):
+            predict_batch_in_worker(module, "PerformancePredictor", "v2", X)
+    assert len(loads) == 1
+
+    trained = PerformancePredictor()
+    trained.train(np.random.rand(100, 8), np.random.rand(100))
+    predict_batch_in_worker(module, "PerformancePredictor", trained.version, X)
+    assert len(loads) == 3  # the trained instance, then the worker's reload
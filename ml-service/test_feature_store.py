@@ -0,0 +1,123 @@
+"""
+Tests for the incremental feature store (run against fakeredis)
+"""
+
+import asyncio
+import copy
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import db_manager
+from feature_store import FeatureStore, aggregate_features, recent_count, user_aggregates
+
+NOW = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+TODAY = NOW.date().toordinal()
+
+
+@pytest.fixture
+def store(async_redis):
+    return FeatureStore(async_redis, enabled=True)
+
+def learner():
+    return {
+        "user_id": "user-1",
+        "current_week": 3,
+        "total_xp": 1200,
+        "progress": [
+            {"week_id": 1, "lesson_id": "week1-lesson1-linux-basics", "completed": True, "score": 70,
+             "completed_at": NOW - timedelta(days=1)},
+            {"week_id": 2, "lesson_id": "week2-lesson1-git-basics", "completed": True, "score": 85,
+             "completed_at": NOW - timedelta(days=12)},
+            {"week_id": 2, "lesson_id": "week2-lesson2-git-branching", "completed": False, "score": None,
+             "completed_at": None},
+        ],
+        "lab_sessions": [{"exercise_id": "lab-1", "passed": True, "submitted_at": NOW}],
+        "aars": [{"lesson_id": "git-1"}],
+        "badges": [],
+        "projects": [],
+    }
+
+def test_stored_aggregates_reproduce_extracted_features(store):
+    """Aggregates read back from Redis give the same features as extraction from full history"""
+    user = learner()
+
+    async def scenario():
+        assert await store.get("user-1") is None
+        await store.put("user-1", user_aggregates(user, NOW), 0)
+        return await store.get("user-1", TODAY)
+
+    stored = asyncio.run(scenario())
+    assert stored['recent'] == 1.0
+    assert aggregate_features(stored) == db_manager.extract_ml_features(user)
+
+def test_events_update_aggregates_incrementally(store):
+    """Create, update and user events leave the store matching a rebuild from the new history"""
+    user = learner()
+    updated = copy.deepcopy(user)
+    new_lesson = {"week_id": 3, "lesson_id": "week3-lesson1-docker-basics", "completed": True, "score": 90,
+                  "completed_at": NOW.isoformat()}
+    finished = {**user["progress"][2], "completed": True, "score": 95, "completed_at": NOW}
+    updated["progress"] = user["progress"][:2] + [finished, {**new_lesson, "completed_at": NOW}]
+    updated["lab_sessions"].append({"exercise_id": "lab-2", "passed": False, "submitted_at": NOW})
+    updated["total_xp"] = 1500
+    events = [
+        {"type": "progress", "data": new_lesson},
+        {"type": "progress", "data": finished, "previous": user["progress"][2]},
+        {"type": "lab_session", "data": {"exercise_id": "lab-2", "passed": False}},
+        {"type": "user", "data": {"total_xp": 1500}},
+    ]
+
+    async def scenario():
+        await store.put("user-1", user_aggregates(user, NOW), 0)
+        await store.apply_events("user-1", events)
+        return await store.get("user-1")
+
+    stored = asyncio.run(scenario())
+    assert stored['recent'] == 3.0
+    assert aggregate_features(stored) == db_manager.extract_ml_features(updated)
+
+def test_recent_counts_calendar_days_on_hits_and_misses(store):
+    """A rebuild and a read of the stored hash agree on 'recent' at the edge of the window"""
+    user = learner()
+    # Inside the rolling 7x24h window, but on the first calendar day outside it
+    user["progress"][1]["completed_at"] = NOW - timedelta(days=7) + timedelta(hours=1)
+
+    async def scenario():
+        rebuilt = user_aggregates(user, NOW)
+        await store.put("user-1", rebuilt, 0)
+        return rebuilt, await store.get("user-1", TODAY)
+
+    rebuilt, stored = asyncio.run(scenario())
+    assert rebuilt['recent'] == stored['recent'] == recent_count(user, TODAY) == 1.0
+
+def test_rebuilds_interleaved_with_events_never_drift(store):
+    """An event landing during a rebuild discards it; one already in the rebuilt history drops the hash"""
+    user = learner()
+    lesson = {"week_id": 3, "lesson_id": "week3-lesson1-docker-basics", "completed": True, "score": 90,
+              "completed_at": NOW.isoformat()}
+
+    async def scenario():
+        # Applied after the rebuild read the database: storing the rebuild would erase it
+        version = await store.version("user-1")
+        await store.apply_events("user-1", [{"type": "progress", "data": lesson, "committed_at": time.time()}])
+        discarded = await store.put("user-1", user_aggregates(user, NOW), version)
+        after_race = await store.get("user-1")
+
+        # Committed before the rebuild loaded the history, applied after it was stored
+        committed = time.time()
+        with_lesson = {**user, "progress": user["progress"] + [{**lesson, "completed_at": NOW}]}
+        stored = await store.put("user-1", user_aggregates(with_lesson, NOW), await store.version("user-1"))
+        await store.apply_events("user-1", [{"type": "progress", "data": lesson, "committed_at": committed}])
+        after_late_event = await store.get("user-1")
+
+        # Committed after the rebuild: applied incrementally
+        await store.put("user-1", user_aggregates(user, NOW), await store.version("user-1"))
+        await store.apply_events("user-1", [{"type": "progress", "data": lesson, "committed_at": time.time() + 1}])
+        return discarded, after_race, stored, after_late_event, await store.get("user-1", TODAY)
+
+    discarded, after_race, stored, after_late_event, current = asyncio.run(scenario())
+    assert discarded is False and after_race is None
+    assert stored is True and after_late_event is None
+    assert current['progress'] == 4.0 and current['completed'] == 3.0
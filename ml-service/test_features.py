@@ -0,0 +1,100 @@
+"""
+Tests for the columnar feature engine
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from features import FEATURE_SIZES, MODEL_FEATURE_KEYS, extract_feature_matrices
+from database import db_manager
+from models.fused import FusedInferenceEngine
+from reference_features import legacy_extract_ml_features, synthetic_users
+
+
+def test_matrices_match_per_user_extraction():
+    """Columnar output matches the legacy per-user loop exactly"""
+    users = synthetic_users(200) + [{}]
+    matrices = extract_feature_matrices(users)
+
+    for key, matrix in matrices.items():
+        assert matrix.shape == (len(users), FEATURE_SIZES[key])
+        assert matrix.dtype == np.float32
+        for i, user in enumerate(users):
+            expected = np.zeros(FEATURE_SIZES[key], dtype=np.float32)
+            row = legacy_extract_ml_features(user)[key]
+            expected[:len(row)] = row
+            assert np.array_equal(matrix[i], expected), (key, i)
+
+def test_extract_ml_features_wrapper():
+    """DatabaseManager.extract_ml_features keeps its dict-of-lists shape"""
+    user = synthetic_users(1)[0]
+    features = db_manager.extract_ml_features(user)
+    legacy = legacy_extract_ml_features(user)
+    assert set(features) == set(FEATURE_SIZES)
+    for key in features:
+        assert features[key] == legacy[key]
+
+def test_recent_activity_with_timezone_aware_timestamps():
+    """Aware timestamps are compared as wall time, like the per-user loop"""
+    now = datetime.now()
+    user = {
+        "current_week": 2,
+        "total_xp": 100,
+        "progress": [
+            {"lesson_id": "git-1", "completed": True, "score": 90,
+             "completed_at": (now - timedelta(days=1)).replace(tzinfo=timezone.utc)},
+            {"lesson_id": "linux-1", "completed": True, "score": 70,
+             "completed_at": now - timedelta(days=10)},
+        ],
+    }
+    motivation = extract_feature_matrices([user], now=now)['motivation'][0]
+    assert motivation[0] == np.float32(1 / 7.0)
+
+def test_lesson_topic_index():
+    """Catalogue lessons are precompiled and unseen lessons are memoized"""
+    from models.topics import LessonTopicIndex, classify_lesson, lesson_topic_index
+
+    assert len(lesson_topic_index) > 0
+    assert lesson_topic_index.topic_key("week2-lesson1-git-basics") == "git"
+    assert lesson_topic_index.topic_key("week7-lesson2-kubernetes-basics") == "k8s"
+    assert lesson_topic_index.topic_key("week12-lesson2-devops-career") is None
+
+    index = LessonTopicIndex(max_size=1)
+    assert index.lookup("CI-k8s-Jenkins") == classify_lesson("CI-k8s-Jenkins")
+    assert len(index) == 1
+    index.lookup("docker-lab")  # classified but not stored past max_size
+    assert len(index) == 1
+
+def test_fused_engine_matches_per_model_predictions():
+    """One fused multiply reproduces every model's predict_batch"""
+    from main import models
+
+    rng = np.random.default_rng(0)
+    trained = {}
+    for name, model in models.items():
+        model = type(model)()
+        n_features = len(model.feature_names)
+        n_outputs = model._predict_model(np.zeros((1, n_features))).shape[1]  # untrained default shape
+        model.is_trained = True
+        model.weights = rng.normal(size=(n_features, n_outputs))
+        if name == 'performance-predictor':
+            model.weights = model.weights[:, 0]  # regression weight vector
+        model.bias = 0.3
+        model.scaler_mean = rng.normal(size=n_features)
+        model.scaler_std = rng.uniform(0.5, 2.0, size=n_features)
+        trained[name] = model
+    trained['untrained-detector'] = type(models['learning-style-detector'])()
+    trained['untrained-detector'].is_trained = False
+
+    feature_keys = dict(MODEL_FEATURE_KEYS, **{'untrained-detector': 'learning_style'})
+    matrices = extract_feature_matrices(synthetic_users(300), dtype=np.float64)
+    engine = FusedInferenceEngine(trained, feature_keys, FEATURE_SIZES)
+    outputs = engine.predict(matrices)
+    single = engine.predict_one({key: matrix[0].tolist() for key, matrix in matrices.items()})
+
+    assert set(outputs) == set(trained)
+    for name, model in trained.items():
+        expected = model.predict_batch(matrices[feature_keys[name]])
+        np.testing.assert_allclose(outputs[name], expected, rtol=1e-9, atol=1e-12, err_msg=name)
+        np.testing.assert_allclose(single[name], expected[:1], rtol=1e-9, atol=1e-12, err_msg=name)
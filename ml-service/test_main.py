@@ -2,8 +2,9 @@
 Basic tests for ML Service
 """
 
+import numpy as np
 import pytest
-from main import app
+from main import app, models
 from fastapi.testclient import TestClient
 
 client = TestClient(app)
@@ -18,6 +19,15 @@ def test_health_endpoint():
     # Check that learning-path-predictor is loaded
     assert "learning-path-predictor" in data["models"]
 
+def test_metrics_endpoint():
+    """Model stage histograms appear in /metrics after a batch prediction"""
+    client.post("/predict/performance-predictor/batch", json={"features": [[0.5] * 8] * 3})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert '# TYPE ml_model_stage_seconds histogram' in response.text
+    assert 'ml_model_stage_seconds_count{model="performance_predictor",stage="preprocess_batch"}' in response.text
+
 def test_root_endpoint():
     """Test the root endpoint"""
     response = client.get("/")
@@ -131,4 +141,55 @@ def test_motivational_analyzer_api():
 
     assert "prediction" in data
     assert "confidence" in data
-    assert "explanation" in data
\ No newline at end of file
+    assert "explanation" in data
+
+def test_batch_prediction_api():
+    """Test batched prediction returns one result row per input row"""
+    features = [[1.0, 0.8, 2.0, 1.0, 0.1], [3.0, 0.4, 1.0, 0.0, 0.5], [6.0, 0.9, 0.5, 2.0, 0.2]]
+    response = client.post("/predict/learning-path-predictor/batch", json={"features": features})
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["count"] == 3
+    assert len(data["predictions"]) == 3
+    assert "explanation" in data
+
+    # Rows have the same shape as the single-row endpoint's prediction
+    single = client.post("/predict/learning-path-predictor", json={"features": features[1]}).json()
+    assert len(data["predictions"][1]) == len(single["prediction"][0])
+
+def test_batch_prediction_binary_api():
+    """Test batched prediction with a binary .npy feature matrix"""
+    import io
+
+    X = np.random.rand(4, 21).astype(np.float32)
+    buffer = io.BytesIO()
+    np.save(buffer, X)
+    response = client.post(
+        "/predict/learning-path-predictor/batch",
+        content=buffer.getvalue(),
+        headers={"Content-Type": "application/x-npy", "Accept": "application/x-npy"},
+    )
+    assert response.status_code == 200
+    predictions = np.load(io.BytesIO(response.content))
+    assert predictions.shape[0] == 4
+
+def test_batch_prediction_invalid_payload():
+    """Test batched prediction rejects unknown models and malformed matrices"""
+    assert client.post("/predict/invalid-model/batch", json={"features": [[1.0]]}).status_code == 404
+    response = client.post("/predict/learning-path-predictor/batch", json={"features": []})
+    assert response.status_code == 400
+    ragged = client.post("/predict/learning-path-predictor/batch", json={"features": [[1.0, 2.0], [1.0]]})
+    assert ragged.status_code == 422
+    non_finite = client.post("/predict/learning-path-predictor/batch",
+                             content=b'{"features": [[1.0, NaN], [1.0, 2.0]]}',
+                             headers={"Content-Type": "application/json"})
+    assert non_finite.status_code == 400
+
+def test_recommendations_reuse_learning_path_predictions():
+    """Top-k recommendations are ranked from an existing learning path prediction"""
+    model = models['learning-path-predictor']
+    predictions = np.linspace(0.0, 1.0, len(model.topic_names)).reshape(1, -1)
+    recommendations = model.recommend_topics(predictions, top_k=3)
+    assert [r['topic'] for r in recommendations] == model.topic_names[::-1][:3]
+    assert recommendations[0]['score'] == 1.0
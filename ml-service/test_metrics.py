@@ -0,0 +1,37 @@
+"""
+Tests for the Prometheus-style metrics
+"""
+
+from metrics import REGISTRY, Counter, Histogram, render_metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Buckets are cumulative with +Inf, sum and count per label set"""
+    histogram = Histogram("test_latency_seconds", "Test latency", ("stage",), buckets=(0.1, 1.0))
+    try:
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "load")
+        with histogram.time("other"):
+            pass
+
+        lines = histogram.render()
+        assert 'test_latency_seconds_bucket{stage="load",le="0.1"} 2' in lines
+        assert 'test_latency_seconds_bucket{stage="load",le="1"} 3' in lines
+        assert 'test_latency_seconds_bucket{stage="load",le="+Inf"} 4' in lines
+        assert 'test_latency_seconds_sum{stage="load"} 3.65' in lines
+        assert 'test_latency_seconds_count{stage="load"} 4' in lines
+        assert histogram.count("other") == 1
+    finally:
+        REGISTRY.remove(histogram)
+
+def test_counter_in_exposition():
+    """Counters render with HELP/TYPE headers in the full exposition"""
+    counter = Counter("test_events_total", "Test events", ("result",))
+    try:
+        counter.inc("hit")
+        counter.inc("hit", amount=2)
+        text = render_metrics()
+        assert "# TYPE test_events_total counter" in text
+        assert 'test_events_total{result="hit"} 3' in text
+    finally:
+        REGISTRY.remove(counter)
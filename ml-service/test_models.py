@@ -0,0 +1,112 @@
+"""
+Tests for model persistence
+"""
+
+import numpy as np
+
+from models.artifacts import load_artifact, read_metadata, save_artifact
+from models.performance_predictor import PerformancePredictor
+
+
+def test_artifact_round_trip(tmp_path):
+    """Arrays come back as read-only .npy memory maps at aligned offsets; 0-d arrays as scalars"""
+    path = tmp_path / "model.json"
+    weights = np.arange(12, dtype=np.float64).reshape(3, 4)
+    save_artifact(path, {'weights': weights, 'bias': np.asarray(0.25), 'mask': np.ones(5, dtype=np.int32),
+                         'empty': np.zeros((0, 3))}, {'version': 'v1'})
+
+    arrays, metadata = load_artifact(path)
+    assert metadata == read_metadata(path) == {'version': 'v1'}
+    np.testing.assert_array_equal(arrays['weights'], weights)
+    assert arrays['bias'] == 0.25 and arrays['mask'].dtype == np.int32 and arrays['empty'].shape == (0, 3)
+    assert not arrays['weights'].flags.writeable
+    assert arrays['weights'].ctypes.data % 64 == 0
+
+def test_artifact_saves_swap_atomically(tmp_path):
+    """A save replaces the sidecar in one step; arrays a reader may still map stay one save longer"""
+    path = tmp_path / "model.json"
+    for version in range(3):
+        save_artifact(path, {'weights': np.full(4, float(version))}, {'version': version})
+    old_arrays, _ = load_artifact(path)
+    save_artifact(path, {'weights': np.full(4, 3.0)}, {'version': 3})
+
+    arrays, metadata = load_artifact(path)
+    assert metadata['version'] == 3 and arrays['weights'][0] == 3.0
+    assert old_arrays['weights'][0] == 2.0  # the replaced save's mapping is intact
+    assert len(list((tmp_path / "model.arrays").iterdir())) == 2
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith(".")] == []
+
+def test_trained_weights_survive_reload(tmp_path):
+    """A trained model's weights, bias and scaler are persisted and predictions match after reload"""
+    model = PerformancePredictor()
+    model.models_dir = tmp_path
+    X = np.random.rand(200, len(model.feature_names))
+    assert model.train(X, X[:, 1])
+
+    reloaded = PerformancePredictor()
+    reloaded.models_dir = tmp_path
+    assert reloaded.load_model()
+    assert reloaded.version == model.version and reloaded.is_trained
+    np.testing.assert_allclose(reloaded.predict_batch(X), model.predict_batch(X))
+
+def test_registry_loads_models_on_first_use():
+    """Names and membership never load a model; item access loads it exactly once"""
+    from models.registry import ModelRegistry
+
+    loads = []
+
+    def factory():
+        loads.append(1)
+        return PerformancePredictor()
+
+    registry = ModelRegistry({'performance-predictor': factory})
+    assert 'performance-predictor' in registry and list(registry) == ['performance-predictor']
+    assert not registry.is_loaded('performance-predictor') and loads == []
+
+    model = registry['performance-predictor']
+    assert registry['performance-predictor'] is model and registry.is_loaded('performance-predictor')
+    assert len(loads) == 1
+
+def test_partial_fit_streams_scaler_and_weights(tmp_path):
+    """Chunked training fits the same scaler as the full dataset and saves a reloadable model"""
+    model = PerformancePredictor()
+    model.models_dir = tmp_path
+    X = np.random.rand(5000, len(model.feature_names))
+    y = X[:, 1]
+
+    model.start_partial_fit()
+    for start in range(0, len(X), 1500):
+        model.partial_fit(X[start:start + 1500], y[start:start + 1500])
+    assert model.finish_partial_fit()
+
+    np.testing.assert_allclose(model.scaler_mean, X.mean(axis=0))
+    np.testing.assert_allclose(model.scaler_std, X.std(axis=0) + 1e-8)
+    assert np.mean((model.predict_batch(X).ravel() - y) ** 2) < np.var(y)
+
+    reloaded = PerformancePredictor()
+    reloaded.models_dir = tmp_path
+    assert reloaded.load_model() and reloaded.version == model.version
+    np.testing.assert_allclose(reloaded.predict_batch(X), model.predict_batch(X))
+
+def test_partial_fit_resumes_from_trained_weights(tmp_path):
+    """A resumed run starts from a copy of the served (memory-mapped) weights and keeps its scaler"""
+    trained = PerformancePredictor()
+    trained.models_dir = tmp_path
+    X = np.random.rand(2000, len(trained.feature_names))
+    trained.start_partial_fit()
+    trained.partial_fit(X, X[:, 1])
+    assert trained.finish_partial_fit()
+    served = PerformancePredictor()
+    served.models_dir = tmp_path
+    assert served.load_model() and not served.weights.flags.writeable
+    weights, scaler_mean = served.weights.copy(), served.scaler_mean.copy()
+
+    model = PerformancePredictor()
+    model.models_dir = tmp_path
+    model.start_partial_fit(resume_from=served)
+    np.testing.assert_array_equal(model.weights, weights)
+    model.partial_fit(X[:500] + 1.0, X[:500, 1])
+    assert model.finish_partial_fit()
+    np.testing.assert_array_equal(model.scaler_mean, scaler_mean)
+    assert not np.array_equal(model.weights, weights)
+    np.testing.assert_array_equal(served.weights, weights)
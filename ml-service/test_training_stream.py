@@ -0,0 +1,78 @@
+"""
+Tests for streaming training uploads
+"""
+
+import asyncio
+import io
+import json
+
+import numpy as np
+
+from training_stream import ndjson_chunks, npy_chunks
+
+
+async def pieces(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+def collect(chunks):
+    async def run():
+        return [chunk async for chunk in chunks]
+    return asyncio.run(run())
+
+def npy_document(array: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+def test_chunks_survive_arbitrary_stream_boundaries():
+    """Chunks come out whole however the body is split across network reads"""
+    X = np.random.rand(10, 3)
+    y = np.random.rand(10)
+    body = npy_document(X[:6]) + npy_document(y[:6]) + npy_document(X[6:].astype(np.float32)) + npy_document(y[6:])
+    for size in (1, 7, 4096):
+        chunks = collect(npy_chunks(pieces(body, size)))
+        assert [len(inputs) for inputs, _ in chunks] == [6, 4]
+        np.testing.assert_allclose(np.vstack([inputs for inputs, _ in chunks]), X, rtol=1e-6)
+        np.testing.assert_array_equal(np.concatenate([outputs for _, outputs in chunks]), y)
+
+    lines = b"\n".join(json.dumps({"input": list(row), "output": float(target)}).encode() for row, target in zip(X, y))
+    chunks = collect(ndjson_chunks(pieces(lines + b"\n\n", 5), chunk_rows=4))
+    assert [len(inputs) for inputs, _ in chunks] == [4, 4, 2]
+    np.testing.assert_array_equal(np.vstack([outputs for _, outputs in chunks]).ravel(), y)
+
+def test_stream_train_endpoint_replaces_model(tmp_path, monkeypatch):
+    """Streamed NDJSON trains a new model that replaces the served one; bad streams are rejected"""
+    from fastapi.testclient import TestClient
+    import main
+    from models.performance_predictor import PerformancePredictor
+
+    def factory():
+        model = PerformancePredictor()
+        model.models_dir = tmp_path
+        return model
+
+    monkeypatch.setitem(main.MODEL_CLASSES, 'performance-predictor', factory)
+    previous = main.models['performance-predictor']
+    client = TestClient(main.app)
+    X = np.random.rand(500, 8)
+    body = "\n".join(json.dumps({"input": list(row), "output": row[1]}) for row in X)
+    try:
+        response = client.post("/train/performance-predictor/stream", content=body,
+                               headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 200
+        assert response.json()["rows"] == 500
+        served = main.models['performance-predictor']
+        assert served is not previous and served.is_trained and served.models_dir == tmp_path
+
+        resumed = client.post("/train/performance-predictor/stream?resume=true", content=body,
+                              headers={"Content-Type": "application/x-ndjson"})
+        assert resumed.status_code == 200
+        np.testing.assert_array_equal(main.models['performance-predictor'].scaler_mean, served.scaler_mean)
+    finally:
+        main.models.replace('performance-predictor', previous)
+
+    bad = client.post("/train/performance-predictor/stream", content=b"not json\n",
+                      headers={"Content-Type": "application/x-ndjson"})
+    assert bad.status_code == 400
+    assert client.post("/train/performance-predictor/stream", json={}).status_code == 415
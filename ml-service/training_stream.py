@@ -0,0 +1,171 @@
+"""
+Streaming training uploads
+Parses NDJSON rows or binary .npy chunks from a request body stream into bounded training chunks
+"""
+
+import ast
+import json
+import os
+import struct
+from typing import AsyncIterator, List, Optional, Tuple
+
+import numpy as np
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# NDJSON rows collected per training chunk (one partial_fit call)
+TRAIN_CHUNK_ROWS = int(os.getenv('ML_TRAIN_CHUNK_ROWS', '1024'))
+# Largest .npy document buffered from a training stream
+MAX_CHUNK_BYTES = int(os.getenv('ML_TRAIN_MAX_CHUNK_BYTES', str(32 * 1024 * 1024)))
+# Longest NDJSON line (one example)
+MAX_LINE_BYTES = 1024 * 1024
+
+NPY_MAGIC = b'\x93NUMPY'
+# .npy headers are padded to 64 bytes; real ones stay far below this
+MAX_NPY_HEADER_BYTES = 65536
+
+Chunk = Tuple[np.ndarray, np.ndarray]
+
+
+def _ndjson_row(line: bytes, line_number: int) -> Optional[Tuple[list, list]]:
+    """(input, output) of one NDJSON line, or None for a blank line"""
+    if not line.strip():
+        return None
+    try:
+        record = json.loads(line)
+        features, target = record['input'], record['output']
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Line {line_number}: expected {{\"input\": [...], \"output\": ...}} ({e})")
+    return features, (target if isinstance(target, list) else [target])
+
+def _chunk(inputs: List[list], outputs: List[list]) -> Chunk:
+    return np.asarray(inputs, dtype=np.float64), np.asarray(outputs, dtype=np.float64)
+
+async def ndjson_chunks(stream: AsyncIterator[bytes], chunk_rows: int = TRAIN_CHUNK_ROWS,
+                        max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Chunk]:
+    """(inputs, outputs) chunks of up to chunk_rows rows from an NDJSON byte stream
+
+    Each line is one example: {"input": [features], "output": [targets] or a
+    number}. Only the current chunk and one partial line are held in memory.
+
+    Raises:
+        ValueError: A malformed line, a line over max_line_bytes or rows of differing lengths
+    """
+    buffer = b''
+    inputs: List[list] = []
+    outputs: List[list] = []
+    line_number = 0
+    async for piece in stream:
+        *lines, buffer = (buffer + piece).split(b'\n')
+        if len(buffer) > max_line_bytes:
+            raise ValueError(f"Line {line_number + len(lines) + 1} exceeds {max_line_bytes} bytes")
+        for line in lines:
+            line_number += 1
+            row = _ndjson_row(line, line_number)
+            if row is None:
+                continue
+            inputs.append(row[0])
+            outputs.append(row[1])
+            if len(inputs) >= chunk_rows:
+                yield _chunk(inputs, outputs)
+                inputs, outputs = [], []
+
+    row = _ndjson_row(buffer, line_number + 1)
+    if row is not None:
+        inputs.append(row[0])
+        outputs.append(row[1])
+    if inputs:
+        yield _chunk(inputs, outputs)
+
+
+class NpyStreamReader:
+    """Splits a byte stream of concatenated .npy documents into arrays
+
+    Each document's header is checked as soon as it arrives, so oversized or
+    non-numeric arrays are rejected before their data is buffered.
+    """
+
+    def __init__(self, max_bytes: int = MAX_CHUNK_BYTES):
+        self.max_bytes = max_bytes
+        self._buffer = bytearray()
+        self._header: Optional[Tuple[int, Tuple[int, ...], bool, np.dtype]] = None
+
+    @property
+    def buffered(self) -> int:
+        """Bytes of an incomplete document held"""
+        return len(self._buffer)
+
+    def feed(self, data: bytes) -> List[np.ndarray]:
+        """Add bytes from the stream; returns the documents they complete"""
+        self._buffer += data
+        arrays = []
+        while True:
+            if self._header is None:
+                self._header = self._parse_header()
+                if self._header is None:
+                    break
+            offset, shape, fortran_order, dtype = self._header
+            end = offset + int(np.prod(shape)) * dtype.itemsize
+            if len(self._buffer) < end:
+                break
+            array = np.frombuffer(bytes(self._buffer[offset:end]), dtype=dtype)
+            arrays.append(array.reshape(shape, order='F' if fortran_order else 'C'))
+            del self._buffer[:end]
+            self._header = None
+        return arrays
+
+    def _parse_header(self):
+        """(data offset, shape, fortran order, dtype) of the buffered document, or None if incomplete"""
+        if len(self._buffer) < 10:
+            return None
+        if bytes(self._buffer[:6]) != NPY_MAGIC:
+            raise ValueError("Not a .npy document")
+        major = self._buffer[6]
+        if major == 1:
+            (header_length,), offset = struct.unpack('<H', self._buffer[8:10]), 10
+        elif major in (2, 3) and len(self._buffer) >= 12:
+            (header_length,), offset = struct.unpack('<I', self._buffer[8:12]), 12
+        elif major in (2, 3):
+            return None
+        else:
+            raise ValueError(f"Unsupported .npy version {major}")
+        if header_length > MAX_NPY_HEADER_BYTES:
+            raise ValueError(f".npy header exceeds {MAX_NPY_HEADER_BYTES} bytes")
+        if len(self._buffer) < offset + header_length:
+            return None
+
+        try:
+            header = ast.literal_eval(bytes(self._buffer[offset:offset + header_length]).decode('latin1'))
+            shape, fortran_order = tuple(header['shape']), bool(header['fortran_order'])
+            dtype = np.dtype(np.lib.format.descr_to_dtype(header['descr']))
+        except Exception as e:
+            raise ValueError(f"Invalid .npy header: {e}")
+        if dtype.kind not in 'fiu':
+            raise ValueError("Training arrays must be numeric")
+        if len(shape) not in (1, 2):
+            raise ValueError("Training arrays must be 1-D or 2-D")
+        if int(np.prod(shape)) * dtype.itemsize > self.max_bytes:
+            raise ValueError(f"Chunk exceeds {self.max_bytes} bytes")
+        return offset + header_length, shape, fortran_order, dtype
+
+
+async def npy_chunks(stream: AsyncIterator[bytes], max_bytes: int = MAX_CHUNK_BYTES) -> AsyncIterator[Chunk]:
+    """(inputs, outputs) chunks from a byte stream of .npy documents
+
+    Documents alternate: an inputs matrix, then its outputs (a matrix, or a
+    vector for single-output models). Only one chunk is held in memory.
+
+    Raises:
+        ValueError: A malformed or oversized document, or a stream ending mid-chunk
+    """
+    reader = NpyStreamReader(max_bytes)
+    inputs = None
+    async for piece in stream:
+        for array in reader.feed(piece):
+            if inputs is None:
+                inputs = array
+            else:
+                yield inputs, array
+                inputs = None
+    if reader.buffered or inputs is not None:
+        raise ValueError("Stream ended inside a chunk")